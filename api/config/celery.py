@@ -1,8 +1,32 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 app = Celery("config")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def _reset_pooled_clients(**kwargs):
+    # Each prefork child builds its own connections instead of reusing the parent's sockets.
+    from core.ai_clients import reset_clients
+    from core.lightpanda import reset_browser_pool
+    from core.services.scraping import reset_http_client
+
+    reset_clients()
+    reset_browser_pool()
+    reset_http_client()
+
+
+@worker_process_shutdown.connect
+def _close_pooled_clients(**kwargs):
+    from core.ai_clients import close_clients
+    from core.lightpanda import close_browser_pool
+    from core.services.scraping import close_http_client
+
+    close_clients()
+    close_browser_pool()
+    close_http_client()
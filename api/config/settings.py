@@ -74,6 +74,11 @@ INSTALLED_APPS = [
     'corsheaders',
 ]
 
+# Optional pgvector store for chunk embeddings (PostgreSQL with the `vector` extension only).
+PGVECTOR_ENABLED = os.getenv("PGVECTOR_ENABLED", "False") == "True"
+if PGVECTOR_ENABLED:
+    INSTALLED_APPS.append('pgvector_store')
+
 MIDDLEWARE = [
     'core.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -185,6 +190,12 @@ CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_IMPORTS = ("core.tasks", "matching.tasks")
 
+# Embeddings: width requested from the model for chunk and query vectors alike
+EMBEDDING_DIMENSIONS = int(os.environ.get("EMBEDDING_DIMENSIONS", 1536))
+
+# Matching: on-disk exact vector indexes used by the "local" vector backend
+LOCAL_VECTOR_INDEX_DIR = os.environ.get("LOCAL_VECTOR_INDEX_DIR", os.path.join(BASE_DIR, "var", "vector-indexes"))
+
 # CrewAI (no special settings needed for hello world)
 
 # CORS is now handled by our custom middleware in core.middleware.CorsMiddleware
@@ -7,6 +7,7 @@ from django.utils.translation import ngettext
 from .models import (
     Document,
     DocumentChunk,
+    EmbeddingCacheEntry,
     Entity,
     EntityType,
     Match,
@@ -20,9 +21,11 @@ from .models import (
     MatchingSearchHitLog,
     MatchingSearchLog,
     MatchingTemplate,
+    ReindexCheckpoint,
+    ScrapeCacheEntry,
     Workspace,
 )
-from .tasks import chunk_requires_weaviate_sync, embed_document_chunk_task
+from .tasks import chunk_requires_weaviate_sync, embed_document_chunk_task, scrape_document_task
 
 
 def _format_json(value) -> str:
@@ -169,6 +172,26 @@ class DocumentAdmin(admin.ModelAdmin):
     list_display = ("title", "entity", "source", "created_at")
     search_fields = ("title", "source")
     list_filter = ("source", "created_at")
+    actions = ("rescrape_sources",)
+
+    def rescrape_sources(self, request, queryset):
+        queued = 0
+        for document_id in queryset.exclude(source__isnull=True).exclude(source="").values_list("id", flat=True):
+            scrape_document_task.delay(str(document_id), force=True)
+            queued += 1
+
+        if not queued:
+            self.message_user(request, "None of the selected documents has a source.", level=messages.WARNING)
+            return
+
+        message = ngettext(
+            "Queued %(count)d document for re-scraping.",
+            "Queued %(count)d documents for re-scraping.",
+            queued,
+        ) % {"count": queued}
+        self.message_user(request, message, level=messages.INFO)
+
+    rescrape_sources.short_description = "Re-scrape sources (bypass the scrape cache)"
 
 
 @admin.register(DocumentChunk)
@@ -210,6 +233,29 @@ class DocumentChunkAdmin(admin.ModelAdmin):
     sync_with_weaviate.short_description = "Sync selected chunks with Weaviate"
 
 
+@admin.register(EmbeddingCacheEntry)
+class EmbeddingCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("text_checksum", "model", "dimensions", "hit_count", "last_used_at")
+    search_fields = ("text_checksum",)
+    list_filter = ("model", "dimensions")
+    readonly_fields = ("text_checksum", "model", "dimensions", "hit_count", "last_used_at", "created_at")
+    exclude = ("vector",)
+
+
+@admin.register(ScrapeCacheEntry)
+class ScrapeCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("url", "content_hash", "hit_count", "fetched_at")
+    search_fields = ("url", "content_hash")
+    readonly_fields = ("content_hash", "etag", "last_modified", "fetched_at", "hit_count", "created_at", "updated_at")
+
+
+@admin.register(ReindexCheckpoint)
+class ReindexCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "scanned_count", "queued_count", "total_estimate", "started_at", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = ("last_chunk_id", "scanned_count", "queued_count", "total_estimate", "started_at", "finished_at")
+
+
 @admin.register(MatchingTemplate)
 class MatchingTemplateAdmin(admin.ModelAdmin):
     list_display = (
@@ -273,6 +319,7 @@ class MatchingJobRunAdmin(admin.ModelAdmin):
         "finished_at",
         "matching_config_snapshot_pretty",
         "plan_snapshot_pretty",
+        "metadata_pretty",
         "error_message",
         "created_at",
         "updated_at",
@@ -280,6 +327,7 @@ class MatchingJobRunAdmin(admin.ModelAdmin):
     fieldsets = (
         (None, {"fields": ("matching_job", "status", "started_at", "finished_at", "error_message")}),
         ("Configuration", {"fields": ("matching_config_snapshot_pretty", "plan_snapshot_pretty")}),
+        ("Metrics", {"fields": ("metadata_pretty",)}),
         ("Timestamps", {"fields": ("created_at", "updated_at")}),
     )
     inlines = [MatchingSearchLogInline, MatchingEvaluationLogInline]
@@ -295,6 +343,11 @@ class MatchingJobRunAdmin(admin.ModelAdmin):
 
     plan_snapshot_pretty.short_description = "Plan"
 
+    def metadata_pretty(self, obj):
+        return _format_json(obj.metadata)
+
+    metadata_pretty.short_description = "Metrics"
+
     def search_count(self, obj):
         return obj.searches.count()
 
@@ -1,10 +1,36 @@
+"""Process-wide registry of OpenAI and Weaviate clients.
+
+Clients are created lazily and reused for the lifetime of the process so
+keep-alive connections survive across tasks and requests. Celery resets the
+registry in each forked worker (connections must not be shared with the
+parent) and closes it on shutdown; other processes close it at exit.
+"""
+
+import atexit
+import logging
 import os
-from typing import Dict
+import threading
+import time
+from typing import Dict, Optional
 
 from openai import OpenAI
 import weaviate
 from weaviate.auth import AuthApiKey
 
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_openai_client: Optional[OpenAI] = None
+_weaviate_client: Optional[weaviate.WeaviateClient] = None
+_weaviate_checked_at = 0.0
+
+
+def _int_from_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
 
 def _build_openai_client_kwargs() -> Dict[str, str]:
     api_key = os.getenv("OPENAI_API_KEY")
@@ -16,21 +42,28 @@ def _build_openai_client_kwargs() -> Dict[str, str]:
     return kwargs
 
 
+def _shared_openai_client() -> OpenAI:
+    global _openai_client
+
+    with _lock:
+        if _openai_client is None:
+            _openai_client = OpenAI(**_build_openai_client_kwargs())
+        return _openai_client
+
+
 def get_llm_client() -> OpenAI:
-    """Return an OpenAI client configured for chat/completions."""
+    """Return the pooled OpenAI client used for chat/completions."""
 
-    return OpenAI(**_build_openai_client_kwargs())
+    return _shared_openai_client()
 
 
 def get_embedding_client() -> OpenAI:
-    """Return an OpenAI client configured for embeddings."""
+    """Return the pooled OpenAI client used for embeddings."""
 
-    return OpenAI(**_build_openai_client_kwargs())
+    return _shared_openai_client()
 
 
-def get_weaviate_client() -> weaviate.WeaviateClient:
-    """Return a Weaviate client for vector storage operations."""
-
+def _connect_weaviate() -> weaviate.WeaviateClient:
     url = os.getenv("WEAVIATE_ENDPOINT")
     if not url:
         raise ValueError("WEAVIATE_ENDPOINT must be set")
@@ -48,3 +81,86 @@ def get_weaviate_client() -> weaviate.WeaviateClient:
         auth_credentials=auth,
         headers=additional_headers or None,
     )
+
+
+def _weaviate_is_healthy(client: weaviate.WeaviateClient) -> bool:
+    try:
+        return client.is_connected() and client.is_ready()
+    except Exception:  # pragma: no cover - any failure means reconnect
+        logger.debug("Weaviate health check failed", exc_info=True)
+        return False
+
+
+def _close_quietly(client) -> None:
+    try:
+        client.close()
+    except Exception:  # pragma: no cover - best effort during teardown
+        logger.debug("Error closing client %r", client, exc_info=True)
+
+
+def get_weaviate_client() -> weaviate.WeaviateClient:
+    """Return the pooled Weaviate client, reconnecting if it became unhealthy.
+
+    The readiness probe runs at most every ``WEAVIATE_HEALTHCHECK_INTERVAL``
+    seconds so the common path does not add a network round trip.
+    """
+
+    global _weaviate_client, _weaviate_checked_at
+
+    with _lock:
+        now = time.monotonic()
+        client = _weaviate_client
+        if client is not None:
+            interval = _int_from_env("WEAVIATE_HEALTHCHECK_INTERVAL", 30)
+            if now - _weaviate_checked_at < interval:
+                return client
+            if _weaviate_is_healthy(client):
+                _weaviate_checked_at = now
+                return client
+            logger.warning("Pooled Weaviate client is unhealthy; reconnecting")
+            _close_quietly(client)
+
+        _weaviate_client = _connect_weaviate()
+        _weaviate_checked_at = now
+        return _weaviate_client
+
+
+def reset_weaviate_client() -> None:
+    """Close the pooled Weaviate client so the next caller reconnects."""
+
+    global _weaviate_client
+
+    with _lock:
+        client, _weaviate_client = _weaviate_client, None
+    if client is not None:
+        _close_quietly(client)
+
+
+def reset_clients() -> None:
+    """Forget pooled clients without closing them.
+
+    Used right after a fork: the inherited connections belong to the parent
+    process and must not be reused or shut down by the child.
+    """
+
+    global _openai_client, _weaviate_client
+
+    with _lock:
+        _openai_client = None
+        _weaviate_client = None
+
+
+def close_clients() -> None:
+    """Close all pooled clients; safe to call more than once."""
+
+    global _openai_client, _weaviate_client
+
+    with _lock:
+        openai_client, _openai_client = _openai_client, None
+        weaviate_client, _weaviate_client = _weaviate_client, None
+    for client in (openai_client, weaviate_client):
+        if client is not None:
+            _close_quietly(client)
+
+
+atexit.register(close_clients)
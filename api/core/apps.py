@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 
 class CoreConfig(AppConfig):
@@ -6,5 +8,8 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self) -> None:
+        if settings.EMBEDDING_DIMENSIONS < 1:
+            raise ImproperlyConfigured(f"EMBEDDING_DIMENSIONS must be positive, got {settings.EMBEDDING_DIMENSIONS}")
+
         # Import signal handlers
         from . import signals  # noqa: F401
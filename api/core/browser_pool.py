@@ -0,0 +1,218 @@
+"""Pool of live browser sessions driven by async Playwright.
+
+A background event loop owns up to ``size`` CDP connections that are reused
+across fetches. Every URL gets a fresh browser context, closed afterwards, so
+cookies, local/session storage and permissions never leak from one page to
+the next. Requests to the same host are additionally bounded by
+``per_domain_limit``.
+
+Synchronous callers (Celery tasks) submit work to the loop and block on the
+result, so a worker process keeps its connections warm between tasks. Each
+page (navigation plus handler) must finish within ``page_timeout_ms``; a hung
+page is abandoned, its connection dropped, and its domain slot freed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar, Union
+from urllib.parse import urlsplit
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+ConnectFactory = Callable[[Playwright], Awaitable[Browser]]
+PageHandler = Callable[[Page], Awaitable[T]]
+
+
+@dataclass(slots=True)
+class _Session:
+    browser: Browser
+
+
+class BrowserPool:
+    """Reusable browser connections for concurrent page fetches."""
+
+    def __init__(
+        self,
+        *,
+        connect: ConnectFactory,
+        size: int = 4,
+        per_domain_limit: int = 2,
+        navigation_timeout_ms: int = 30_000,
+        page_timeout_ms: Optional[int] = None,
+        wait_until: str = "networkidle",
+        playwright_factory: Callable[[], Any] = async_playwright,
+    ) -> None:
+        self._connect = connect
+        self.size = max(1, size)
+        self.per_domain_limit = max(1, per_domain_limit)
+        self.navigation_timeout_ms = navigation_timeout_ms
+        # Navigation plus the page handler; defaults to twice the navigation timeout.
+        self.page_timeout_ms = page_timeout_ms or navigation_timeout_ms * 2
+        self.wait_until = wait_until
+        self._playwright_factory = playwright_factory
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._playwright: Optional[Playwright] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: List[_Session] = []
+        self._domain_limits: Dict[str, asyncio.Semaphore] = {}
+
+    # -- loop management -------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _run(self, coro: Awaitable[T], timeout: float) -> T:
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError as exc:
+            # Cancelling runs the fetches' cleanup, which frees their slots.
+            future.cancel()
+            raise PlaywrightTimeoutError(f"Browser pool did not finish within {timeout:.0f} s") from exc
+
+    def _budget(self, pages: int) -> float:
+        """Worst-case seconds for ``pages`` fetches: one page timeout per round of slots."""
+
+        parallel = min(self.size, self.per_domain_limit)
+        return (math.ceil(max(1, pages) / parallel) + 1) * self.page_timeout_ms / 1000
+
+    # -- sessions ----------------------------------------------------------
+
+    async def _acquire(self) -> _Session:
+        if self._playwright is None:
+            self._playwright = await self._playwright_factory().start()
+            self._slots = asyncio.Semaphore(self.size)
+
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            browser = await self._connect(self._playwright)
+        except BaseException:
+            self._slots.release()
+            raise
+        logger.debug("Opened browser session (%s max)", self.size)
+        return _Session(browser=browser)
+
+    async def _release(self, session: _Session, healthy: bool) -> None:
+        try:
+            if healthy and session.browser.is_connected():
+                self._idle.append(session)
+            else:
+                await self._close_session(session)
+        finally:
+            self._slots.release()
+
+    async def _close_session(self, session: _Session) -> None:
+        try:
+            await asyncio.wait_for(session.browser.close(), self.navigation_timeout_ms / 1000)
+        except (PlaywrightError, asyncio.TimeoutError):
+            logger.debug("Error closing browser session", exc_info=True)
+
+    async def _load(self, context: BrowserContext, url: str, handler: PageHandler[T]) -> T:
+        page = await context.new_page()
+        started = time.perf_counter()
+        await page.goto(url, wait_until=self.wait_until, timeout=self.navigation_timeout_ms)
+        logger.info("Loaded %s in %.0f ms", url, (time.perf_counter() - started) * 1000)
+        return await handler(page)
+
+    async def _fetch(self, url: str, handler: PageHandler[T]) -> T:
+        host = urlsplit(url).hostname or ""
+        domain_limit = self._domain_limits.setdefault(host, asyncio.Semaphore(self.per_domain_limit))
+
+        async with domain_limit:
+            session = await self._acquire()
+            healthy = True
+            context = None
+            try:
+                context = await session.browser.new_context()
+                return await asyncio.wait_for(self._load(context, url, handler), self.page_timeout_ms / 1000)
+            except asyncio.TimeoutError as exc:
+                # A hung page may have wedged the connection; do not reuse it.
+                healthy = False
+                raise PlaywrightTimeoutError(f"Timed out after {self.page_timeout_ms} ms loading {url}") from exc
+            except PlaywrightError:
+                healthy = session.browser.is_connected()
+                raise
+            finally:
+                if context is not None and healthy:
+                    # Closing the context discards its pages, cookies and storage.
+                    try:
+                        await asyncio.wait_for(context.close(), self.navigation_timeout_ms / 1000)
+                    except (PlaywrightError, asyncio.TimeoutError):
+                        healthy = False
+                await self._release(session, healthy)
+
+    # -- public API --------------------------------------------------------
+
+    def fetch(self, url: str, handler: PageHandler[T]) -> T:
+        """Open ``url`` in a pooled session and return ``handler(page)``."""
+
+        return self._run(self._fetch(url, handler), timeout=self._budget(1))
+
+    def fetch_many(
+        self,
+        urls: Iterable[str],
+        handler: PageHandler[T],
+    ) -> Dict[str, Union[T, BaseException]]:
+        """Fetch URLs concurrently; failures are returned in place of results."""
+
+        unique_urls = list(dict.fromkeys(urls))
+
+        async def gather():
+            return await asyncio.gather(
+                *(self._fetch(url, handler) for url in unique_urls),
+                return_exceptions=True,
+            )
+
+        return dict(zip(unique_urls, self._run(gather(), timeout=self._budget(len(unique_urls)))))
+
+    async def _shutdown(self) -> None:
+        sessions, self._idle = self._idle, []
+        for session in sessions:
+            await self._close_session(session)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self) -> None:
+        """Close every idle session and stop the event loop."""
+
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=10)
+        except Exception:  # pragma: no cover - best effort during teardown
+            logger.debug("Error shutting down browser pool", exc_info=True)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+
+__all__ = ["BrowserPool", "ConnectFactory", "PageHandler"]
@@ -2,15 +2,18 @@
 
 from __future__ import annotations
 
+import atexit
 import logging
 import os
-from dataclasses import dataclass
-from typing import Optional
+import threading
+import time
+from typing import Dict, Iterable, Optional, Union
 
 import html2text
-from playwright.sync_api import Error as PlaywrightError
-from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
+from playwright.async_api import Error as PlaywrightError
+
+from .browser_pool import BrowserPool
 
 logger = logging.getLogger(__name__)
 
@@ -19,198 +22,331 @@ class LightpandaError(RuntimeError):
     """Raised when Lightpanda cannot fulfill a request."""
 
 
-def _clean_html(html: str) -> str:
-    """Clean HTML by removing unwanted elements like forms, navigation, etc."""
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    # Remove unwanted tags entirely
-    unwanted_tags = [
-        'nav', 
-        'form', 
-        'input', 
-        'button', 
-        'select', 
-        'textarea', 
-        'option',
-        'script', 
-        'style', 
-        'noscript', 
-        'iframe', 
-        'embed', 
-        'object',
-        'header', 
-        'footer', 
-        'aside', 
-        'advertisement', 
-        'ads'
-    ]
-    
-    for tag in unwanted_tags:
-        for element in soup.find_all(tag):
-            element.decompose()
-    
-    # Remove elements with unwanted classes or IDs
-    unwanted_selectors = [
-        # Navigation related
-        '[class*="nav"]', 
-        '[id*="nav"]', 
-        '[class*="menu"]', 
-        '[id*="menu"]',
-        '[class*="dropdown"]', '[id*="dropdown"]', '[class*="breadcrumb"]',
-        
-        # Sidebar and widgets
-        # '[class*="sidebar"]', '[id*="sidebar"]', '[class*="widget"]', 
-        # '[class*="aside"]', '[id*="aside"]',
-        
-        # Comments and social
-        # '[class*="comment"]', '[id*="comment"]', '[class*="social"]',
-        # '[class*="share"]', '[id*="share"]', '[class*="follow"]',
-        
-        # Ads and promotional
-        # '[class*="ad"]', '[id*="ad"]', '[class*="advertisement"]',
-        # '[class*="promo"]', '[class*="banner"]', '[class*="sponsor"]',
-        
-        # Forms and interactions
-        # '[class*="form"]', '[id*="form"]', '[class*="search"]', 
-        # '[class*="subscribe"]', '[class*="newsletter"]',
-        
-        # Headers and footers
-        # '[class*="header"]', '[id*="header"]', '[class*="footer"]', 
-        # '[id*="footer"]', '[class*="top"]', '[class*="bottom"]',
-        
-        # Metadata and tags
-        # '[class*="tag"]', '[class*="category"]', '[class*="meta"]',
-        # '[class*="author"]', '[class*="date"]', '[class*="time"]',
-        
-        # Related content
-        # '[class*="related"]', '[class*="recommend"]', '[class*="similar"]',
-        # '[class*="more"]', '[class*="next"]', '[class*="prev"]'
-    ]
-    
-    for selector in unwanted_selectors:
-        try:
-            for element in soup.select(selector):
-                # Only remove if it's not the main content container
-                if not any(main_class in (element.get('class') or []) 
-                          for main_class in ['content', 'main-content', 'article-content', 'post-content']):
-                    element.decompose()
-        except Exception as e:
-            logger.debug(f"Error removing elements with selector {selector}: {e}")
-    
-
-    # Remove empty elements that might be left behind
-    # for element in soup.find_all():
-    #     if not element.get_text(strip=True) and not element.find_all(['img', 'video', 'audio']):
-    #         element.decompose()
-    
-    return str(soup)
-
-
-def _html_to_markdown(html: str) -> str:
-    converter = html2text.HTML2Text()
-    converter.body_width = 0
-    converter.ignore_links = False
-    converter.ignore_images = True
-    markdown = converter.handle(html or "")
+# Elements dropped together with their content.
+_UNWANTED_TAGS = frozenset({
+    "nav",
+    "form",
+    "input",
+    "button",
+    "select",
+    "textarea",
+    "option",
+    "script",
+    "style",
+    "noscript",
+    "iframe",
+    "embed",
+    "object",
+    "header",
+    "footer",
+    "aside",
+    "advertisement",
+    "ads",
+})
+
+# (attribute, substring) pairs, equivalent to ``[class*="nav"]`` style selectors.
+_UNWANTED_ATTRIBUTE_MARKERS = (
+    ("class", "nav"),
+    ("id", "nav"),
+    ("class", "menu"),
+    ("id", "menu"),
+    ("class", "dropdown"),
+    ("id", "dropdown"),
+    ("class", "breadcrumb"),
+)
+
+# Containers that are never pruned by the attribute markers.
+_MAIN_CONTENT_CLASSES = frozenset({"content", "main-content", "article-content", "post-content"})
+
+# Elements without an end tag; they never open a subtree.
+_VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+})
+
+
+class _PruningHTML2Text(html2text.HTML2Text):
+    """html2text converter that drops boilerplate elements while it parses.
+
+    Cleaning and markdown conversion share one parse and one pass over the
+    document: unwanted subtrees are skipped as their start tags stream by,
+    instead of being removed from a separate tree that is then serialised
+    and parsed again.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(bodywidth=0)
+        self.ignore_links = False
+        self.ignore_images = True
+        # Keep entities such as &middot; as characters, matching text that
+        # arrives already decoded.
+        self.unicode_snob = True
+        # Open tags inside the subtree currently being skipped.
+        self._skipped: list[str] = []
+
+    @staticmethod
+    def _is_unwanted(tag: str, attrs) -> bool:
+        if tag in _UNWANTED_TAGS:
+            return True
+        values = {"class": "", "id": ""}
+        for name, value in attrs:
+            if name in values and value:
+                values[name] = value
+        if not (values["class"] or values["id"]):
+            return False
+        if not any(marker in values[name] for name, marker in _UNWANTED_ATTRIBUTE_MARKERS):
+            return False
+        return not _MAIN_CONTENT_CLASSES.intersection(values["class"].split())
+
+    def handle_starttag(self, tag, attrs) -> None:
+        if self._skipped or self._is_unwanted(tag, attrs):
+            if tag not in _VOID_TAGS:
+                self._skipped.append(tag)
+            return
+        super().handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag) -> None:
+        if self._skipped:
+            # Close up to the most recent matching tag; stray end tags are ignored.
+            if tag in self._skipped:
+                while self._skipped.pop() != tag:
+                    pass
+            return
+        super().handle_endtag(tag)
+
+    def handle_data(self, data, entity_char: bool = False) -> None:
+        if not self._skipped:
+            super().handle_data(data, entity_char)
+
+    def handle_charref(self, c) -> None:
+        if not self._skipped:
+            super().handle_charref(c)
+
+    def handle_entityref(self, c) -> None:
+        if not self._skipped:
+            super().handle_entityref(c)
+
+
+def html_to_markdown(html: str) -> str:
+    """Strip navigation, forms and other boilerplate and convert to markdown."""
+
+    markdown = _PruningHTML2Text().handle(html or "")
     if not markdown.strip():
         raise LightpandaError("Unable to derive markdown from fetched page")
     return markdown
 
 
-def _extract_main_content(page) -> str:
-    """Extract main content from page using semantic HTML tags."""
-    # Priority order of selectors to find main content
-    content_selectors = [
-        'article',
-        'main', 
-        '[role="main"]',
-        '.main-content',
-        '.content',
-        '.post-content',
-        '.entry-content',
-        '.article-content',
-        '#main-content',
-        '#content',
-        '.container main',
-        '.page-content'
-    ]
-    
-    for selector in content_selectors:
-        try:
-            element = page.query_selector(selector)
-            if element:
-                # Check if the element has substantial content
-                text_content = element.text_content()
-                if text_content and len(text_content.strip()) > 100:
-                    logger.info(f"Found main content using selector: {selector}")
-                    return element.inner_html()
-        except Exception as e:
-            logger.debug(f"Error with selector {selector}: {e}")
+# Priority order of selectors to find main content
+_CONTENT_SELECTORS = [
+    'article',
+    'main',
+    '[role="main"]',
+    '.main-content',
+    '.content',
+    '.post-content',
+    '.entry-content',
+    '.article-content',
+    '#main-content',
+    '#content',
+    '.container main',
+    '.page-content',
+]
+
+# Divs whose class or id contains one of these are not content candidates.
+_SKIP_KEYWORDS = ['nav', 'header', 'footer', 'sidebar', 'menu', 'ad', 'advertisement']
+
+# Runs inside the page so extraction costs one CDP round trip instead of one
+# per selector and per candidate div.
+_EXTRACT_MAIN_CONTENT_SCRIPT = """
+({selectors, skipKeywords}) => {
+  for (const selector of selectors) {
+    let element = null;
+    try {
+      element = document.querySelector(selector);
+    } catch (error) {
+      continue;
+    }
+    if (element && (element.textContent || '').trim().length > 100) {
+      return {html: element.innerHTML, strategy: 'selector', selector};
+    }
+  }
+
+  // Fallback: the largest text block that is not navigation or chrome.
+  let best = null;
+  let bestLength = 0;
+  for (const div of document.querySelectorAll('div')) {
+    const length = (div.textContent || '').trim().length;
+    if (length <= bestLength) {
+      continue;
+    }
+    const marker = ((div.getAttribute('class') || '') + (div.getAttribute('id') || '')).toLowerCase();
+    if (!skipKeywords.some((keyword) => marker.includes(keyword))) {
+      best = div;
+      bestLength = length;
+    }
+  }
+  if (best && bestLength > 200) {
+    return {html: best.innerHTML, strategy: 'largest_block', selector: null};
+  }
+
+  const doctype = document.doctype ? '<!DOCTYPE ' + document.doctype.name + '>' : '';
+  return {html: doctype + document.documentElement.outerHTML, strategy: 'document', selector: null};
+}
+"""
+
+
+def extract_main_content_from_html(html: str) -> str:
+    """Server-side equivalent of the in-page script for statically fetched HTML."""
+
+    soup = BeautifulSoup(html or "", "html.parser")
+    for selector in _CONTENT_SELECTORS:
+        element = soup.select_one(selector)
+        if element is not None and len(element.get_text().strip()) > 100:
+            return element.decode_contents()
+
+    best = None
+    best_length = 0
+    for div in soup.find_all("div"):
+        length = len(div.get_text().strip())
+        if length <= best_length:
             continue
-    
-    # Fallback: try to find the largest text block
-    try:
-        # Look for divs with substantial text content
-        divs = page.query_selector_all('div')
-        best_div = None
-        max_text_length = 0
-        
-        for div in divs:
-            try:
-                text_content = div.text_content()
-                if text_content and len(text_content.strip()) > max_text_length:
-                    # Avoid navigation, header, footer, sidebar elements
-                    class_name = div.get_attribute('class') or ''
-                    id_name = div.get_attribute('id') or ''
-                    
-                    skip_keywords = ['nav', 'header', 'footer', 'sidebar', 'menu', 'ad', 'advertisement']
-                    if not any(keyword in (class_name + id_name).lower() for keyword in skip_keywords):
-                        max_text_length = len(text_content.strip())
-                        best_div = div
-            except Exception:
-                continue
-        
-        if best_div and max_text_length > 200:
-            logger.info("Found main content using largest text block heuristic")
-            return best_div.inner_html()
-    except Exception as e:
-        logger.debug(f"Error in fallback content extraction: {e}")
-    
-    # Final fallback: return body content
-    logger.warning("Could not find main content, falling back to full page")
-    return page.content()
+        marker = (" ".join(div.get("class") or []) + (div.get("id") or "")).lower()
+        if not any(keyword in marker for keyword in _SKIP_KEYWORDS):
+            best, best_length = div, length
+    if best is not None and best_length > 200:
+        return best.decode_contents()
+    return html or ""
 
 
-def fetch_markdown(url: str) -> str:
-    """Return markdown for the given URL using Lightpanda's remote browser."""
+async def _extract_main_content(page) -> str:
+    """Extract main content from page using semantic HTML tags."""
+
+    started = time.perf_counter()
+    result = await page.evaluate(
+        _EXTRACT_MAIN_CONTENT_SCRIPT,
+        {"selectors": _CONTENT_SELECTORS, "skipKeywords": _SKIP_KEYWORDS},
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    html = result.get("html") or ""
+
+    if result.get("strategy") == "document":
+        logger.warning("Could not find main content for %s, falling back to full page", page.url)
+    logger.info(
+        "Extracted main content from %s via %s%s in %.1f ms (%s chars)",
+        page.url,
+        result.get("strategy"),
+        f" ({result['selector']})" if result.get("selector") else "",
+        elapsed_ms,
+        len(html),
+    )
+    return html
+
+
+def _lightpanda_endpoint() -> str:
     api_key = os.getenv("LIGHTPANDA_API_KEY")
     if not api_key:
         raise LightpandaError("LIGHTPANDA_API_KEY is not configured")
+    return f"wss://cloud.lightpanda.io/ws?token={api_key}&browser=chrome"
+
+
+async def _connect_lightpanda(playwright):
+    return await playwright.chromium.connect_over_cdp(_lightpanda_endpoint())
+
+
+def _int_from_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide pool of Lightpanda sessions."""
+
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                connect=_connect_lightpanda,
+                size=_int_from_env("LIGHTPANDA_POOL_SIZE", 4),
+                per_domain_limit=_int_from_env("LIGHTPANDA_DOMAIN_CONCURRENCY", 2),
+            )
+        return _pool
+
 
-    ws_endpoint = f"wss://cloud.lightpanda.io/ws?token={api_key}&browser=chrome"
+def reset_browser_pool() -> None:
+    """Forget the pool after a fork; its loop thread does not exist in the child."""
 
-    print("Lightpanda endpoint:", ws_endpoint)
+    global _pool
 
+    with _pool_lock:
+        _pool = None
+
+
+def close_browser_pool() -> None:
+    """Close the pooled sessions; safe to call more than once."""
+
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_browser_pool)
+
+
+def fetch_markdown(url: str) -> str:
+    """Return markdown for the given URL using Lightpanda's remote browser."""
+
+    _lightpanda_endpoint()  # fail fast when not configured
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.connect_over_cdp(ws_endpoint)
-            context = browser.new_context()
-            page = context.new_page()
-            try:
-                page.goto(url, wait_until="networkidle", timeout=30 * 1000)
-                html = _extract_main_content(page)
-            finally:
-                page.close()
-                context.close()
-                browser.close()
+        html = get_browser_pool().fetch(url, _extract_main_content)
     except PlaywrightError as exc:  # pragma: no cover - interactive failure
         logger.exception("Lightpanda Playwright error for %s", url)
         raise LightpandaError(f"Failed to fetch content via Lightpanda: {exc}") from exc
 
-    # Clean the HTML before converting to markdown
-    cleaned_html = _clean_html(html)
-    return _html_to_markdown(cleaned_html)
+    return html_to_markdown(html)
+
 
+def fetch_many_markdown(urls: Iterable[str]) -> Dict[str, Union[str, LightpandaError]]:
+    """Fetch several URLs concurrently through the session pool.
+
+    Each URL maps to its markdown or to the ``LightpandaError`` explaining why
+    it could not be fetched; one failing page does not affect the others.
+    """
+
+    _lightpanda_endpoint()
+    results: Dict[str, Union[str, LightpandaError]] = {}
+    for url, outcome in get_browser_pool().fetch_many(urls, _extract_main_content).items():
+        if isinstance(outcome, BaseException):
+            logger.warning("Lightpanda fetch failed for %s: %s", url, outcome)
+            results[url] = (
+                outcome
+                if isinstance(outcome, LightpandaError)
+                else LightpandaError(f"Failed to fetch content via Lightpanda: {outcome}")
+            )
+            continue
+        try:
+            results[url] = html_to_markdown(outcome)
+        except LightpandaError as exc:
+            results[url] = exc
+    return results
 
-__all__ = ["LightpandaError", "fetch_markdown"]
 
+__all__ = [
+    "LightpandaError",
+    "close_browser_pool",
+    "extract_main_content_from_html",
+    "fetch_many_markdown",
+    "fetch_markdown",
+    "get_browser_pool",
+    "html_to_markdown",
+    "reset_browser_pool",
+]
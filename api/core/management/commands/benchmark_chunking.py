@@ -0,0 +1,99 @@
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import _chunking_config, _iter_segments, _split_text
+
+_WORDS = (
+    "experience team python django platform customer data pipeline design "
+    "senior engineer remote hiring product growth analytics cloud security "
+    "the a of and to in with for on"
+).split()
+
+_PIECE_SIZE = 1_048_576
+
+
+def _synthetic_pieces(total_bytes: int, seed: int):
+    """Yield ~1 MB pieces of markdown-like text until total_bytes is reached."""
+
+    rng = random.Random(seed)
+    produced = 0
+    while produced < total_bytes:
+        lines = []
+        size = 0
+        while size < _PIECE_SIZE:
+            line = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 40)))
+            if rng.random() < 0.1:
+                line = f"## {line[:40]}\n"
+            lines.append(line)
+            size += len(line) + 1
+        piece = "\n".join(lines) + "\n"
+        piece = piece[: total_bytes - produced]
+        produced += len(piece)
+        yield piece
+
+
+def _run_streaming(pieces: list, chunk_size: int, overlap: int) -> int:
+    """Consume the body piece by piece, as chunk_document_task reads it from the database."""
+
+    count = 0
+    for _ in _iter_segments(iter(pieces), chunk_size, overlap):
+        count += 1
+    return count
+
+
+def _run_in_memory(pieces: list, chunk_size: int, overlap: int) -> int:
+    """Materialise the whole body and every chunk, as the previous implementation did."""
+
+    body = "".join(pieces)
+    return len(_split_text(body, chunk_size, overlap))
+
+
+class Command(BaseCommand):
+    help = "Benchmark the streaming chunker against whole-body chunking on synthetic 1-50 MB documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1, 5, 10, 25, 50],
+            help="Synthetic body sizes in MB.",
+        )
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument(
+            "--skip-in-memory",
+            action="store_true",
+            help="Only measure the streaming chunker.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size, overlap = _chunking_config()
+        modes = [("streaming", _run_streaming)]
+        if not options["skip_in_memory"]:
+            modes.append(("in-memory", _run_in_memory))
+
+        self.stdout.write(
+            f"chunk_size={chunk_size} overlap={overlap}\n"
+            f"{'size':>6} {'mode':>10} {'chunks':>8} {'seconds':>8} {'MB/s':>7} {'peak MB':>8}"
+        )
+        for size_mb in options["sizes"]:
+            # Generated up front so neither timing nor peak memory includes it.
+            pieces = list(_synthetic_pieces(size_mb * 1_000_000, options["seed"]))
+            for label, runner in modes:
+                started = time.perf_counter()
+                count = runner(pieces, chunk_size, overlap)
+                elapsed = time.perf_counter() - started
+
+                # Measure memory in a separate pass; tracing slows execution.
+                tracemalloc.start()
+                runner(pieces, chunk_size, overlap)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{size_mb:>4}MB {label:>10} {count:>8} {elapsed:>8.2f} "
+                    f"{size_mb / elapsed if elapsed else 0:>7.1f} {peak / 1_000_000:>8.1f}"
+                )
@@ -0,0 +1,98 @@
+import re
+import time
+from pathlib import Path
+
+import html2text
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand, CommandError
+
+from core.lightpanda import html_to_markdown
+
+CORPUS_DIR = Path(__file__).resolve().parents[2] / "benchmark_data" / "html"
+
+_LEGACY_UNWANTED_TAGS = [
+    "nav", "form", "input", "button", "select", "textarea", "option", "script", "style",
+    "noscript", "iframe", "embed", "object", "header", "footer", "aside", "advertisement", "ads",
+]
+_LEGACY_UNWANTED_SELECTORS = [
+    '[class*="nav"]', '[id*="nav"]', '[class*="menu"]', '[id*="menu"]',
+    '[class*="dropdown"]', '[id*="dropdown"]', '[class*="breadcrumb"]',
+]
+_LEGACY_MAIN_CONTENT_CLASSES = ["content", "main-content", "article-content", "post-content"]
+
+
+def legacy_html_to_markdown(html: str) -> str:
+    """The previous pipeline: BeautifulSoup pruning pass per tag/selector, then html2text."""
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in _LEGACY_UNWANTED_TAGS:
+        for element in soup.find_all(tag):
+            element.decompose()
+    for selector in _LEGACY_UNWANTED_SELECTORS:
+        for element in soup.select(selector):
+            if not any(main_class in (element.get("class") or []) for main_class in _LEGACY_MAIN_CONTENT_CLASSES):
+                element.decompose()
+
+    converter = html2text.HTML2Text()
+    converter.body_width = 0
+    converter.ignore_links = False
+    converter.ignore_images = True
+    return converter.handle(str(soup))
+
+
+def normalise_markdown(markdown: str) -> str:
+    """Ignore whitespace-only differences (serialisation turns entities like &nbsp; into characters)."""
+
+    text = markdown.replace("\xa0", " ")
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+def load_corpus(directory: Path = CORPUS_DIR) -> dict:
+    return {path.name: path.read_text(encoding="utf-8") for path in sorted(directory.glob("*.html"))}
+
+
+class Command(BaseCommand):
+    help = "Benchmark single-pass HTML cleaning against the BeautifulSoup pipeline and check the output matches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--corpus", type=Path, default=CORPUS_DIR, help="Directory of saved .html pages.")
+
+    def handle(self, *args, **options):
+        corpus = load_corpus(options["corpus"])
+        if not corpus:
+            raise CommandError(f"No .html files found in {options['corpus']}")
+        iterations = max(1, options["iterations"])
+
+        mismatches = [
+            name
+            for name, html in corpus.items()
+            if normalise_markdown(html_to_markdown(html)) != normalise_markdown(legacy_html_to_markdown(html))
+        ]
+
+        self.stdout.write(f"{'page':<24} {'KB':>7} {'legacy ms':>10} {'single ms':>10} {'speedup':>8}")
+        totals = {"legacy": 0.0, "single": 0.0}
+        total_bytes = 0
+        for name, html in corpus.items():
+            timings = {}
+            for label, converter in (("legacy", legacy_html_to_markdown), ("single", html_to_markdown)):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    converter(html)
+                timings[label] = (time.perf_counter() - started) / iterations
+                totals[label] += timings[label]
+            total_bytes += len(html.encode("utf-8"))
+            self.stdout.write(
+                f"{name:<24} {len(html) / 1024:>7.1f} {timings['legacy'] * 1000:>10.2f} "
+                f"{timings['single'] * 1000:>10.2f} {timings['legacy'] / timings['single']:>7.1f}x"
+            )
+
+        megabytes = total_bytes / 1_000_000
+        self.stdout.write(
+            f"throughput: legacy {megabytes / totals['legacy']:.2f} MB/s, "
+            f"single-pass {megabytes / totals['single']:.2f} MB/s"
+        )
+        if mismatches:
+            raise CommandError(f"Output differs from the legacy pipeline for: {', '.join(mismatches)}")
+        self.stdout.write(self.style.SUCCESS(f"Output equivalent for all {len(corpus)} pages"))
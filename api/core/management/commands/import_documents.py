@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.serializers import DocumentSerializer
+from core.services.document_import import create_documents
+
+
+class Command(BaseCommand):
+    help = (
+        "Import documents from a JSON Lines file (one object per line with entity, source, "
+        "title, body and metadata). Sources are scraped in batches after the import commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON Lines file to import.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], encoding="utf-8") as handle:
+                rows = [json.loads(line) for line in handle if line.strip()]
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Unable to read {options['path']}: {exc}") from exc
+
+        serializer = DocumentSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            invalid = {line: errors for line, errors in enumerate(serializer.errors, start=1) if errors}
+            raise CommandError(f"Invalid documents (by line): {json.dumps(invalid, default=str)}")
+
+        with transaction.atomic():
+            documents = create_documents(serializer.validated_data)
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(documents)} documents"))
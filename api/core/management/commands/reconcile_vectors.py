@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import reconcile_vectors_task
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream chunk rows and Weaviate objects in vector-id order and report missing, "
+        "orphaned and stale vectors. Pass --fix to re-embed and delete them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Queue re-embeds and deletions for the drift found.")
+        parser.add_argument("--batch-size", type=int, help="Ids per page and per fix batch (VECTOR_RECONCILE_BATCH_SIZE).")
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Run as a Celery task instead of in this process.",
+        )
+
+    def handle(self, *args, **options):
+        if options["background"]:
+            reconcile_vectors_task.delay(fix=options["fix"], batch_size=options["batch_size"])
+            self.stdout.write("Queued vector reconciliation")
+            return
+
+        report = reconcile_vectors_task(fix=options["fix"], batch_size=options["batch_size"])
+        if not report:
+            self.stdout.write("Weaviate collection does not exist; nothing to reconcile")
+            return
+
+        self.stdout.write(json.dumps(report, indent=2))
+        drift = report["missing"] + report["orphaned"] + report["stale"]
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Postgres and Weaviate are consistent"))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Queued repairs for {drift} inconsistencies"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Found {drift} inconsistencies; rerun with --fix to repair"))
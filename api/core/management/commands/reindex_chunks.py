@@ -0,0 +1,125 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import DocumentChunk, ReindexCheckpoint
+from core.tasks import _reindex_config, reindex_chunk_page, reindex_chunks_task, reindex_delay
+
+
+def _format_eta(seconds: float) -> str:
+    return str(timedelta(seconds=int(seconds)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-embed chunks whose vectors are missing or stale, walking DocumentChunk in "
+        "primary-key order. Progress is checkpointed per page, so an interrupted run "
+        "resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default="default", help="Checkpoint name; runs with the same name resume.")
+        parser.add_argument("--page-size", type=int, help="Chunks examined per page (REINDEX_PAGE_SIZE).")
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="Maximum stale chunks queued per minute (REINDEX_CHUNKS_PER_MINUTE).",
+        )
+        parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and start from the beginning.")
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Run as a self-scheduling Celery task chain instead of in this process.",
+        )
+        parser.add_argument("--pause", action="store_true", help="Stop a background run after its current page.")
+
+    def handle(self, *args, **options):
+        name = options["name"]
+        if options["pause"]:
+            updated = ReindexCheckpoint.objects.filter(name=name, status=ReindexCheckpoint.Status.RUNNING).update(
+                status=ReindexCheckpoint.Status.PAUSED,
+                updated_at=timezone.now(),
+            )
+            if not updated:
+                raise CommandError(f"No running re-index named {name!r}")
+            self.stdout.write(f"Paused re-index {name!r}")
+            return
+
+        default_page_size, default_rate = _reindex_config()
+        page_size = max(1, options["page_size"] or default_page_size)
+        rate = options["rate"] or default_rate
+
+        checkpoint = self._load_checkpoint(name, restart=options["restart"])
+        if checkpoint is None:
+            return
+
+        if options["background"]:
+            reindex_chunks_task.delay(name, page_size=page_size, per_minute=rate)
+            self.stdout.write(f"Queued background re-index {name!r}; use --pause to stop it.")
+            return
+
+        try:
+            self._run(checkpoint, page_size=page_size, rate=rate)
+        except KeyboardInterrupt:
+            ReindexCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                status=ReindexCheckpoint.Status.PAUSED,
+                updated_at=timezone.now(),
+            )
+            self.stdout.write(f"\nInterrupted; rerun with --name {name} to resume.")
+
+    def _load_checkpoint(self, name: str, *, restart: bool):
+        checkpoint, created = ReindexCheckpoint.objects.get_or_create(name=name)
+        if created or restart:
+            checkpoint.last_chunk_id = None
+            checkpoint.scanned_count = 0
+            checkpoint.queued_count = 0
+            checkpoint.started_at = timezone.now()
+            checkpoint.finished_at = None
+        elif checkpoint.status == ReindexCheckpoint.Status.COMPLETED:
+            self.stdout.write(f"Re-index {name!r} already completed; use --restart to run it again.")
+            return None
+        else:
+            self.stdout.write(f"Resuming re-index {name!r} after {checkpoint.scanned_count} chunks")
+
+        checkpoint.status = ReindexCheckpoint.Status.RUNNING
+        # Counting is only for progress reporting, so it is done once per run.
+        checkpoint.total_estimate = checkpoint.scanned_count + (
+            DocumentChunk.objects.filter(id__gt=checkpoint.last_chunk_id).count()
+            if checkpoint.last_chunk_id
+            else DocumentChunk.objects.count()
+        )
+        checkpoint.save()
+        return checkpoint
+
+    def _run(self, checkpoint: ReindexCheckpoint, *, page_size: int, rate: float) -> None:
+        started = time.perf_counter()
+        scanned_this_run = 0
+        while True:
+            page_started = time.perf_counter()
+            scanned, queued = reindex_chunk_page(checkpoint, page_size=page_size)
+            if not scanned:
+                break
+            scanned_this_run += scanned
+
+            elapsed = time.perf_counter() - started
+            throughput = scanned_this_run / elapsed if elapsed else 0.0
+            remaining = max(0, checkpoint.total_estimate - checkpoint.scanned_count)
+            eta = _format_eta(remaining / throughput) if throughput else "?"
+            percent = 100 * checkpoint.scanned_count / checkpoint.total_estimate if checkpoint.total_estimate else 100
+            self.stdout.write(
+                f"{checkpoint.scanned_count}/{checkpoint.total_estimate} scanned ({percent:.1f}%), "
+                f"{checkpoint.queued_count} queued, {throughput:.0f} chunks/s, ETA {eta}"
+            )
+
+            pause = reindex_delay(queued, rate) - (time.perf_counter() - page_started)
+            if pause > 0:
+                time.sleep(pause)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Re-index {checkpoint.name!r} complete: {checkpoint.scanned_count} scanned, "
+                f"{checkpoint.queued_count} queued for embedding"
+            )
+        )
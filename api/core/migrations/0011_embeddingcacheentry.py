@@ -0,0 +1,33 @@
+# Generated by Django 4.2.21 on 2026-10-17 01:58
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_matchingjobupdate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingCacheEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('text_checksum', models.CharField(max_length=64)),
+                ('model', models.CharField(max_length=128)),
+                ('dimensions', models.PositiveIntegerField()),
+                ('vector', models.BinaryField(help_text='Packed float32 embedding vector.')),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='embedding_cache_last_used_idx')],
+                'unique_together': {('text_checksum', 'model', 'dimensions')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.21 on 2026-10-17 02:24
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_scrapecacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReindexCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.SlugField(max_length=255, unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('paused', 'Paused'), ('completed', 'Completed')], default='running', max_length=16)),
+                ('last_chunk_id', models.UUIDField(blank=True, help_text='Highest chunk id already examined; the next page starts after it.', null=True)),
+                ('scanned_count', models.PositiveBigIntegerField(default=0)),
+                ('queued_count', models.PositiveBigIntegerField(default=0)),
+                ('total_estimate', models.PositiveBigIntegerField(default=0)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.21 on 2026-10-17 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_reindexcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchingjobrun',
+            name='metadata',
+            field=models.JSONField(blank=True, default=dict, help_text='Runtime metrics such as query embedding cache hit rates.'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.21 on 2026-10-17 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_matchingjobrun_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workspace',
+            name='settings',
+            field=models.JSONField(blank=True, default=dict, help_text='Per-workspace tuning, e.g. {"search_concurrency": 4}.'),
+        ),
+    ]
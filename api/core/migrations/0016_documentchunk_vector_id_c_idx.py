@@ -0,0 +1,36 @@
+from django.db import migrations
+
+INDEX_NAME = "core_chunk_vector_id_c_idx"
+
+
+def create_vector_id_index(apps, schema_editor):
+    # Vector reconciliation pages on weaviate_vector_id COLLATE "C"; without a
+    # matching expression index every page is a full scan and sort. SQLite
+    # has no "C" collation and compares byte-wise already.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{INDEX_NAME}" '
+        'ON "core_documentchunk" (("weaviate_vector_id" COLLATE "C")) '
+        "WHERE \"weaviate_vector_id\" <> ''"
+    )
+
+
+def drop_vector_id_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{INDEX_NAME}"')
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("core", "0015_workspace_settings"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_vector_id_index, drop_vector_id_index),
+    ]
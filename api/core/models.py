@@ -2,6 +2,7 @@ import uuid
 
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 
 class BaseModel(models.Model):
@@ -21,6 +22,11 @@ class Workspace(BaseModel):
     slug = models.SlugField(max_length=255, unique=True)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
+    settings = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Per-workspace tuning, e.g. {"search_concurrency": 4}.',
+    )
 
     class Meta:
         ordering = ["slug"]
@@ -138,6 +144,66 @@ class DocumentChunk(BaseModel):
         return f"Chunk {self.chunk_index} of {self.document_id}"
 
 
+class EmbeddingCacheEntry(BaseModel):
+    """Embedding vector memoised by chunk text checksum and model configuration."""
+
+    text_checksum = models.CharField(max_length=64)
+    model = models.CharField(max_length=128)
+    dimensions = models.PositiveIntegerField()
+    vector = models.BinaryField(help_text="Packed float32 embedding vector.")
+    hit_count = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ("text_checksum", "model", "dimensions")
+        indexes = [
+            models.Index(fields=["last_used_at"], name="embedding_cache_last_used_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model}/{self.dimensions} embedding for {self.text_checksum}"
+
+
+class ScrapeCacheEntry(BaseModel):
+    """Cleaned markdown of a scraped URL, shared by every document with that source."""
+
+    url = models.CharField(max_length=255, unique=True)
+    markdown = models.TextField()
+    content_hash = models.CharField(max_length=64)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    fetched_at = models.DateTimeField(default=timezone.now)
+    hit_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return self.url
+
+
+class ReindexCheckpoint(BaseModel):
+    """Progress of a resumable chunk re-embedding run, walked in primary-key order."""
+
+    class Status(models.TextChoices):
+        RUNNING = "running", "Running"
+        PAUSED = "paused", "Paused"
+        COMPLETED = "completed", "Completed"
+
+    name = models.SlugField(max_length=255, unique=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.RUNNING)
+    last_chunk_id = models.UUIDField(
+        null=True,
+        blank=True,
+        help_text="Highest chunk id already examined; the next page starts after it.",
+    )
+    scanned_count = models.PositiveBigIntegerField(default=0)
+    queued_count = models.PositiveBigIntegerField(default=0)
+    total_estimate = models.PositiveBigIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.status})"
+
+
 class MatchingTemplate(BaseModel):
     """Reusable configuration describing how to match entities."""
 
@@ -278,6 +344,11 @@ class MatchingJobRun(BaseModel):
     )
     matching_config_snapshot = models.JSONField(default=dict, blank=True)
     plan_snapshot = models.JSONField(default=list, blank=True)
+    metadata = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Runtime metrics such as query embedding cache hit rates.",
+    )
     started_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(blank=True)
@@ -25,6 +25,7 @@ class WorkspaceSerializer(serializers.ModelSerializer):
             "slug",
             "name",
             "description",
+            "settings",
             "created_at",
             "updated_at",
         ]
@@ -96,14 +97,18 @@ class DocumentSerializer(serializers.ModelSerializer):
             "body": {"required": False, "allow_blank": True},
         }
 
-    def create(self, validated_data):
-        body = (validated_data.get("body") or "").strip()
-        source = (validated_data.get("source") or "").strip()
+    def validate(self, attrs):
+        body = (attrs.get("body") or "").strip()
+        source = (attrs.get("source") or "").strip()
 
-        if not body and not source:
+        if not body and not source and self.instance is None:
             raise serializers.ValidationError(
                 {"body": "Document body is required when no source is provided."}
             )
+        return attrs
+
+    def create(self, validated_data):
+        body = (validated_data.get("body") or "").strip()
 
         if body:
             validated_data["body"] = body
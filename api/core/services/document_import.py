@@ -0,0 +1,67 @@
+"""Create documents in bulk and scrape them through the batched pipeline.
+
+Creating documents one by one fans out a ``scrape_document_task`` per row via
+``post_save``. Imports instead insert rows with ``bulk_create`` (which sends
+no signals) and, once the transaction commits, hand the documents that need
+scraping to ``scrape_documents_task`` in batches, so static fetches are
+shared and browser renders go through the session pool concurrently.
+Documents that arrive with a body are chunked directly.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Iterable, List, Mapping
+
+from django.db import transaction
+
+from ..models import Document
+from ..tasks import chunk_document_task, scrape_documents_task
+
+logger = logging.getLogger(__name__)
+
+
+def _scrape_batch_size() -> int:
+    try:
+        return max(1, int(os.getenv("SCRAPE_BATCH_SIZE", 50)))
+    except (TypeError, ValueError):
+        return 50
+
+
+def create_documents(rows: Iterable[Mapping[str, Any]]) -> List[Document]:
+    """Insert validated document rows and queue their scraping or chunking on commit."""
+
+    documents = []
+    for row in rows:
+        values = dict(row)
+        body = (values.get("body") or "").strip()
+        if body:
+            values["body"] = body
+            values["scrape_status"] = Document.ScrapeStatus.COMPLETED
+        documents.append(Document(**values))
+    if not documents:
+        return []
+
+    documents = Document.objects.bulk_create(documents, batch_size=500)
+    to_scrape = [str(document.id) for document in documents if not (document.body or "").strip()]
+    to_chunk = [str(document.id) for document in documents if (document.body or "").strip()]
+
+    def enqueue() -> None:
+        batch_size = _scrape_batch_size()
+        for start in range(0, len(to_scrape), batch_size):
+            scrape_documents_task.delay(to_scrape[start : start + batch_size])
+        for document_id in to_chunk:
+            chunk_document_task.delay(document_id)
+
+    transaction.on_commit(enqueue)
+    logger.info(
+        "Imported %s documents (%s to scrape, %s to chunk)",
+        len(documents),
+        len(to_scrape),
+        len(to_chunk),
+    )
+    return documents
+
+
+__all__ = ["create_documents"]
@@ -3,25 +3,56 @@
 from __future__ import annotations
 
 import logging
+from datetime import timedelta
 from typing import Any
 
 from ..lightpanda import LightpandaError, fetch_markdown
+from .scrape_cache import CachedPage, get_or_fetch_markdown
+from .scraping import ScrapeResult, scrape_markdown
 
 logger = logging.getLogger(__name__)
 
 
 def ensure_document_body(instance: Any, *, raise_on_failure: bool = False) -> bool:
-    """Populate ``instance.body`` from Lightpanda when empty.
+    """Populate ``instance.body`` from the document source when empty.
 
-    Returns ``True`` if the body was modified, ``False`` otherwise.
-    Raises ``LightpandaError`` when ``raise_on_failure`` is True and no
-    markdown could be retrieved.
+    Pages are served from the scrape cache when another document already
+    fetched the same source, and are rendered with Lightpanda only when a
+    plain HTTP fetch does not yield usable content. Returns ``True`` if the
+    body was modified, ``False`` otherwise. Raises ``LightpandaError`` when ``raise_on_failure``
+    is True and no markdown could be retrieved.
     """
 
     body = getattr(instance, "body", None) or ""
     if body.strip():
         return False
 
+    return _populate_body(instance, raise_on_failure=raise_on_failure)
+
+
+def refresh_document_body(instance: Any, *, raise_on_failure: bool = False) -> bool:
+    """Re-scrape ``instance.source`` bypassing the cache TTL.
+
+    Returns ``True`` only when the content changed, so callers can skip
+    re-chunking and re-embedding identical pages.
+    """
+
+    return _populate_body(instance, raise_on_failure=raise_on_failure, max_age=timedelta(0))
+
+
+def _fetch_source(url: str, previous: CachedPage | None) -> ScrapeResult:
+    """Plain HTTP first, Lightpanda only for pages that need rendering."""
+
+    return scrape_markdown(
+        url,
+        browser_fetch=fetch_markdown,
+        etag=previous.etag if previous else "",
+        last_modified=previous.last_modified if previous else "",
+        previous_markdown=previous.markdown if previous else "",
+    )
+
+
+def _populate_body(instance: Any, *, raise_on_failure: bool, max_age: timedelta | None = None) -> bool:
     source = getattr(instance, "source", "")
     if not source:
         if raise_on_failure:
@@ -29,15 +60,23 @@ def ensure_document_body(instance: Any, *, raise_on_failure: bool = False) -> bo
         return False
 
     try:
-        markdown = fetch_markdown(source)
+        page = get_or_fetch_markdown(source, fetch=_fetch_source, max_age=max_age)
     except LightpandaError:
         if raise_on_failure:
             raise
         logger.exception("Unable to fetch markdown from Lightpanda for %s", source)
         return False
 
-    instance.body = markdown
+    metadata = dict(getattr(instance, "metadata", None) or {})
+    if metadata.get("content_hash") == page.content_hash and (getattr(instance, "body", None) or "").strip():
+        logger.info("Content of %s unchanged; keeping existing body", source)
+        return False
+
+    metadata["content_hash"] = page.content_hash
+    metadata["scrape_path"] = page.path
+    instance.metadata = metadata
+    instance.body = page.markdown
     return True
 
 
-__all__ = ["ensure_document_body"]
+__all__ = ["ensure_document_body", "refresh_document_body"]
@@ -0,0 +1,159 @@
+"""Content-addressed cache for chunk embeddings.
+
+Vectors are keyed by the chunk text checksum plus the embedding model and
+dimensions, so identical text is only ever embedded once per configuration no
+matter how many documents, entities or re-syncs reference it.
+"""
+
+from __future__ import annotations
+
+import logging
+from array import array
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Sequence
+
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import EmbeddingCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    """Serialise an embedding as packed float32 values."""
+
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(data: bytes | memoryview) -> List[float]:
+    """Inverse of :func:`pack_vector`."""
+
+    values = array("f")
+    values.frombytes(bytes(data))
+    return values.tolist()
+
+
+@dataclass(slots=True)
+class EmbeddingCacheStats:
+    """Hit/miss counters for cache lookups."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+_process_stats = EmbeddingCacheStats()
+
+
+def embedding_cache_stats() -> EmbeddingCacheStats:
+    """Return a snapshot of the lookups served by this process so far."""
+
+    return EmbeddingCacheStats(hits=_process_stats.hits, misses=_process_stats.misses)
+
+
+class EmbeddingCache:
+    """Persistent embedding store scoped to a model and dimension count."""
+
+    def __init__(self, *, model: str, dimensions: int) -> None:
+        self.model = model
+        self.dimensions = dimensions
+        self.stats = EmbeddingCacheStats()
+
+    def get_many(self, checksums: Iterable[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the given checksums, recording hits and misses."""
+
+        wanted = set(checksums)
+        if not wanted:
+            return {}
+
+        entries = list(
+            EmbeddingCacheEntry.objects.filter(
+                model=self.model,
+                dimensions=self.dimensions,
+                text_checksum__in=wanted,
+            ).only("id", "text_checksum", "vector")
+        )
+        found = {entry.text_checksum: unpack_vector(entry.vector) for entry in entries}
+
+        if entries:
+            EmbeddingCacheEntry.objects.filter(id__in=[entry.id for entry in entries]).update(
+                hit_count=F("hit_count") + 1,
+                last_used_at=timezone.now(),
+            )
+
+        hits = len(found)
+        misses = len(wanted) - hits
+        self.stats.hits += hits
+        self.stats.misses += misses
+        _process_stats.hits += hits
+        _process_stats.misses += misses
+        return found
+
+    def set_many(self, vectors: Dict[str, Sequence[float]]) -> None:
+        """Store freshly generated vectors; concurrent writers of the same key are ignored."""
+
+        if not vectors:
+            return
+
+        EmbeddingCacheEntry.objects.bulk_create(
+            [
+                EmbeddingCacheEntry(
+                    text_checksum=checksum,
+                    model=self.model,
+                    dimensions=self.dimensions,
+                    vector=pack_vector(vector),
+                )
+                for checksum, vector in vectors.items()
+            ],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+def prune_embedding_cache(*, max_entries: int, max_age_days: int, keep_checksums=None) -> int:
+    """Evict expired entries, then the least recently used ones above ``max_entries``.
+
+    Entries whose checksum is in ``keep_checksums`` (an iterable or a
+    single-column queryset) are never evicted. Returns the number of deleted rows.
+    """
+
+    evictable = EmbeddingCacheEntry.objects.all()
+    if keep_checksums is not None:
+        evictable = evictable.exclude(text_checksum__in=keep_checksums)
+
+    deleted = 0
+    if max_age_days > 0:
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+        deleted += evictable.filter(last_used_at__lt=cutoff).delete()[0]
+
+    if max_entries > 0:
+        boundary = list(
+            evictable.order_by("-last_used_at").values_list(
+                "last_used_at", flat=True
+            )[max_entries : max_entries + 1]
+        )
+        if boundary:
+            deleted += evictable.filter(last_used_at__lte=boundary[0]).delete()[0]
+
+    if deleted:
+        logger.info("Evicted %s embedding cache entries", deleted)
+    return deleted
+
+
+__all__ = [
+    "EmbeddingCache",
+    "EmbeddingCacheStats",
+    "embedding_cache_stats",
+    "pack_vector",
+    "prune_embedding_cache",
+    "unpack_vector",
+]
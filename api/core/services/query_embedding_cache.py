@@ -0,0 +1,181 @@
+"""Two-tier cache for search query embeddings.
+
+Matching runs the same criterion prompts against every target, so query
+vectors repeat far more than they vary. Lookups hit an in-process LRU first
+and a shared Redis tier second, keyed by model, dimensions and text hash; only misses
+reach the embeddings API. Redis failures fail open to the API.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import redis
+from django.conf import settings
+
+from .embedding_cache import pack_vector, unpack_vector
+
+logger = logging.getLogger(__name__)
+
+
+def _int_from_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def query_cache_key(model: str, dimensions: int, text: str) -> str:
+    digest = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    return f"{model}:{dimensions}:{digest}"
+
+
+@dataclass(slots=True)
+class QueryEmbeddingStats:
+    """Where query embeddings were served from."""
+
+    local_hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+    api_requests: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.local_hits + self.shared_hits + self.misses
+        return (self.local_hits + self.shared_hits) / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "api_requests": self.api_requests,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class QueryEmbeddingCache:
+    """In-process LRU over a shared Redis tier for query vectors."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        ttl_seconds: int = 7 * 86_400,
+        redis_client=None,
+        key_prefix: str = "query-embedding",
+    ) -> None:
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = max(0, ttl_seconds)
+        self.key_prefix = key_prefix
+        self._redis = redis_client
+        self._local: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._local[key] = vector
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get_many(
+        self,
+        model: str,
+        dimensions: int,
+        texts: Iterable[str],
+        stats: Optional[QueryEmbeddingStats] = None,
+    ) -> Dict[str, List[float]]:
+        """Return cached vectors by text, consulting Redis only for local misses."""
+
+        keys = {text: query_cache_key(model, dimensions, text) for text in dict.fromkeys(texts)}
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for text, key in keys.items():
+                vector = self._local.get(key)
+                if vector is not None:
+                    self._local.move_to_end(key)
+                    found[text] = vector
+        local_hits = len(found)
+
+        remaining = [text for text in keys if text not in found]
+        if remaining and self.ttl_seconds:
+            try:
+                values = self._client().mget([f"{self.key_prefix}:{keys[text]}" for text in remaining])
+            except redis.RedisError as exc:
+                logger.warning("Query embedding cache unavailable: %s", exc)
+                values = [None] * len(remaining)
+            for text, value in zip(remaining, values):
+                if value:
+                    found[text] = unpack_vector(value)
+                    self._remember(keys[text], found[text])
+
+        if stats is not None:
+            stats.local_hits += local_hits
+            stats.shared_hits += len(found) - local_hits
+            stats.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, model: str, dimensions: int, vectors: Dict[str, Sequence[float]]) -> None:
+        """Store vectors in both tiers."""
+
+        if not vectors:
+            return
+        for text, vector in vectors.items():
+            self._remember(query_cache_key(model, dimensions, text), list(vector))
+        if not self.ttl_seconds:
+            return
+        try:
+            pipeline = self._client().pipeline(transaction=False)
+            for text, vector in vectors.items():
+                pipeline.set(
+                    f"{self.key_prefix}:{query_cache_key(model, dimensions, text)}",
+                    pack_vector(vector),
+                    ex=self.ttl_seconds,
+                )
+            pipeline.execute()
+        except redis.RedisError as exc:
+            logger.warning("Unable to store query embeddings in Redis: %s", exc)
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+_cache: Optional[QueryEmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Return the process-wide cache configured from the environment."""
+
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryEmbeddingCache(
+                max_entries=_int_from_env("QUERY_EMBEDDING_CACHE_SIZE", 1024),
+                ttl_seconds=_int_from_env("QUERY_EMBEDDING_CACHE_TTL_SECONDS", 7 * 86_400),
+            )
+        return _cache
+
+
+__all__ = [
+    "QueryEmbeddingCache",
+    "QueryEmbeddingStats",
+    "get_query_embedding_cache",
+    "query_cache_key",
+]
@@ -0,0 +1,236 @@
+"""Cluster-wide OpenAI rate limiting backed by Redis token buckets.
+
+Every OpenAI call draws from two shared buckets, one for requests and one for
+tokens per minute, so all workers and web processes respect one budget.
+Optional per-workspace buckets cap the share a single workspace may use, and
+bulk work (ingestion, backfills) may not drain the global buckets below a
+reserve kept for interactive matching jobs.
+
+Limits come from ``OPENAI_RATE_LIMIT_RPM`` / ``OPENAI_RATE_LIMIT_TPM``; when
+neither is set the limiter is a no-op. Redis failures fail open so an outage
+of the limiter never blocks OpenAI traffic outright.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import redis
+from django.conf import settings
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - token counts fall back to a heuristic
+    tiktoken = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
+# KEYS are bucket hashes. ARGV holds four values per key: capacity,
+# refill per millisecond, cost and the floor the bucket must stay above.
+# Either every bucket is charged or none is; the reply is the number of
+# milliseconds to wait before the request can be granted (0 = granted).
+_TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local levels = {}
+local wait = 0
+for i = 1, #KEYS do
+  local base = (i - 1) * 4
+  local capacity = tonumber(ARGV[base + 1])
+  local rate = tonumber(ARGV[base + 2])
+  local cost = tonumber(ARGV[base + 3])
+  local floor = tonumber(ARGV[base + 4])
+  local state = redis.call('HMGET', KEYS[i], 'level', 'ts')
+  local level = tonumber(state[1]) or capacity
+  local ts = tonumber(state[2]) or now
+  level = math.min(capacity, level + math.max(0, now - ts) * rate)
+  levels[i] = level
+  -- Requests larger than the bucket wait for a full bucket and go into debt.
+  local needed = math.min(cost + floor, capacity)
+  if level < needed then
+    wait = math.max(wait, (needed - level) / rate)
+  end
+end
+if wait > 0 then
+  return math.ceil(wait)
+end
+for i = 1, #KEYS do
+  local base = (i - 1) * 4
+  local capacity = tonumber(ARGV[base + 1])
+  local rate = tonumber(ARGV[base + 2])
+  local cost = tonumber(ARGV[base + 3])
+  redis.call('HSET', KEYS[i], 'level', levels[i] - cost, 'ts', now)
+  redis.call('PEXPIRE', KEYS[i], math.ceil(capacity / rate) + 1000)
+end
+return 0
+"""
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a blocking acquire could not be granted in time."""
+
+
+# The embedding and chat models in use all share this encoding.
+_TOKEN_ENCODING_NAME = "cl100k_base"
+_token_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Return the token count for text, approximating when tiktoken is unavailable."""
+
+    global _token_encoding
+
+    if tiktoken is not None:
+        if _token_encoding is None:
+            _token_encoding = tiktoken.get_encoding(_TOKEN_ENCODING_NAME)
+        return len(_token_encoding.encode(text or "", disallowed_special=()))
+    # Roughly four characters per token for English text.
+    return len(text or "") // 4 + 1
+
+
+def _float_from_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class OpenAIRateLimiter:
+    """Token-bucket limiter for requests/min and tokens/min shared through Redis."""
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        workspace_share: float = 1.0,
+        bulk_reserve: float = 0.2,
+        redis_client=None,
+        key_prefix: str = "openai-ratelimit",
+    ) -> None:
+        self.requests_per_minute = max(0.0, requests_per_minute)
+        self.tokens_per_minute = max(0.0, tokens_per_minute)
+        self.workspace_share = min(max(workspace_share, 0.0), 1.0)
+        self.bulk_reserve = min(max(bulk_reserve, 0.0), 0.9)
+        self.key_prefix = key_prefix
+        self._redis = redis_client
+        self._script = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.requests_per_minute or self.tokens_per_minute)
+
+    def _client(self):
+        if self._redis is None:
+            redis_url = getattr(settings, "REDIS_URL", None)
+            if not redis_url:
+                return None
+            self._redis = redis.Redis.from_url(redis_url)
+        if self._script is None:
+            self._script = self._redis.register_script(_TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    def _buckets(
+        self,
+        *,
+        tokens: int,
+        workspace_id: Optional[str],
+        priority: str,
+    ) -> Tuple[List[str], List[float]]:
+        keys: List[str] = []
+        args: List[float] = []
+        reserve = self.bulk_reserve if priority == PRIORITY_BULK else 0.0
+
+        for name, per_minute, cost in (
+            ("requests", self.requests_per_minute, 1),
+            ("tokens", self.tokens_per_minute, max(1, tokens)),
+        ):
+            if not per_minute:
+                continue
+            keys.append(f"{self.key_prefix}:global:{name}")
+            args.extend([per_minute, per_minute / 60_000, cost, per_minute * reserve])
+            if workspace_id and self.workspace_share < 1.0:
+                share = per_minute * self.workspace_share
+                keys.append(f"{self.key_prefix}:workspace:{workspace_id}:{name}")
+                args.extend([share, share / 60_000, cost, 0])
+        return keys, args
+
+    def try_acquire(
+        self,
+        *,
+        tokens: int,
+        workspace_id: Optional[str] = None,
+        priority: str = PRIORITY_INTERACTIVE,
+    ) -> float:
+        """Charge the buckets if possible; return 0 or the seconds to wait before retrying."""
+
+        if not self.enabled:
+            return 0.0
+
+        keys, args = self._buckets(tokens=tokens, workspace_id=workspace_id, priority=priority)
+        try:
+            script = self._client()
+            if script is None:
+                return 0.0
+            wait_ms = script(keys=keys, args=args)
+        except (redis.RedisError, ValueError) as exc:
+            logger.warning("OpenAI rate limiter unavailable, allowing request: %s", exc)
+            return 0.0
+        return int(wait_ms) / 1000
+
+    def acquire(
+        self,
+        *,
+        tokens: int,
+        workspace_id: Optional[str] = None,
+        priority: str = PRIORITY_INTERACTIVE,
+        timeout: float = 60.0,
+    ) -> None:
+        """Block until the request is granted or ``timeout`` seconds have passed."""
+
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens=tokens, workspace_id=workspace_id, priority=priority)
+            if not wait:
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RateLimitTimeout(f"OpenAI rate limit budget not available within {timeout:.0f}s")
+            time.sleep(min(wait, remaining))
+
+
+_limiter: Optional[OpenAIRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_openai_rate_limiter() -> OpenAIRateLimiter:
+    """Return the process-wide limiter configured from the environment."""
+
+    global _limiter
+
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = OpenAIRateLimiter(
+                requests_per_minute=_float_from_env("OPENAI_RATE_LIMIT_RPM", 0),
+                tokens_per_minute=_float_from_env("OPENAI_RATE_LIMIT_TPM", 0),
+                workspace_share=_float_from_env("OPENAI_RATE_LIMIT_WORKSPACE_SHARE", 1.0),
+                bulk_reserve=_float_from_env("OPENAI_RATE_LIMIT_BULK_RESERVE", 0.2),
+            )
+        return _limiter
+
+
+__all__ = [
+    "OpenAIRateLimiter",
+    "PRIORITY_BULK",
+    "PRIORITY_INTERACTIVE",
+    "RateLimitTimeout",
+    "estimate_tokens",
+    "get_openai_rate_limiter",
+]
@@ -0,0 +1,220 @@
+"""URL-keyed cache of scraped markdown with single-flight fetching.
+
+Every document that points at the same ``source`` shares one cache entry, so
+a page is rendered once no matter how many documents reference it. Concurrent
+requests for the same URL are coalesced: threads in a process wait on a
+per-URL lock and processes wait on a short-lived Redis lock (skipped when
+``REDIS_URL`` is unset or Redis is down), then all read the entry written by
+whoever fetched first. The stored content hash lets callers
+skip chunking and embedding when a re-scrape returns identical content.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+import redis
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import ScrapeCacheEntry
+from .scraping import ScrapeResult
+
+logger = logging.getLogger(__name__)
+
+# url key -> (lock, number of threads holding or waiting for it)
+_local_locks: Dict[str, list] = {}
+_local_locks_guard = threading.Lock()
+_redis_client = None
+
+
+@dataclass(frozen=True, slots=True)
+class CachedPage:
+    """Markdown for a URL and whether it was served without fetching."""
+
+    url: str
+    markdown: str
+    content_hash: str
+    from_cache: bool = False
+    etag: str = ""
+    last_modified: str = ""
+    # How the markdown was obtained: "cache" or a ScrapeResult path.
+    path: str = "cache"
+
+
+def content_hash(markdown: str) -> str:
+    return hashlib.sha256((markdown or "").encode("utf-8")).hexdigest()
+
+
+def scrape_cache_ttl() -> timedelta:
+    try:
+        seconds = int(os.getenv("SCRAPE_CACHE_TTL_SECONDS", 86_400))
+    except (TypeError, ValueError):
+        seconds = 86_400
+    return timedelta(seconds=max(0, seconds))
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+@contextlib.contextmanager
+def _local_lock(key: str) -> Iterator[None]:
+    """Serialise threads fetching the same URL; unrelated URLs never wait."""
+
+    with _local_locks_guard:
+        entry = _local_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _local_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _local_locks[key]
+
+
+def _get_redis_client():
+    global _redis_client
+
+    if _redis_client is None:
+        redis_url = getattr(settings, "REDIS_URL", None)
+        if not redis_url:
+            return None
+        _redis_client = redis.Redis.from_url(redis_url)
+    return _redis_client
+
+
+@contextlib.contextmanager
+def _single_flight(url: str) -> Iterator[None]:
+    """Hold the in-process and cross-process fetch locks for ``url``."""
+
+    key = _url_key(url)
+    with _local_lock(key):
+        lock = None
+        try:
+            client = _get_redis_client()
+            if client is not None:
+                lock = client.lock(f"scrape-cache:{key}", timeout=120, blocking_timeout=90)
+                if not lock.acquire():
+                    lock = None
+        except (redis.RedisError, ValueError) as exc:
+            # Fail open: worst case two processes fetch the same page.
+            logger.debug("Scrape cache lock unavailable for %s: %s", url, exc)
+            lock = None
+        try:
+            yield
+        finally:
+            if lock is not None:
+                with contextlib.suppress(redis.RedisError):
+                    lock.release()
+
+
+def _cached_page(entry: ScrapeCacheEntry) -> CachedPage:
+    return CachedPage(
+        url=entry.url,
+        markdown=entry.markdown,
+        content_hash=entry.content_hash,
+        from_cache=True,
+        etag=entry.etag,
+        last_modified=entry.last_modified,
+    )
+
+
+def lookup_fresh(urls: Iterable[str], *, max_age: Optional[timedelta] = None) -> Dict[str, CachedPage]:
+    """Return cache entries for ``urls`` fetched within ``max_age``."""
+
+    max_age = scrape_cache_ttl() if max_age is None else max_age
+    wanted = set(urls)
+    if not wanted or max_age <= timedelta(0):
+        return {}
+
+    entries = list(ScrapeCacheEntry.objects.filter(url__in=wanted, fetched_at__gte=timezone.now() - max_age))
+    if entries:
+        ScrapeCacheEntry.objects.filter(id__in=[entry.id for entry in entries]).update(
+            hit_count=F("hit_count") + 1
+        )
+    return {entry.url: _cached_page(entry) for entry in entries}
+
+
+def store_markdown(
+    url: str,
+    markdown: str,
+    *,
+    etag: str = "",
+    last_modified: str = "",
+    path: str = "",
+) -> CachedPage:
+    """Record a freshly fetched page and return it."""
+
+    digest = content_hash(markdown)
+    ScrapeCacheEntry.objects.update_or_create(
+        url=url,
+        defaults={
+            "markdown": markdown,
+            "content_hash": digest,
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+            "fetched_at": timezone.now(),
+        },
+    )
+    return CachedPage(
+        url=url,
+        markdown=markdown,
+        content_hash=digest,
+        etag=etag or "",
+        last_modified=last_modified or "",
+        path=path,
+    )
+
+
+def get_or_fetch_markdown(
+    url: str,
+    *,
+    fetch: Callable[[str, Optional[CachedPage]], ScrapeResult],
+    max_age: Optional[timedelta] = None,
+) -> CachedPage:
+    """Return cached markdown for ``url`` or fetch it once, even under concurrency.
+
+    ``fetch`` receives the previous (possibly stale) entry so it can make a
+    conditional request. ``max_age=timedelta(0)`` forces a re-fetch. Callers
+    waiting on another fetch of the same URL reuse its result instead.
+    """
+
+    cached = lookup_fresh([url], max_age=max_age).get(url)
+    if cached is not None:
+        return cached
+
+    requested_at = timezone.now()
+    with _single_flight(url):
+        # Another thread or process may have fetched it while we waited.
+        entry = ScrapeCacheEntry.objects.filter(url=url).first()
+        if entry is not None and entry.fetched_at >= requested_at:
+            return _cached_page(entry)
+        result = fetch(url, _cached_page(entry) if entry is not None else None)
+        return store_markdown(
+            url,
+            result.markdown,
+            etag=result.etag,
+            last_modified=result.last_modified,
+            path=result.path,
+        )
+
+
+__all__ = [
+    "CachedPage",
+    "content_hash",
+    "get_or_fetch_markdown",
+    "lookup_fresh",
+    "scrape_cache_ttl",
+    "store_markdown",
+]
@@ -0,0 +1,371 @@
+"""Fetch source pages over plain HTTP first, rendering in a browser only when needed.
+
+Most job-board and company pages are server-rendered, so a single HTTP GET
+yields the same content as a remote Chromium render at a fraction of the
+cost. A page is sent to the browser only when the static result looks
+JavaScript-dependent: too little main content, or an SPA shell such as an
+empty ``<div id="root">``. Previously stored validators make re-fetches
+conditional, so unchanged pages answer ``304 Not Modified``.
+
+Static fetches run inside our network, so every request (including each
+redirect hop) must target a host that resolves only to public addresses;
+anything else is left to the remote browser.
+
+Each fetch logs the path it took, and :func:`scrape_path_stats` exposes
+per-process counters for the static, not-modified and browser paths.
+"""
+
+from __future__ import annotations
+
+import atexit
+import ipaddress
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import chain, zip_longest
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import httpx
+
+from ..lightpanda import LightpandaError, extract_main_content_from_html, html_to_markdown
+
+logger = logging.getLogger(__name__)
+
+PATH_STATIC = "static"
+PATH_NOT_MODIFIED = "not_modified"
+PATH_BROWSER = "browser"
+
+_SPA_SHELL_PATTERN = re.compile(
+    r"<div[^>]+id=[\"'](?:root|app|__next|__nuxt|svelte)[\"'][^>]*>\s*</div>"
+    r"|\bng-version=|\bdata-server-rendered=[\"']false[\"']"
+    r"|<noscript>[^<]*(?:enable|requires?|turn on)\s+javascript",
+    re.IGNORECASE,
+)
+
+_MAX_STATIC_BYTES = 5 * 1024 * 1024
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+_path_counts: Counter = Counter()
+_path_counts_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class ScrapeResult:
+    """Markdown for a URL plus how it was obtained and its HTTP validators."""
+
+    url: str
+    markdown: str
+    path: str
+    etag: str = ""
+    last_modified: str = ""
+    elapsed_ms: float = 0.0
+
+
+def _int_from_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _static_fetch_enabled() -> bool:
+    return os.getenv("STATIC_FETCH_ENABLED", "1").lower() not in {"0", "false", "no"}
+
+
+class UnsafeURLError(httpx.RequestError):
+    """Raised before a static fetch would reach a non-public address."""
+
+
+def _allowed_hosts() -> set[str]:
+    """Hosts exempt from the public-address check (``STATIC_FETCH_ALLOWED_HOSTS``, comma separated)."""
+
+    return {host.strip().lower() for host in os.getenv("STATIC_FETCH_ALLOWED_HOSTS", "").split(",") if host.strip()}
+
+
+def _is_public_address(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return False
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    # is_global excludes private, loopback, link-local (cloud metadata), shared and reserved ranges.
+    return ip.is_global and not ip.is_multicast
+
+
+def is_public_url(url: Union[str, httpx.URL]) -> bool:
+    """Return True when ``url`` is http(s) and its host resolves only to public addresses."""
+
+    try:
+        parsed = httpx.URL(url)
+    except (httpx.InvalidURL, TypeError):
+        return False
+    if parsed.scheme not in ("http", "https") or not parsed.host:
+        return False
+    if parsed.host.lower() in _allowed_hosts():
+        return True
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.host, port, type=socket.SOCK_STREAM)}
+    except (OSError, UnicodeError):
+        return False
+    return bool(addresses) and all(_is_public_address(address) for address in addresses)
+
+
+def _guard_request(request: httpx.Request) -> None:
+    # Request hooks run for every hop, so redirects are validated too.
+    if not is_public_url(request.url):
+        raise UnsafeURLError(f"Refusing to fetch non-public host {request.url.host!r}", request=request)
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide HTTP client used for static fetches."""
+
+    global _http_client
+
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                follow_redirects=True,
+                max_redirects=5,
+                event_hooks={"request": [_guard_request]},
+                timeout=_int_from_env("STATIC_FETCH_TIMEOUT_SECONDS", 10),
+                headers={
+                    "User-Agent": "Mozilla/5.0 (compatible; MatchAPI/1.0)",
+                    "Accept": "text/html,application/xhtml+xml",
+                },
+            )
+        return _http_client
+
+
+def reset_http_client() -> None:
+    """Forget the client after a fork without closing the parent's sockets."""
+
+    global _http_client
+
+    with _http_client_lock:
+        _http_client = None
+
+
+def close_http_client() -> None:
+    global _http_client
+
+    with _http_client_lock:
+        client, _http_client = _http_client, None
+    if client is not None:
+        client.close()
+
+
+atexit.register(close_http_client)
+
+
+def scrape_path_stats() -> Dict[str, int]:
+    """Return how many fetches in this process took each path."""
+
+    with _path_counts_lock:
+        return dict(_path_counts)
+
+
+def _record_path(result: ScrapeResult) -> None:
+    with _path_counts_lock:
+        _path_counts[result.path] += 1
+    logger.info("Scraped %s via %s path in %.0f ms", result.url, result.path, result.elapsed_ms)
+
+
+def looks_js_dependent(html: str, markdown: str) -> bool:
+    """Return True when statically fetched HTML probably needs a browser to render."""
+
+    min_chars = _int_from_env("STATIC_FETCH_MIN_CHARS", 400)
+    text_length = len(markdown.strip())
+    if text_length < min_chars:
+        return True
+    # Shell markers alone are not conclusive; many server-rendered pages
+    # carry a <noscript> banner. Only distrust pages that are also thin.
+    return bool(_SPA_SHELL_PATTERN.search(html)) and text_length < min_chars * 4
+
+
+def fetch_static(url: str, *, etag: str = "", last_modified: str = "", previous_markdown: str = "") -> Optional[ScrapeResult]:
+    """Fetch ``url`` without a browser; return None when the browser path is needed."""
+
+    headers = {}
+    if previous_markdown:
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    started = time.perf_counter()
+    try:
+        with get_http_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and previous_markdown:
+                return ScrapeResult(
+                    url=url,
+                    markdown=previous_markdown,
+                    path=PATH_NOT_MODIFIED,
+                    etag=response.headers.get("etag", etag),
+                    last_modified=response.headers.get("last-modified", last_modified),
+                    elapsed_ms=(time.perf_counter() - started) * 1000,
+                )
+            if response.status_code != 200 or "html" not in response.headers.get("content-type", "html"):
+                logger.debug("Static fetch of %s returned %s; using browser", url, response.status_code)
+                return None
+
+            body = bytearray()
+            for data in response.iter_bytes():
+                body.extend(data)
+                if len(body) > _MAX_STATIC_BYTES:
+                    logger.debug("Static fetch of %s exceeded %s bytes; using browser", url, _MAX_STATIC_BYTES)
+                    return None
+            html = bytes(body).decode(response.encoding or "utf-8", errors="replace")
+            response_etag = response.headers.get("etag", "")
+            response_last_modified = response.headers.get("last-modified", "")
+    except UnsafeURLError as exc:
+        logger.warning("Static fetch of %s blocked: %s; using browser", url, exc)
+        return None
+    except httpx.HTTPError as exc:
+        logger.debug("Static fetch of %s failed: %s", url, exc)
+        return None
+
+    try:
+        markdown = html_to_markdown(extract_main_content_from_html(html))
+    except LightpandaError:
+        markdown = ""
+    if looks_js_dependent(html, markdown):
+        logger.info("Static HTML of %s looks JavaScript-dependent; using browser", url)
+        return None
+
+    return ScrapeResult(
+        url=url,
+        markdown=markdown,
+        path=PATH_STATIC,
+        etag=response_etag,
+        last_modified=response_last_modified,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+def scrape_markdown(
+    url: str,
+    *,
+    browser_fetch: Callable[[str], str],
+    etag: str = "",
+    last_modified: str = "",
+    previous_markdown: str = "",
+) -> ScrapeResult:
+    """Return markdown for ``url`` via the cheapest path that yields real content."""
+
+    started = time.perf_counter()
+    result = None
+    if _static_fetch_enabled() and url.lower().startswith(("http://", "https://")):
+        result = fetch_static(url, etag=etag, last_modified=last_modified, previous_markdown=previous_markdown)
+    if result is None:
+        result = ScrapeResult(
+            url=url,
+            markdown=browser_fetch(url),
+            path=PATH_BROWSER,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+    _record_path(result)
+    return result
+
+
+def _url_host(url: str) -> str:
+    try:
+        return httpx.URL(url).host.lower()
+    except (httpx.InvalidURL, TypeError):
+        return ""
+
+
+def fetch_static_many(urls: List[str]) -> Dict[str, Optional[ScrapeResult]]:
+    """Run :func:`fetch_static` for many URLs concurrently over the shared client.
+
+    At most ``STATIC_FETCH_CONCURRENCY`` (default 8) fetches are in flight,
+    and at most ``STATIC_FETCH_DOMAIN_CONCURRENCY`` (default 2) per host, as
+    with the browser pool. A batch of dead URLs therefore costs about
+    ``len(urls) / concurrency`` timeouts rather than one timeout per URL.
+    """
+
+    concurrency = max(1, _int_from_env("STATIC_FETCH_CONCURRENCY", 8))
+    per_domain = max(1, _int_from_env("STATIC_FETCH_DOMAIN_CONCURRENCY", 2))
+    if concurrency == 1 or len(urls) <= 1:
+        return {url: fetch_static(url) for url in urls}
+
+    by_host: Dict[str, List[str]] = defaultdict(list)
+    for url in urls:
+        by_host[_url_host(url)].append(url)
+    domain_limits = {host: threading.Semaphore(per_domain) for host in by_host}
+    # Interleave hosts so workers rarely wait on a busy domain while others are idle.
+    ordered = [url for url in chain.from_iterable(zip_longest(*by_host.values())) if url is not None]
+
+    def fetch(url: str) -> Optional[ScrapeResult]:
+        with domain_limits[_url_host(url)]:
+            return fetch_static(url)
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(ordered)), thread_name_prefix="static-fetch") as pool:
+        return dict(zip(ordered, pool.map(fetch, ordered)))
+
+
+def scrape_many_markdown(
+    urls: Iterable[str],
+    *,
+    browser_fetch_many: Callable[[Iterable[str]], Dict[str, Union[str, LightpandaError]]],
+) -> Dict[str, Union[ScrapeResult, LightpandaError]]:
+    """Bulk variant of :func:`scrape_markdown`; failures are returned in place of results.
+
+    Static fetches run first, concurrently (see :func:`fetch_static_many`), and
+    only the URLs that need rendering are sent to ``browser_fetch_many`` in one
+    concurrent batch.
+    """
+
+    urls = list(dict.fromkeys(urls))
+    static = {}
+    if _static_fetch_enabled():
+        static = fetch_static_many([url for url in urls if url.lower().startswith(("http://", "https://"))])
+
+    results: Dict[str, Union[ScrapeResult, LightpandaError]] = {}
+    needs_browser = []
+    for url in urls:
+        result = static.get(url)
+        if result is None:
+            needs_browser.append(url)
+        else:
+            _record_path(result)
+            results[url] = result
+
+    if needs_browser:
+        started = time.perf_counter()
+        rendered = browser_fetch_many(needs_browser)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for url in needs_browser:
+            outcome = rendered.get(url, LightpandaError(f"No result for {url}"))
+            if isinstance(outcome, str):
+                outcome = ScrapeResult(url=url, markdown=outcome, path=PATH_BROWSER, elapsed_ms=elapsed_ms)
+                _record_path(outcome)
+            results[url] = outcome
+    return results
+
+
+__all__ = [
+    "PATH_BROWSER",
+    "PATH_NOT_MODIFIED",
+    "PATH_STATIC",
+    "ScrapeResult",
+    "UnsafeURLError",
+    "close_http_client",
+    "fetch_static",
+    "fetch_static_many",
+    "get_http_client",
+    "is_public_url",
+    "looks_js_dependent",
+    "reset_http_client",
+    "scrape_many_markdown",
+    "scrape_markdown",
+    "scrape_path_stats",
+]
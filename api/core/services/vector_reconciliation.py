@@ -0,0 +1,201 @@
+"""Detect and repair drift between ``DocumentChunk`` rows and Weaviate objects.
+
+Both sides are streamed in vector-id order and merged like two sorted files:
+Weaviate through its cursor iterator (which walks objects by UUID) and
+Postgres through keyset pagination on ``weaviate_vector_id``. Each page
+is a range scan of the ``core_chunk_vector_id_c_idx`` expression index, so
+memory and per-page cost stay bounded no matter how many chunks exist.
+
+* **missing** – a chunk records a vector id that Weaviate does not have.
+* **orphaned** – a Weaviate object has no chunk pointing at it.
+* **stale** – both exist but the object's text checksum or embedding model
+  differs from the chunk's.
+
+Chunks that were never embedded (empty ``weaviate_vector_id``) are left to
+``reindex_chunks``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Collate
+
+from ..models import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+_SAMPLE_SIZE = 20
+
+BatchHandler = Callable[[List[str]], None]
+
+
+@dataclass(slots=True)
+class ReconciliationReport:
+    """Counts of each kind of drift plus a few example ids for investigation."""
+
+    vectors_scanned: int = 0
+    chunks_scanned: int = 0
+    missing: int = 0
+    orphaned: int = 0
+    stale: int = 0
+    samples: Dict[str, List[str]] = field(default_factory=lambda: {"missing": [], "orphaned": [], "stale": []})
+
+    @property
+    def consistent(self) -> bool:
+        return not (self.missing or self.orphaned or self.stale)
+
+    def as_dict(self) -> dict:
+        return {
+            "vectors_scanned": self.vectors_scanned,
+            "chunks_scanned": self.chunks_scanned,
+            "missing": self.missing,
+            "orphaned": self.orphaned,
+            "stale": self.stale,
+            "samples": self.samples,
+        }
+
+
+def _vector_id_ordering():
+    # Weaviate orders by UUID bytes, which matches byte-wise ordering of the
+    # lowercase string form. Postgres needs the "C" collation for that;
+    # SQLite compares strings byte-wise already. Migration 0016 indexes this
+    # exact expression on Postgres.
+    if connection.vendor == "postgresql":
+        return Collate("weaviate_vector_id", "C")
+    return F("weaviate_vector_id")
+
+
+def iter_chunk_vector_ids(batch_size: int) -> Iterator[Tuple[str, str, dict]]:
+    """Yield ``(vector_id, chunk_id, metadata)`` for embedded chunks in vector-id order."""
+
+    queryset = (
+        DocumentChunk.objects.exclude(weaviate_vector_id="")
+        .annotate(vector_key=_vector_id_ordering())
+        .order_by("vector_key")
+    )
+    last_key: Optional[str] = None
+    while True:
+        page = queryset.filter(vector_key__gt=last_key) if last_key is not None else queryset
+        rows = list(page.values_list("vector_key", "id", "metadata")[:batch_size])
+        if not rows:
+            return
+        for vector_id, chunk_id, metadata in rows:
+            yield str(vector_id).lower(), str(chunk_id), metadata or {}
+        last_key = rows[-1][0]
+
+
+def iter_weaviate_vector_ids(collection, batch_size: int) -> Iterator[Tuple[str, dict]]:
+    """Yield ``(uuid, chunk metadata)`` for every object in UUID order."""
+
+    for obj in collection.iterator(return_properties=["metadata_json"], cache_size=batch_size):
+        raw = (getattr(obj, "properties", None) or {}).get("metadata_json")
+        try:
+            metadata = json.loads(raw) if raw else {}
+        except (TypeError, ValueError):
+            metadata = {}
+        yield str(obj.uuid), metadata if isinstance(metadata, dict) else {}
+
+
+def _is_stale(chunk_metadata: dict, vector_metadata: dict) -> bool:
+    if not chunk_metadata.get("text_checksum"):
+        return True
+    return any(
+        chunk_metadata.get(key) != vector_metadata.get(key)
+        for key in ("text_checksum", "embedding_model", "embedding_dimensions")
+    )
+
+
+class _Buffer:
+    """Collects ids and hands them to ``handler`` in batches."""
+
+    def __init__(self, handler: Optional[BatchHandler], batch_size: int) -> None:
+        self.handler = handler
+        self.batch_size = batch_size
+        self.ids: List[str] = []
+
+    def add(self, value: str) -> None:
+        if self.handler is None:
+            return
+        self.ids.append(value)
+        if len(self.ids) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.handler is not None and self.ids:
+            self.handler(self.ids)
+            self.ids = []
+
+
+def reconcile_vectors(
+    collection,
+    *,
+    batch_size: int = 1000,
+    reembed: Optional[BatchHandler] = None,
+    delete_vectors: Optional[BatchHandler] = None,
+) -> ReconciliationReport:
+    """Merge both id streams and report drift.
+
+    When given, ``reembed`` receives chunk ids that are missing or stale and
+    ``delete_vectors`` receives orphaned Weaviate ids, each in batches of at
+    most ``batch_size``.
+    """
+
+    report = ReconciliationReport()
+    to_reembed = _Buffer(reembed, batch_size)
+    to_delete = _Buffer(delete_vectors, batch_size)
+
+    def record(kind: str, value: str) -> None:
+        setattr(report, kind, getattr(report, kind) + 1)
+        if len(report.samples[kind]) < _SAMPLE_SIZE:
+            report.samples[kind].append(value)
+
+    chunks = iter_chunk_vector_ids(batch_size)
+    vectors = iter_weaviate_vector_ids(collection, batch_size)
+    chunk = next(chunks, None)
+    vector = next(vectors, None)
+
+    while chunk is not None or vector is not None:
+        if vector is None or (chunk is not None and chunk[0] < vector[0]):
+            report.chunks_scanned += 1
+            record("missing", chunk[1])
+            to_reembed.add(chunk[1])
+            chunk = next(chunks, None)
+        elif chunk is None or vector[0] < chunk[0]:
+            report.vectors_scanned += 1
+            record("orphaned", vector[0])
+            to_delete.add(vector[0])
+            vector = next(vectors, None)
+        else:
+            report.chunks_scanned += 1
+            report.vectors_scanned += 1
+            if _is_stale(chunk[2], vector[1]):
+                record("stale", chunk[1])
+                to_reembed.add(chunk[1])
+            chunk = next(chunks, None)
+            vector = next(vectors, None)
+
+    to_reembed.flush()
+    to_delete.flush()
+    logger.info(
+        "Vector reconciliation: %s chunks, %s vectors, missing=%s orphaned=%s stale=%s",
+        report.chunks_scanned,
+        report.vectors_scanned,
+        report.missing,
+        report.orphaned,
+        report.stale,
+    )
+    return report
+
+
+__all__ = [
+    "ReconciliationReport",
+    "iter_chunk_vector_ids",
+    "iter_weaviate_vector_ids",
+    "reconcile_vectors",
+]
@@ -0,0 +1,138 @@
+"""Weaviate schema bootstrap for the document chunk collection.
+
+The collection is checked (and created or migrated) once per process; the
+result is cached so ingestion tasks do not pay an ``exists`` round trip per
+chunk. Callers invalidate the cache when Weaviate reports the collection is
+missing, e.g. after it was dropped by hand or the cluster was reset.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class VectorProperty:
+    """A collection property; ``data_type`` names a ``weaviate`` ``DataType`` member."""
+
+    name: str
+    data_type: str
+
+
+DOCUMENT_CHUNK_PROPERTIES: Tuple[VectorProperty, ...] = (
+    VectorProperty("text", "TEXT"),
+    VectorProperty("document_id", "TEXT"),
+    VectorProperty("entity_id", "TEXT"),
+    VectorProperty("chunk_index", "INT"),
+    VectorProperty("metadata_json", "TEXT"),
+)
+
+
+def is_missing_collection_error(exc: Exception) -> bool:
+    """Return True when a Weaviate error means the collection does not exist."""
+
+    status_code = getattr(exc, "status_code", None)
+    message = str(exc).lower()
+    if "could not find class" in message or "class not found" in message:
+        return True
+    return status_code == 404 and ("class" in message or "collection" in message)
+
+
+class VectorSchemaManager:
+    """Ensure a Weaviate collection exists with the expected properties."""
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        description: str,
+        properties: Sequence[VectorProperty],
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.properties = tuple(properties)
+        self._ready = False
+        self._exists = False
+        self._lock = threading.Lock()
+
+    def _build_properties(self, properties: Sequence[VectorProperty]) -> list:
+        from weaviate.classes.config import DataType, Property
+
+        return [Property(name=prop.name, data_type=getattr(DataType, prop.data_type)) for prop in properties]
+
+    def ensure(self, client) -> None:
+        """Create the collection or add missing properties; cached after the first success."""
+
+        if self._ready:
+            return
+
+        with self._lock:
+            if self._ready:
+                return
+
+            if client.collections.exists(self.name):
+                self._migrate(client)
+            else:
+                from weaviate.classes.config import Configure
+
+                client.collections.create(
+                    name=self.name,
+                    description=self.description,
+                    vectorizer_config=Configure.Vectorizer.none(),
+                    properties=self._build_properties(self.properties),
+                )
+                logger.info("Created Weaviate collection %s", self.name)
+            self._ready = self._exists = True
+
+    def _migrate(self, client) -> None:
+        collection = client.collections.get(self.name)
+        existing = {prop.name for prop in collection.config.get(simple=True).properties}
+        for prop in self.properties:
+            if prop.name in existing:
+                continue
+            collection.config.add_property(self._build_properties([prop])[0])
+            logger.info("Added property %s to Weaviate collection %s", prop.name, self.name)
+
+    def exists(self, client) -> bool:
+        """Return whether the collection exists without creating it.
+
+        A positive answer is cached until :meth:`invalidate`; a negative one
+        is re-checked on the next call.
+        """
+
+        if not self._exists:
+            self._exists = bool(client.collections.exists(self.name))
+        return self._exists
+
+    def invalidate(self) -> None:
+        """Forget the cached state so the next call re-checks Weaviate."""
+
+        self._ready = self._exists = False
+
+    def handle_error(self, exc: Exception) -> None:
+        """Invalidate the cache if ``exc`` reports the collection as missing."""
+
+        if is_missing_collection_error(exc):
+            logger.warning("Weaviate collection %s missing; schema will be re-checked", self.name)
+            self.invalidate()
+
+
+document_chunk_schema = VectorSchemaManager(
+    name="DocumentChunk",
+    description="Chunk of a document managed by Django",
+    properties=DOCUMENT_CHUNK_PROPERTIES,
+)
+
+
+__all__ = [
+    "DOCUMENT_CHUNK_PROPERTIES",
+    "VectorProperty",
+    "VectorSchemaManager",
+    "document_chunk_schema",
+    "is_missing_collection_error",
+]
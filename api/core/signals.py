@@ -1,22 +1,58 @@
+import threading
+import weakref
+
 from django.db import transaction
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
 from django.dispatch import receiver
 
 from .models import Document, DocumentChunk, MatchingJob
 from .tasks import (
-    delete_document_chunk_vector_task,
+    chunk_document_task,
+    delete_chunk_vectors_task,
+    delete_document_vectors_task,
     embed_document_chunk_task,
     scrape_document_task,
 )
 from matching.tasks import run_matching_job_task
 
 
+_BODY_NOT_LOADED = object()
+
+
+@receiver(post_init, sender=Document)
+def remember_document_body(sender, instance: Document, **_: object) -> None:
+    """Keep a reference to the loaded body so saves can tell whether it changed."""
+
+    # Read __dict__ directly so a deferred body is not fetched here.
+    instance._loaded_body = instance.__dict__.get("body", _BODY_NOT_LOADED)
+
+
 @receiver(post_save, sender=Document)
-def enqueue_document_chunking(sender, instance: Document, created: bool, **_: object) -> None:
-    if not created:
+def enqueue_document_chunking(
+    sender,
+    instance: Document,
+    created: bool,
+    update_fields=None,
+    **_: object,
+) -> None:
+    document_id = str(instance.id)
+    if created:
+        instance._loaded_body = instance.body
+        transaction.on_commit(lambda: scrape_document_task.delay(document_id))
         return
 
-    scrape_document_task.delay(str(instance.id))
+    # Body edits are re-chunked incrementally; unchanged segments are kept.
+    if update_fields is not None and "body" not in update_fields:
+        return
+    loaded_body = getattr(instance, "_loaded_body", _BODY_NOT_LOADED)
+    instance._loaded_body = instance.body
+    if loaded_body is not _BODY_NOT_LOADED and loaded_body == instance.body:
+        return
+    if not (instance.body or "").strip():
+        return
+
+    # Workers must not read the body before it is committed (or after a rollback).
+    transaction.on_commit(lambda: chunk_document_task.delay(document_id))
 
 
 @receiver(post_save, sender=DocumentChunk)
@@ -46,6 +82,67 @@ def enqueue_chunk_embedding(
     embed_document_chunk_task.delay(str(instance.id))
 
 
+_DOCUMENT_DELETE_BATCH = 100
+_VECTOR_DELETE_BATCH = 1000
+
+_local = threading.local()
+
+
+class _PendingVectorDeletions:
+    """Vector deletions collected during one transaction and enqueued on commit.
+
+    The buffer itself is the commit hook. The thread-local only keeps a weak
+    reference, which acts as the "hook registered" flag: the callback clears
+    it on commit, and a rollback clears it by discarding the hook (and with it
+    the last strong reference to the buffer).
+    """
+
+    def __init__(self) -> None:
+        self.document_ids: set[str] = set()
+        self.vector_ids: list[str] = []
+
+    def __call__(self) -> None:
+        if _pending_vector_deletions() is self:
+            _local.pending = None
+
+        document_ids = sorted(self.document_ids)
+        for start in range(0, len(document_ids), _DOCUMENT_DELETE_BATCH):
+            delete_document_vectors_task.delay(document_ids[start : start + _DOCUMENT_DELETE_BATCH])
+        for start in range(0, len(self.vector_ids), _VECTOR_DELETE_BATCH):
+            delete_chunk_vectors_task.delay(self.vector_ids[start : start + _VECTOR_DELETE_BATCH])
+
+
+def _pending_vector_deletions() -> _PendingVectorDeletions | None:
+    """Return the buffer whose commit hook is registered in the current transaction."""
+
+    reference = getattr(_local, "pending", None)
+    return reference() if reference is not None else None
+
+
+def _queue_vector_deletion(*, document_id: str | None = None, vector_id: str | None = None) -> None:
+    pending = _pending_vector_deletions()
+    scheduled = pending is not None
+    if pending is None:
+        pending = _PendingVectorDeletions()
+
+    if document_id is not None:
+        pending.document_ids.add(document_id)
+    if vector_id is not None:
+        pending.vector_ids.append(vector_id)
+
+    if not scheduled:
+        _local.pending = weakref.ref(pending)
+        # Runs immediately outside an atomic block, otherwise after commit.
+        transaction.on_commit(pending)
+
+
+@receiver(pre_delete, sender=Document)
+def collect_document_vector_deletion(sender, instance: Document, **_: object) -> None:
+    """Delete a document's vectors with one filtered request instead of per chunk."""
+
+    _queue_vector_deletion(document_id=str(instance.id))
+
+
 @receiver(post_delete, sender=DocumentChunk)
 def enqueue_chunk_vector_deletion(sender, instance: DocumentChunk, **_: object) -> None:
     """Ensure the corresponding vector is removed from Weaviate when the chunk disappears."""
@@ -53,10 +150,11 @@ def enqueue_chunk_vector_deletion(sender, instance: DocumentChunk, **_: object)
     if not instance.weaviate_vector_id:
         return
 
-    delete_document_chunk_vector_task.delay(
-        str(instance.id),
-        instance.weaviate_vector_id,
-    )
+    pending = _pending_vector_deletions()
+    # Chunks removed by a document or entity cascade go with the document filter.
+    if pending is not None and str(instance.document_id) in pending.document_ids:
+        return
+    _queue_vector_deletion(vector_id=instance.weaviate_vector_id)
 
 
 @receiver(post_save, sender=MatchingJob)
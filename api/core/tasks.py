@@ -2,15 +2,29 @@ import hashlib
 import json
 import logging
 import os
-from typing import List, Tuple
+import re
+import time
+import zlib
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from celery import shared_task
+from django.apps import apps
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Length, Substr
+from django.utils import timezone
 
 from .ai_clients import get_embedding_client, get_weaviate_client
-from .lightpanda import LightpandaError
-from .models import Document, DocumentChunk
-from .services.document_ingestion import ensure_document_body
+from .lightpanda import LightpandaError, fetch_many_markdown
+from .models import Document, DocumentChunk, ReindexCheckpoint
+from .services.document_ingestion import ensure_document_body, refresh_document_body
+from .services.embedding_cache import EmbeddingCache, prune_embedding_cache
+from .services.rate_limiting import PRIORITY_BULK, estimate_tokens, get_openai_rate_limiter
+from .services.scrape_cache import lookup_fresh, store_markdown
+from .services.scraping import scrape_many_markdown
+from .services.vector_reconciliation import reconcile_vectors
+from .services.vector_schema import document_chunk_schema
 
 try:  # OpenAI 1.x style
     from openai import OpenAIError, RateLimitError
@@ -23,7 +37,7 @@ except ImportError:  # pragma: no cover - defensive default if dependency change
     WeaviateBaseError = Exception  # type: ignore
 
 
-WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME = "DocumentChunk";
+WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME = document_chunk_schema.name
 EMBEDDING_MODEL_NAME = "text-embedding-3-small"
 
 def _int_from_env(name: str, default: int) -> int:
@@ -42,27 +56,168 @@ def _chunking_config() -> Tuple[int, int]:
     return size, overlap
 
 
+def _chunk_io_config() -> Tuple[int, int]:
+    """Return (body_read_size, write_batch_size) for streaming chunk ingestion."""
+
+    read_size = max(1, _int_from_env("DOCUMENT_BODY_READ_SIZE", 1_048_576))
+    write_batch = max(1, _int_from_env("DOCUMENT_CHUNK_WRITE_BATCH", 500))
+    return read_size, write_batch
+
+
+def _embedding_cache_config() -> Tuple[int, int]:
+    """Return (max_entries, max_age_days) for embedding cache eviction."""
+
+    max_entries = _int_from_env("EMBEDDING_CACHE_MAX_ENTRIES", 1_000_000)
+    max_age_days = _int_from_env("EMBEDDING_CACHE_TTL_DAYS", 90)
+    return max_entries, max_age_days
+
+
+def _embedding_batch_config() -> Tuple[int, int]:
+    """Return (max_tokens, max_inputs) for a single embeddings request."""
+
+    # OpenAI caps a request at 2048 inputs and 300k tokens; stay well below both.
+    max_tokens = max(1, _int_from_env("EMBEDDING_BATCH_MAX_TOKENS", 100_000))
+    max_inputs = max(1, min(_int_from_env("EMBEDDING_BATCH_MAX_INPUTS", 256), 2048))
+    return max_tokens, max_inputs
+
+
+def _batch_chunks_by_tokens(
+    chunks: Sequence[DocumentChunk],
+    max_tokens: int,
+    max_inputs: int,
+) -> Iterator[List[DocumentChunk]]:
+    """Yield chunk batches whose combined token count fits one embeddings request."""
+
+    batch: List[DocumentChunk] = []
+    batch_tokens = 0
+    for chunk in chunks:
+        tokens = estimate_tokens(chunk.text)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_inputs):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(chunk)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+# Content-defined chunking: a cut is allowed at a whitespace character once the
+# checksum of the preceding window hits a target residue. Because the decision
+# only looks at nearby text, an edit moves the boundaries around it while every
+# other chunk keeps its exact text (and therefore its checksum and vector).
+_BOUNDARY_WINDOW = 16
+_AVERAGE_WORD_LENGTH = 6
+_WHITESPACE_RE = re.compile(r"\s")
+
+
+def _next_boundary(text: str, start: int, chunk_size: int, final: bool) -> Optional[int]:
+    """Return the end of the segment starting at ``start``, or None if more text is needed.
+
+    Segments are at least ``chunk_size // 2`` and at most ``chunk_size * 2``
+    characters long and average roughly ``chunk_size``. A cut found within
+    the available text is final, so callers can feed text incrementally.
+    """
+
+    length = len(text)
+    min_size = max(1, chunk_size // 2)
+    max_size = max(min_size + 1, chunk_size * 2)
+    # Candidates are whitespace positions (about one per word) past min_size.
+    divisor = max(1, (chunk_size - min_size) // _AVERAGE_WORD_LENGTH)
+
+    limit = min(start + max_size, length)
+    last_whitespace = None
+    pos = start + min_size
+    while pos < limit:
+        match = _WHITESPACE_RE.search(text, pos, limit)
+        if not match:
+            break
+        pos = match.start()
+        last_whitespace = pos
+        window = text[max(start, pos - _BOUNDARY_WINDOW):pos]
+        if zlib.crc32(window.encode("utf-8")) % divisor == 0:
+            return pos
+        pos += 1
+
+    if start + max_size <= length:
+        return last_whitespace if last_whitespace is not None else limit
+    if final:
+        return length
+    return None
+
+
+def _iter_segments(
+    pieces: Iterable[str],
+    chunk_size: int,
+    overlap: int,
+) -> Iterator[Tuple[str, int, int]]:
+    """Lazily chunk text supplied as consecutive pieces.
+
+    Yields ``(chunk_text, start_index, end_index)`` with offsets relative to
+    the text without leading whitespace. Each chunk covers one
+    content-defined segment plus up to ``overlap`` characters from the tail
+    of the previous segment. Only the current segment window is buffered, so
+    memory stays bounded regardless of the total text length.
+    """
+
+    pieces = iter(pieces)
+    buffer = ""
+    base = 0  # absolute offset of buffer[0]
+    start = 0  # absolute offset of the next segment
+    previous_start = 0
+    final = False
+
+    while True:
+        end = None
+        if start - base < len(buffer):
+            end = _next_boundary(buffer, start - base, chunk_size, final)
+
+        if end is None:
+            if final:
+                return
+            piece = next(pieces, None)
+            if piece is None:
+                final = True
+                continue
+            if not buffer and start == 0:
+                piece = piece.lstrip()
+            # Drop text that no future chunk (including its overlap) can reference.
+            keep_from = max(previous_start, start - overlap)
+            buffer = buffer[keep_from - base:] + piece
+            base = keep_from
+            continue
+
+        chunk_start = max(previous_start, start - overlap)
+        chunk_text = buffer[chunk_start - base:end].strip()
+        if chunk_text:
+            yield chunk_text, chunk_start, base + end
+        previous_start = start
+        start = base + end
+
+
 def _split_text(text: str, chunk_size: int, overlap: int) -> List[Tuple[str, int, int]]:
     """Split text into chunks returning (chunk_text, start_index, end_index)."""
 
-    normalized = (text or "").strip()
-    if not normalized:
-        return []
+    return list(_iter_segments([text or ""], chunk_size, overlap))
 
-    length = len(normalized)
-    chunks: List[Tuple[str, int, int]] = []
-    start = 0
 
-    while start < length:
-        end = min(start + chunk_size, length)
-        chunk_text = normalized[start:end].strip()
-        if chunk_text:
-            chunks.append((chunk_text, start, end))
-        if end >= length:
-            break
-        start = max(0, end - overlap)
+def _iter_document_body(document_id: str, read_size: int) -> Iterator[str]:
+    """Yield a document body in slices read straight from the database."""
 
-    return chunks
+    position = 1  # SQL substrings are 1-indexed
+    while True:
+        piece = (
+            Document.objects.filter(id=document_id)
+            .annotate(piece=Substr("body", position, read_size))
+            .values_list("piece", flat=True)
+            .first()
+        )
+        if not piece:
+            return
+        yield piece
+        if len(piece) < read_size:
+            return
+        position += read_size
 
 
 def calculate_text_checksum(text: str) -> str:
@@ -87,12 +242,42 @@ def chunk_requires_weaviate_sync(chunk: DocumentChunk) -> bool:
     return False
 
 
+def _build_chunk_metadata(chunk: DocumentChunk, vector: Sequence[float], model_name: str) -> dict:
+    """Return chunk metadata updated with the embedding provenance."""
+
+    metadata_payload = dict(chunk.metadata or {})
+    metadata_payload.update(
+        {
+            "embedding_model": model_name,
+            "embedding_dimensions": len(vector),
+            "text_checksum": calculate_text_checksum(chunk.text),
+        }
+    )
+    return metadata_payload
+
+
+def _build_weaviate_properties(chunk: DocumentChunk, metadata_payload: dict) -> dict:
+    """Return the Weaviate object properties stored alongside a chunk vector."""
+
+    return {
+        "text": chunk.text,
+        "document_id": str(chunk.document_id),
+        "entity_id": str(chunk.document.entity_id),
+        "chunk_index": chunk.chunk_index,
+        "metadata_json": json.dumps(metadata_payload, default=str),
+    }
+
+
 logger = logging.getLogger(__name__)
 
 
 @shared_task(bind=True)
-def scrape_document_task(self, document_id: str) -> None:
-    """Populate a document body from Lightpanda and trigger chunking."""
+def scrape_document_task(self, document_id: str, force: bool = False) -> None:
+    """Populate a document body from Lightpanda and trigger chunking.
+
+    With ``force`` the source is re-scraped even if a body exists; the body is
+    only replaced (and re-chunked) when the page content actually changed.
+    """
 
     try:
         document = Document.objects.get(id=document_id)
@@ -100,7 +285,7 @@ def scrape_document_task(self, document_id: str) -> None:
         logger.warning("scrape_document_task skipped missing document %s", document_id)
         return
 
-    if document.body and document.body.strip():
+    if document.body and document.body.strip() and not (force and document.source):
         if document.scrape_status != Document.ScrapeStatus.COMPLETED:
             document.scrape_status = Document.ScrapeStatus.COMPLETED
             document.save(update_fields=["scrape_status"])
@@ -121,7 +306,10 @@ def scrape_document_task(self, document_id: str) -> None:
     document.save(update_fields=["scrape_status"])
 
     try:
-        ensure_document_body(document, raise_on_failure=True)
+        if force:
+            changed = refresh_document_body(document, raise_on_failure=True)
+        else:
+            changed = ensure_document_body(document, raise_on_failure=True)
     except LightpandaError:
         document.scrape_status = Document.ScrapeStatus.FAILED
         document.save(update_fields=["scrape_status"])
@@ -129,74 +317,221 @@ def scrape_document_task(self, document_id: str) -> None:
         return
 
     document.scrape_status = Document.ScrapeStatus.COMPLETED
-    document.save(update_fields=["body", "scrape_status"])
+    if not changed:
+        logger.info("Document %s content unchanged; skipping chunking", document_id)
+        document.save(update_fields=["scrape_status"])
+        return
 
-    chunk_document_task.delay(str(document.id))
+    # Saving the body enqueues chunk_document_task via core.signals.
+    document.save(update_fields=["body", "metadata", "scrape_status"])
 
 
-def _ensure_weaviate_collection_for_document_chunks(client) -> None:
-    """Create the target collection in Weaviate if it does not yet exist."""
-    
-    from weaviate.classes.config import Configure, Property, DataType
-    
-    # Check if collection exists
-    if client.collections.exists(WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME):
-        return
+@shared_task
+def scrape_documents_task(document_ids: List[str]) -> int:
+    """Scrape many documents, rendering only JavaScript-dependent pages.
+
+    Pages are fetched over plain HTTP first; the rest go concurrently through
+    the Lightpanda session pool. Intended for bulk imports; documents that already have a body or no
+    source are skipped. Returns the number of documents scraped.
+    """
 
-    # Create collection with v4 API
-    client.collections.create(
-        name=WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME,
-        description="Chunk of a document managed by Django",
-        vectorizer_config=Configure.Vectorizer.none(),
-        properties=[
-            Property(name="text", data_type=DataType.TEXT),
-            Property(name="document_id", data_type=DataType.TEXT),
-            Property(name="entity_id", data_type=DataType.TEXT),
-            Property(name="chunk_index", data_type=DataType.INT),
-            Property(name="metadata_json", data_type=DataType.TEXT),
-        ],
+    documents = [
+        document
+        for document in Document.objects.filter(id__in=document_ids).exclude(source__isnull=True).exclude(source="")
+        if not (document.body or "").strip()
+    ]
+    if not documents:
+        return 0
+
+    Document.objects.filter(id__in=[document.id for document in documents]).update(
+        scrape_status=Document.ScrapeStatus.IN_PROGRESS,
+        updated_at=timezone.now(),
     )
 
+    sources = {document.source for document in documents}
+    pages = lookup_fresh(sources)
+    missing = sources - pages.keys()
+    try:
+        fetched = scrape_many_markdown(missing, browser_fetch_many=fetch_many_markdown) if missing else {}
+    except LightpandaError:
+        Document.objects.filter(id__in=[document.id for document in documents]).update(
+            scrape_status=Document.ScrapeStatus.FAILED,
+            updated_at=timezone.now(),
+        )
+        logger.exception("scrape_documents_task failed for %s documents", len(documents))
+        return 0
+    for url, outcome in fetched.items():
+        if not isinstance(outcome, LightpandaError):
+            pages[url] = store_markdown(
+                url,
+                outcome.markdown,
+                etag=outcome.etag,
+                last_modified=outcome.last_modified,
+                path=outcome.path,
+            )
+
+    scraped = 0
+    for document in documents:
+        page = pages.get(document.source)
+        if page is not None:
+            # Saving the body enqueues chunk_document_task via core.signals.
+            document.body = page.markdown
+            document.metadata = {
+                **(document.metadata or {}),
+                "content_hash": page.content_hash,
+                "scrape_path": page.path,
+            }
+            document.scrape_status = Document.ScrapeStatus.COMPLETED
+            document.save(update_fields=["body", "metadata", "scrape_status"])
+            scraped += 1
+        else:
+            logger.warning("scrape_documents_task failed for %s: %s", document.id, fetched.get(document.source))
+            document.scrape_status = Document.ScrapeStatus.FAILED
+            document.save(update_fields=["scrape_status"])
+
+    logger.info("Scraped %s of %s documents", scraped, len(documents))
+    return scraped
+
+
+def _ensure_weaviate_collection_for_document_chunks(client) -> None:
+    """Create or migrate the chunk collection once per process."""
+
+    document_chunk_schema.ensure(client)
+
 
 @shared_task
 def chunk_document_task(document_id: str) -> int:
-    """Create DocumentChunk records for a document body."""
+    """Create or refresh DocumentChunk records for a document body.
 
-    try:
-        document = Document.objects.get(id=document_id)
-    except Document.DoesNotExist:  # pragma: no cover - defensive guard
-        logger.warning("chunk_document_task skipped missing document %s", document_id)
-        return 0
+    The body is read from the database in slices and chunked lazily, and
+    chunks are written in bounded batches, so memory stays flat for very large
+    documents. Documents that already have chunks are re-chunked
+    incrementally: chunks whose text is unchanged keep their rows and
+    vectors, and only new segments are embedded. Returns the number of chunks
+    the document now has.
+    """
 
-    if document.chunks.exists():
-        logger.info("Document %s already chunked; skipping", document_id)
-        return document.chunks.count()
+    # The row lock serialises re-chunks of one document; overlapping runs
+    # would otherwise park and diff the same rows and collide on chunk_index.
+    with transaction.atomic():
+        document = (
+            Document.objects.select_for_update()
+            .defer("body")
+            .annotate(body_length=Length("body"))
+            .filter(id=document_id)
+            .first()
+        )
+        if document is None:  # pragma: no cover - defensive guard
+            logger.warning("chunk_document_task skipped missing document %s", document_id)
+            return 0
 
-    chunk_size, overlap = _chunking_config()
-    segments = _split_text(document.body, chunk_size, overlap)
-    if not segments:
-        logger.info("Document %s produced no chunks", document_id)
-        return 0
+        chunk_size, overlap = _chunking_config()
+        read_size, write_batch = _chunk_io_config()
+        source_length = document.body_length or 0
 
-    created = 0
-    for idx, (chunk_text, start, end) in enumerate(segments):
-        metadata = {
-            "chunk_size": chunk_size,
-            "chunk_overlap": overlap,
-            "source_start": start,
-            "source_end": end,
-            "source_length": len(document.body or ""),
+        # Existing chunks are tracked by checksum only; their text stays in the database.
+        existing = list(document.chunks.values_list("id", "chunk_index", "metadata"))
+        missing_checksums = [
+            chunk_id for chunk_id, _, metadata in existing if not (metadata or {}).get("text_checksum")
+        ]
+        legacy_checksums = {
+            chunk_id: calculate_text_checksum(text)
+            for chunk_id, text in DocumentChunk.objects.filter(id__in=missing_checksums).values_list(
+                "id", "text"
+            ).iterator()
         }
-        DocumentChunk.objects.create(
-            document=document,
-            chunk_index=idx,
-            text=chunk_text,
-            metadata=metadata,
-        )
-        created += 1
+        available = {}
+        for chunk_id, chunk_index, metadata in existing:
+            checksum = (metadata or {}).get("text_checksum") or legacy_checksums[chunk_id]
+            available.setdefault(checksum, []).append((chunk_id, chunk_index, metadata or {}))
+
+        segments = _iter_segments(_iter_document_body(document_id, read_size), chunk_size, overlap)
+        now = timezone.now()
+        pending_updates: List[DocumentChunk] = []
+        pending_creates: List[DocumentChunk] = []
+        to_embed: List[str] = []
+        total = moved = created = 0
+
+        def flush() -> None:
+            nonlocal created
+            if pending_updates:
+                DocumentChunk.objects.bulk_update(pending_updates, ["chunk_index", "metadata", "updated_at"])
+                pending_updates.clear()
+            if pending_creates:
+                DocumentChunk.objects.bulk_create(pending_creates)
+                to_embed.extend(str(chunk.id) for chunk in pending_creates)
+                created += len(pending_creates)
+                pending_creates.clear()
+
+        if existing:
+            # Park existing chunks above any index the new layout can use so
+            # no write below violates the (document, chunk_index) constraint.
+            max_segments = source_length // max(1, chunk_size // 2) + 1
+            park_offset = max(index for _, index, _ in existing) + max_segments + 1
+            document.chunks.update(chunk_index=F("chunk_index") + park_offset)
+
+        for idx, (chunk_text, start, end) in enumerate(segments):
+            total += 1
+            metadata = _segment_metadata(chunk_size, overlap, start, end, source_length)
+            matches = available.get(calculate_text_checksum(chunk_text))
+            if matches:
+                chunk_id, original_index, chunk_metadata = matches.pop(0)
+                pending_updates.append(
+                    DocumentChunk(
+                        id=chunk_id,
+                        chunk_index=idx,
+                        metadata={**chunk_metadata, **metadata},
+                        updated_at=now,
+                    )
+                )
+                if original_index != idx:
+                    # The vector is unchanged, but the stored chunk_index must
+                    # follow; re-upserting is served from the embedding cache.
+                    to_embed.append(str(chunk_id))
+                    moved += 1
+            else:
+                chunk = DocumentChunk(
+                    document=document,
+                    chunk_index=idx,
+                    text=chunk_text,
+                    metadata=metadata,
+                )
+                # bulk_create sends no post_save, so these are embedded in
+                # batches once the transaction commits.
+                pending_creates.append(chunk)
+            if len(pending_updates) + len(pending_creates) >= write_batch:
+                flush()
+        flush()
+
+        removed_ids = [chunk_id for matches in available.values() for chunk_id, _, _ in matches]
+        if removed_ids:
+            DocumentChunk.objects.filter(id__in=removed_ids).delete()
+
+    for offset in range(0, len(to_embed), write_batch):
+        batch = to_embed[offset : offset + write_batch]
+        transaction.on_commit(lambda batch=batch: embed_document_chunks_task.delay(batch))
 
-    logger.info("Created %s chunks for document %s", created, document_id)
-    return created
+    if not total:
+        logger.info("Document %s produced no chunks", document_id)
+    logger.info(
+        "Chunked document %s: total=%s created=%s moved=%s deleted=%s",
+        document_id,
+        total,
+        created,
+        moved,
+        len(removed_ids),
+    )
+    return total
+
+
+def _segment_metadata(chunk_size: int, overlap: int, start: int, end: int, source_length: int) -> dict:
+    return {
+        "chunk_size": chunk_size,
+        "chunk_overlap": overlap,
+        "source_start": start,
+        "source_end": end,
+        "source_length": source_length,
+    }
 
 
 @shared_task(
@@ -216,44 +551,52 @@ def embed_document_chunk_task(self, chunk_id: str) -> None:
         return
 
     model_name = EMBEDDING_MODEL_NAME
+    dimensions = settings.EMBEDDING_DIMENSIONS
+    checksum = calculate_text_checksum(chunk.text)
+    cache = EmbeddingCache(model=model_name, dimensions=dimensions)
+    vector = cache.get_many([checksum]).get(checksum)
 
-    try:
-        embedding_client = get_embedding_client()
-        response = embedding_client.embeddings.create(
-            model=model_name,
-            input=chunk.text,
+    if vector is None:
+        wait = get_openai_rate_limiter().try_acquire(
+            tokens=estimate_tokens(chunk.text),
+            workspace_id=str(chunk.document.entity.workspace_id),
+            priority=PRIORITY_BULK,
         )
-        vector = response.data[0].embedding
-    except RateLimitError as exc:  # handled by autoretry_for but log first
-        logger.warning("OpenAI rate limit for chunk %s: %s", chunk_id, exc)
-        raise
-    except OpenAIError as exc:
-        logger.exception("OpenAI error embedding chunk %s", chunk_id)
-        raise self.retry(exc=exc, max_retries=1, countdown=5)
+        if wait:
+            # Deferred rather than failed: free the worker slot until budget is available.
+            raise self.retry(countdown=wait, max_retries=None)
+        try:
+            embedding_client = get_embedding_client()
+            response = embedding_client.embeddings.create(
+                model=model_name,
+                input=chunk.text,
+                dimensions=dimensions,
+            )
+            vector = response.data[0].embedding
+        except RateLimitError as exc:  # handled by autoretry_for but log first
+            logger.warning("OpenAI rate limit for chunk %s: %s", chunk_id, exc)
+            raise
+        except OpenAIError as exc:
+            logger.exception("OpenAI error embedding chunk %s", chunk_id)
+            raise self.retry(exc=exc, max_retries=1, countdown=5)
+        _store_cached_embeddings(cache, {checksum: vector})
+
+    # The local and pgvector backends only need the embedding itself, so record
+    # it before (and regardless of) the Weaviate write.
+    metadata_payload = _build_chunk_metadata(chunk, vector, model_name)
+    chunk.metadata = metadata_payload
+    with transaction.atomic():
+        chunk.save(update_fields=["metadata", "updated_at"])
+        _mirror_to_pgvector([(chunk, vector)], model_name)
 
     weaviate_client = get_weaviate_client()
-    
-    metadata_payload = dict(chunk.metadata or {})
-    metadata_payload.update(
-        {
-            "embedding_model": model_name,
-            "embedding_dimensions": len(vector),
-            "text_checksum": calculate_text_checksum(chunk.text),
-        }
-    )
     weaviate_id = chunk.weaviate_vector_id or str(chunk.id)
 
     try:
         _ensure_weaviate_collection_for_document_chunks(weaviate_client)
         collection = weaviate_client.collections.get(WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME)
-        
-        data_object = {
-            "text": chunk.text,
-            "document_id": str(chunk.document_id),
-            "entity_id": str(chunk.document.entity_id),
-            "chunk_index": chunk.chunk_index,
-            "metadata_json": json.dumps(metadata_payload, default=str),
-        }
+
+        data_object = _build_weaviate_properties(chunk, metadata_payload)
 
         if chunk.weaviate_vector_id:
             # Update existing object
@@ -271,19 +614,406 @@ def embed_document_chunk_task(self, chunk_id: str) -> None:
             )
     except WeaviateBaseError as exc:
         logger.exception("Weaviate error for chunk %s", chunk_id)
+        document_chunk_schema.handle_error(exc)
         raise self.retry(exc=exc, max_retries=3, countdown=10)
 
     chunk.weaviate_vector_id = weaviate_id
-    chunk.metadata = metadata_payload
-    with transaction.atomic():
-        chunk.save(update_fields=["weaviate_vector_id", "metadata", "updated_at"])
+    chunk.save(update_fields=["weaviate_vector_id", "updated_at"])
 
     logger.info("Embedded chunk %s into Weaviate object %s", chunk_id, weaviate_id)
 
 
+@shared_task(
+    bind=True,
+    autoretry_for=(RateLimitError,),
+    retry_backoff=True,
+    retry_jitter=True,
+    retry_kwargs={"max_retries": 5},
+)
+def embed_document_chunks_task(self, chunk_ids: List[str]) -> int:
+    """Embed many chunks with batched OpenAI requests and a single Weaviate batch write.
+
+    Texts already present in the embedding cache are not sent to OpenAI. The
+    remaining unique texts are grouped by token count so each embeddings
+    request stays within the provider limits. The embedding metadata is
+    persisted with one ``bulk_update`` as soon as the vectors are known, so
+    backends that do not search Weaviate never depend on it. Objects are then
+    upserted through Weaviate's batch API and the vector ids of the accepted
+    ones are saved. Returns the number of chunks that were embedded.
+    """
+
+    chunks = list(
+        DocumentChunk.objects.select_related("document__entity")
+        .filter(id__in=chunk_ids)
+        .order_by("document_id", "chunk_index")
+    )
+    if not chunks:
+        logger.warning("embed_document_chunks_task found none of %s chunks", len(chunk_ids))
+        return 0
+
+    model_name = EMBEDDING_MODEL_NAME
+    dimensions = settings.EMBEDDING_DIMENSIONS
+    cache = EmbeddingCache(model=model_name, dimensions=dimensions)
+    checksums = {chunk.id: calculate_text_checksum(chunk.text) for chunk in chunks}
+    vectors_by_checksum = cache.get_many(checksums.values())
+
+    # Embed each uncached text once, even if several chunks share it.
+    pending = {}
+    for chunk in chunks:
+        checksum = checksums[chunk.id]
+        if checksum not in vectors_by_checksum and checksum not in pending:
+            pending[checksum] = chunk
+
+    max_tokens, max_inputs = _embedding_batch_config()
+    embedding_client = get_embedding_client() if pending else None
+    rate_limiter = get_openai_rate_limiter()
+    # Batches never mix workspaces so each one is charged to the workspace it embeds for.
+    pending_by_workspace = {}
+    for chunk in pending.values():
+        workspace_id = str(chunk.document.entity.workspace_id)
+        pending_by_workspace.setdefault(workspace_id, []).append(chunk)
+    batches = [
+        (workspace_id, batch)
+        for workspace_id, workspace_chunks in pending_by_workspace.items()
+        for batch in _batch_chunks_by_tokens(workspace_chunks, max_tokens, max_inputs)
+    ]
+    fresh_vectors = {}
+    for workspace_id, batch in batches:
+        wait = rate_limiter.try_acquire(
+            tokens=sum(estimate_tokens(chunk.text) for chunk in batch),
+            workspace_id=workspace_id,
+            priority=PRIORITY_BULK,
+        )
+        if wait:
+            # Batches embedded so far are already cached, so the retry resumes here.
+            raise self.retry(countdown=wait, max_retries=None)
+        try:
+            response = embedding_client.embeddings.create(
+                model=model_name,
+                input=[chunk.text for chunk in batch],
+                dimensions=dimensions,
+            )
+        except RateLimitError as exc:  # handled by autoretry_for but log first
+            logger.warning("OpenAI rate limit embedding %s chunks: %s", len(batch), exc)
+            raise
+        except OpenAIError as exc:
+            logger.exception("OpenAI error embedding batch of %s chunks", len(batch))
+            raise self.retry(exc=exc, max_retries=1, countdown=5)
+
+        # Embeddings are returned in input order.
+        batch_vectors = {
+            checksums[chunk.id]: list(item.embedding) for chunk, item in zip(batch, response.data)
+        }
+        _store_cached_embeddings(cache, batch_vectors)
+        fresh_vectors.update(batch_vectors)
+
+    vectors_by_checksum.update(fresh_vectors)
+    logger.info(
+        "Embedding cache for %s chunks: hits=%s misses=%s",
+        len(chunks),
+        cache.stats.hits,
+        cache.stats.misses,
+    )
+
+    vectors: List[Tuple[DocumentChunk, List[float]]] = [
+        (chunk, vectors_by_checksum[checksums[chunk.id]]) for chunk in chunks
+    ]
+
+    # The local and pgvector backends only need the embeddings themselves, so
+    # record them before (and regardless of) the Weaviate write.
+    now = timezone.now()
+    for chunk, vector in vectors:
+        chunk.metadata = _build_chunk_metadata(chunk, vector, model_name)
+        # bulk_update bypasses auto_now, so stamp the row explicitly.
+        chunk.updated_at = now
+    with transaction.atomic():
+        DocumentChunk.objects.bulk_update(chunks, ["metadata", "updated_at"])
+        _mirror_to_pgvector(vectors, model_name)
+
+    from weaviate.classes.data import DataObject
+
+    weaviate_client = get_weaviate_client()
+    objects = []
+    for chunk, vector in vectors:
+        chunk.weaviate_vector_id = chunk.weaviate_vector_id or str(chunk.id)
+        objects.append(
+            DataObject(
+                properties=_build_weaviate_properties(chunk, chunk.metadata),
+                uuid=chunk.weaviate_vector_id,
+                vector=vector,
+            )
+        )
+
+    try:
+        _ensure_weaviate_collection_for_document_chunks(weaviate_client)
+        collection = weaviate_client.collections.get(WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME)
+        # Batch imports upsert by uuid, so new and existing objects share one call.
+        result = collection.data.insert_many(objects)
+    except WeaviateBaseError as exc:
+        logger.exception("Weaviate batch error for %s chunks", len(objects))
+        document_chunk_schema.handle_error(exc)
+        raise self.retry(exc=exc, max_retries=3, countdown=10)
+
+    errors = getattr(result, "errors", None) or {}
+    failed_ids = [str(vectors[index][0].id) for index in errors]
+    embedded = [chunk for index, (chunk, _) in enumerate(vectors) if index not in errors]
+
+    if embedded:
+        DocumentChunk.objects.bulk_update(embedded, ["weaviate_vector_id", "updated_at"])
+
+    logger.info(
+        "Embedded %s chunks into Weaviate (%s failed)",
+        len(embedded),
+        len(failed_ids),
+    )
+
+    if failed_ids:
+        for index, error in list(errors.items())[:5]:
+            logger.warning(
+                "Weaviate rejected chunk %s: %s",
+                vectors[index][0].id,
+                getattr(error, "message", error),
+            )
+        raise self.retry(
+            args=(failed_ids,),
+            exc=WeaviateBaseError(f"{len(failed_ids)} chunk objects failed to import"),
+            max_retries=3,
+            countdown=10,
+        )
+
+    return len(embedded)
+
+
+def _mirror_to_pgvector(vectors: Sequence[Tuple[DocumentChunk, List[float]]], model_name: str) -> None:
+    """Dual-write vectors to the pgvector side table while that store is enabled."""
+
+    if not apps.is_installed("pgvector_store"):
+        return
+    from pgvector_store.storage import store_chunk_embeddings
+
+    store_chunk_embeddings(vectors, model=model_name)
+
+
+_next_embedding_cache_prune_at = 0.0
+
+
+def _store_cached_embeddings(cache: EmbeddingCache, vectors: dict) -> None:
+    """Persist fresh vectors and periodically enqueue cache eviction."""
+
+    global _next_embedding_cache_prune_at
+
+    if not vectors:
+        return
+    cache.set_many(vectors)
+
+    now = time.monotonic()
+    if now >= _next_embedding_cache_prune_at:
+        interval = max(60, _int_from_env("EMBEDDING_CACHE_PRUNE_INTERVAL_SECONDS", 3600))
+        _next_embedding_cache_prune_at = now + interval
+        prune_embedding_cache_task.delay()
+
+
+@shared_task
+def prune_embedding_cache_task() -> int:
+    """Apply the embedding cache TTL and size limit.
+
+    Vectors of local-backend workspaces are kept: the cache is their only copy.
+    """
+
+    from matching.local_index import local_backend_checksums
+
+    max_entries, max_age_days = _embedding_cache_config()
+    return prune_embedding_cache(
+        max_entries=max_entries,
+        max_age_days=max_age_days,
+        keep_checksums=local_backend_checksums(),
+    )
+
+
+def _reindex_config() -> Tuple[int, float]:
+    """Return (page_size, chunks queued per minute) for re-index runs."""
+
+    page_size = max(1, _int_from_env("REINDEX_PAGE_SIZE", 1000))
+    per_minute = max(1, _int_from_env("REINDEX_CHUNKS_PER_MINUTE", 6000))
+    return page_size, float(per_minute)
+
+
+def reindex_delay(queued: int, per_minute: float) -> float:
+    """Seconds to wait after queuing ``queued`` chunks to stay under ``per_minute``."""
+
+    return queued * 60 / per_minute if per_minute > 0 else 0.0
+
+
+def reindex_chunk_page(checkpoint: ReindexCheckpoint, *, page_size: int) -> Tuple[int, int]:
+    """Examine the next page of chunks after the checkpoint and queue the stale ones.
+
+    Chunks are walked by primary key (keyset pagination), so each page is an
+    index range scan regardless of how far the run has progressed. Stale
+    chunks are embedded by ``embed_document_chunks_task`` in provider-sized
+    batches. The checkpoint is advanced and saved before returning, so an
+    interrupted run resumes at the next page. Returns (scanned, queued).
+    """
+
+    queryset = DocumentChunk.objects.only("id", "text", "metadata", "weaviate_vector_id").order_by("id")
+    if checkpoint.last_chunk_id:
+        queryset = queryset.filter(id__gt=checkpoint.last_chunk_id)
+    page = list(queryset[:page_size])
+
+    if not page:
+        checkpoint.status = ReindexCheckpoint.Status.COMPLETED
+        checkpoint.finished_at = timezone.now()
+        checkpoint.save(update_fields=["status", "finished_at", "updated_at"])
+        return 0, 0
+
+    stale_ids = [str(chunk.id) for chunk in page if chunk_requires_weaviate_sync(chunk)]
+    _, max_inputs = _embedding_batch_config()
+    for start in range(0, len(stale_ids), max_inputs):
+        embed_document_chunks_task.delay(stale_ids[start : start + max_inputs])
+
+    checkpoint.last_chunk_id = page[-1].id
+    checkpoint.scanned_count = F("scanned_count") + len(page)
+    checkpoint.queued_count = F("queued_count") + len(stale_ids)
+    checkpoint.save(update_fields=["last_chunk_id", "scanned_count", "queued_count", "updated_at"])
+    checkpoint.refresh_from_db(fields=["scanned_count", "queued_count", "status"])
+    return len(page), len(stale_ids)
+
+
+@shared_task
+def reindex_chunks_task(
+    checkpoint_name: str,
+    page_size: Optional[int] = None,
+    per_minute: Optional[float] = None,
+) -> int:
+    """Run one page of a re-index run and schedule the next one.
+
+    The chain stops when the run completes or its checkpoint is paused; the
+    delay between pages keeps the run under ``per_minute`` (default
+    ``REINDEX_CHUNKS_PER_MINUTE``). ``page_size`` and ``per_minute`` are passed
+    on to every later page. Returns the number of chunks examined.
+    """
+
+    checkpoint = ReindexCheckpoint.objects.filter(
+        name=checkpoint_name,
+        status=ReindexCheckpoint.Status.RUNNING,
+    ).first()
+    if checkpoint is None:
+        logger.info("Re-index run %s is not running; stopping", checkpoint_name)
+        return 0
+
+    default_page_size, default_per_minute = _reindex_config()
+    page_size = max(1, page_size or default_page_size)
+    per_minute = per_minute or default_per_minute
+    scanned, queued = reindex_chunk_page(checkpoint, page_size=page_size)
+    logger.info(
+        "Re-index run %s: scanned %s, queued %s (%s/%s chunks so far)",
+        checkpoint_name,
+        scanned,
+        queued,
+        checkpoint.scanned_count,
+        checkpoint.total_estimate,
+    )
+    if scanned:
+        reindex_chunks_task.apply_async(
+            (checkpoint_name, page_size, per_minute),
+            countdown=reindex_delay(queued, per_minute),
+        )
+    return scanned
+
+
+# Weaviate caps the matches of a single delete_many at QUERY_MAXIMUM_RESULTS.
+WEAVIATE_DELETE_MANY_LIMIT = 10_000
+
+
+def _vector_delete_batch_size() -> int:
+    return max(1, min(_int_from_env("WEAVIATE_DELETE_BATCH_SIZE", 1000), WEAVIATE_DELETE_MANY_LIMIT))
+
+
+def _delete_vectors_where(where, description: str) -> int:
+    """Run ``delete_many`` until no matching objects remain; returns the number deleted."""
+
+    weaviate_client = get_weaviate_client()
+    if not document_chunk_schema.exists(weaviate_client):
+        logger.debug(
+            "Weaviate collection %s missing when deleting %s; skipping",
+            WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME,
+            description,
+        )
+        return 0
+
+    collection = weaviate_client.collections.get(WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME)
+    deleted = 0
+    while True:
+        result = collection.data.delete_many(where=where)
+        deleted += result.successful
+        if result.failed:
+            logger.warning("Failed to delete %s Weaviate objects for %s", result.failed, description)
+        # Fewer matches than the server cap means everything was matched.
+        if not result.successful or result.matches < WEAVIATE_DELETE_MANY_LIMIT:
+            break
+    logger.info("Deleted %s Weaviate objects for %s", deleted, description)
+    return deleted
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(WeaviateBaseError,),
+    retry_backoff=True,
+    retry_jitter=True,
+    retry_kwargs={"max_retries": 3},
+)
+def delete_chunk_vectors_task(self, vector_ids: List[str]) -> int:
+    """Remove chunk vectors from Weaviate in ``delete_many`` batches."""
+
+    from weaviate.classes.query import Filter
+
+    batch_size = _vector_delete_batch_size()
+    deleted = 0
+    for start in range(0, len(vector_ids), batch_size):
+        batch = vector_ids[start : start + batch_size]
+        try:
+            deleted += _delete_vectors_where(
+                Filter.by_id().contains_any(batch),
+                f"{len(batch)} chunk vectors",
+            )
+        except WeaviateBaseError as exc:
+            document_chunk_schema.handle_error(exc)
+            raise
+    return deleted
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(WeaviateBaseError,),
+    retry_backoff=True,
+    retry_jitter=True,
+    retry_kwargs={"max_retries": 3},
+)
+def delete_document_vectors_task(self, document_ids: List[str]) -> int:
+    """Remove every chunk vector belonging to the given documents.
+
+    Used when documents (or their entities) are deleted, so the vectors are
+    matched by their ``document_id`` property instead of one id at a time.
+    """
+
+    from weaviate.classes.query import Filter
+
+    try:
+        return _delete_vectors_where(
+            Filter.by_property("document_id").contains_any([str(doc_id) for doc_id in document_ids]),
+            f"{len(document_ids)} documents",
+        )
+    except WeaviateBaseError as exc:
+        document_chunk_schema.handle_error(exc)
+        raise
+
+
 @shared_task(bind=True)
 def delete_document_chunk_vector_task(self, chunk_id: str, weaviate_vector_id: str) -> None:
-    """Remove a chunk vector from Weaviate when the Django record is deleted."""
+    """Remove a single chunk vector from Weaviate.
+
+    Superseded by :func:`delete_chunk_vectors_task`; kept so messages queued
+    by earlier deployments still drain.
+    """
 
     if not weaviate_vector_id:
         logger.debug(
@@ -295,17 +1025,14 @@ def delete_document_chunk_vector_task(self, chunk_id: str, weaviate_vector_id: s
     weaviate_client = get_weaviate_client()
 
     try:
-        collections_api = weaviate_client.collections
-        if hasattr(collections_api, "exists") and not collections_api.exists(
-            WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME
-        ):
+        if not document_chunk_schema.exists(weaviate_client):
             logger.debug(
                 "Weaviate collection %s missing when deleting chunk %s; skipping",
                 WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME,
                 chunk_id,
             )
             return
-        collection = collections_api.get(WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME)
+        collection = weaviate_client.collections.get(WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME)
     except WeaviateBaseError as exc:
         logger.warning(
             "Failed to resolve Weaviate collection for chunk %s: %s",
@@ -322,6 +1049,7 @@ def delete_document_chunk_vector_task(self, chunk_id: str, weaviate_vector_id: s
             chunk_id,
         )
     except WeaviateBaseError as exc:
+        document_chunk_schema.handle_error(exc)
         status_code = getattr(exc, "status_code", None)
         if status_code == 404:
             logger.debug(
@@ -336,3 +1064,52 @@ def delete_document_chunk_vector_task(self, chunk_id: str, weaviate_vector_id: s
             chunk_id,
             exc,
         )
+
+
+@shared_task
+def reconcile_vectors_task(fix: bool = False, batch_size: Optional[int] = None) -> dict:
+    """Compare chunk rows with Weaviate objects and optionally repair the drift.
+
+    With ``fix``, missing and stale chunks are re-embedded through
+    ``embed_document_chunks_task`` (a batch upsert; cached vectors are reused)
+    and orphaned objects are removed with ``delete_chunk_vectors_task``.
+    Returns the reconciliation report as a dict.
+    """
+
+    batch_size = max(1, batch_size or _int_from_env("VECTOR_RECONCILE_BATCH_SIZE", 1000))
+    weaviate_client = get_weaviate_client()
+    try:
+        if not document_chunk_schema.exists(weaviate_client):
+            logger.info("Weaviate collection %s missing; nothing to reconcile", WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME)
+            return {}
+        collection = weaviate_client.collections.get(WEAVIATE_DOCUMENT_CHUNKS_COLLECTION_NAME)
+    except WeaviateBaseError as exc:
+        document_chunk_schema.handle_error(exc)
+        raise
+
+    reembed = delete_vectors = None
+    if fix:
+        _, max_inputs = _embedding_batch_config()
+
+        def reembed(chunk_ids: List[str]) -> None:
+            for start in range(0, len(chunk_ids), max_inputs):
+                embed_document_chunks_task.delay(chunk_ids[start : start + max_inputs])
+
+        def delete_vectors(vector_ids: List[str]) -> None:
+            # A chunk may have been embedded after the Postgres cursor passed it.
+            claimed = set(
+                DocumentChunk.objects.filter(weaviate_vector_id__in=vector_ids).values_list(
+                    "weaviate_vector_id", flat=True
+                )
+            )
+            orphaned = [vector_id for vector_id in vector_ids if vector_id not in claimed]
+            if orphaned:
+                delete_chunk_vectors_task.delay(orphaned)
+
+    report = reconcile_vectors(
+        collection,
+        batch_size=batch_size,
+        reembed=reembed,
+        delete_vectors=delete_vectors,
+    )
+    return report.as_dict()
@@ -1,30 +1,97 @@
+import asyncio
+import http.server
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
 from types import SimpleNamespace
-from unittest.mock import MagicMock, patch
+from urllib.parse import urlsplit
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import redis
+from celery.exceptions import Retry
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from weaviate.exceptions import WeaviateBaseError
 
 from django.contrib.admin.sites import AdminSite
 from django.contrib.messages.storage.fallback import FallbackStorage
-from django.test import RequestFactory, override_settings
+from django.core.management import call_command
+from django.db import transaction
+from django.test import RequestFactory, SimpleTestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APIClient, APITestCase
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+
+from . import ai_clients
+from .admin import DocumentAdmin, DocumentChunkAdmin
+from .browser_pool import BrowserPool
+from .lightpanda import LightpandaError, _extract_main_content, fetch_many_markdown, html_to_markdown
+from .management.commands.benchmark_html_cleaning import (
+    legacy_html_to_markdown,
+    load_corpus,
+    normalise_markdown,
+)
+from matching.audit import MatchingJobAuditRecorder
+from matching.chunk_map import ChunkIdentityMap
+from matching.context import EntityDocumentBundle, MatchingJobContext
+from matching.interfaces import ChunkPayload
+from matching.local_index import LocalVectorSearcher, get_local_vector_index, reset_local_vector_indexes
+from matching.local_scoring import build_local_scorer
+from matching.planning import SearchCriterion, SearchPlan
+from matching.pre_ranking import pre_rank_targets
+from matching.providers import OpenAIEmbeddingGenerator, WeaviateVectorSearcher
+from matching.search import CriterionHit, TargetSearchSummary, collect_target_matches
 
-from .admin import DocumentChunkAdmin
+from .services.embedding_cache import pack_vector
+from .services.query_embedding_cache import QueryEmbeddingCache
+from .services.rate_limiting import PRIORITY_BULK, PRIORITY_INTERACTIVE, OpenAIRateLimiter
+from .services.scrape_cache import _single_flight
+from .services.scraping import (
+    PATH_BROWSER,
+    PATH_NOT_MODIFIED,
+    PATH_STATIC,
+    ScrapeResult,
+    is_public_url,
+    scrape_many_markdown,
+    scrape_markdown,
+)
+from .services.vector_schema import DOCUMENT_CHUNK_PROPERTIES, VectorSchemaManager
 from .models import (
     Document,
     DocumentChunk,
+    EmbeddingCacheEntry,
     Entity,
     EntityType,
     MatchingJob,
     MatchingJobTarget,
     MatchingJobUpdate,
     MatchingTemplate,
+    ReindexCheckpoint,
     Workspace,
 )
-from .tasks import calculate_text_checksum
+from .tasks import (
+    EMBEDDING_MODEL_NAME,
+    _chunking_config,
+    _split_text,
+    calculate_text_checksum,
+    embed_document_chunks_task,
+    prune_embedding_cache_task,
+    reconcile_vectors_task,
+    reindex_chunk_page,
+    reindex_chunks_task,
+    scrape_document_task,
+)
 
 
 @override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
-class CoreCrudFlowTests(APITestCase):
+class CoreCrudFlowTests(APITransactionTestCase):
     def setUp(self):
         super().setUp()
         self.client = APIClient()
@@ -37,6 +104,9 @@ class CoreCrudFlowTests(APITestCase):
         self.lightpanda_patcher = patch(
             "core.services.document_ingestion.fetch_markdown"
         )
+        self.static_fetch_patcher = patch(
+            "core.services.scraping.fetch_static", return_value=None
+        )
         self.matching_task_patcher = patch(
             "core.signals.run_matching_job_task.delay"
         )
@@ -44,11 +114,13 @@ class CoreCrudFlowTests(APITestCase):
         self.mock_get_weaviate = self.weaviate_patcher.start()
         self.mock_ensure_collection = self.ensure_collection_patcher.start()
         self.mock_fetch_markdown = self.lightpanda_patcher.start()
+        self.static_fetch_patcher.start()
         self.mock_run_matching_job = self.matching_task_patcher.start()
         self.addCleanup(self.embedding_patcher.stop)
         self.addCleanup(self.weaviate_patcher.stop)
         self.addCleanup(self.ensure_collection_patcher.stop)
         self.addCleanup(self.lightpanda_patcher.stop)
+        self.addCleanup(self.static_fetch_patcher.stop)
         self.addCleanup(self.matching_task_patcher.stop)
 
         self.embedding_client = MagicMock()
@@ -61,7 +133,9 @@ class CoreCrudFlowTests(APITestCase):
         self.mock_collection = MagicMock()
         self.mock_collection.data.insert = MagicMock()
         self.mock_collection.data.replace = MagicMock()
+        self.mock_collection.data.insert_many.return_value = SimpleNamespace(errors={})
         self.mock_collection.data.delete_by_id = MagicMock()
+        self.mock_collection.data.delete_many.return_value = SimpleNamespace(successful=1, failed=0, matches=1)
         self.weaviate_client.collections = MagicMock()
         self.weaviate_client.collections.get.return_value = self.mock_collection
         self.weaviate_client.collections.exists.return_value = True
@@ -141,7 +215,8 @@ class CoreCrudFlowTests(APITestCase):
         self.assertEqual(chunk.weaviate_vector_id, str(chunk.id))
         self.embedding_client.embeddings.create.assert_called_once()
         self.mock_ensure_collection.assert_called_once_with(self.weaviate_client)
-        self.mock_collection.data.insert.assert_called_once()
+        self.mock_collection.data.insert_many.assert_called_once()
+        self.mock_collection.data.insert.assert_not_called()
 
         template_payload = {
             "name": "Candidate to Job",
@@ -210,6 +285,34 @@ class CoreCrudFlowTests(APITestCase):
         self.assertEqual(list_response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(list_response.data), 1)
 
+    def test_shared_source_is_scraped_once_and_unchanged_rescrape_skips_chunking(self):
+        entity = self.workspace.entities.create(
+            entity_type=self.candidate_type,
+            name="Scrape Subject",
+        )
+        self.mock_fetch_markdown.return_value = "# Shared posting\n\nSame text for every document."
+
+        first = Document.objects.create(entity=entity, source="https://jobs.example.com/1", title="A")
+        second = Document.objects.create(entity=entity, source="https://jobs.example.com/1", title="B")
+
+        self.mock_fetch_markdown.assert_called_once_with("https://jobs.example.com/1")
+        for document in (first, second):
+            document.refresh_from_db()
+            self.assertEqual(document.scrape_status, Document.ScrapeStatus.COMPLETED)
+            self.assertEqual(document.body, self.mock_fetch_markdown.return_value)
+
+        with patch("core.signals.chunk_document_task.delay") as chunk_delay:
+            scrape_document_task.delay(str(first.id), force=True)
+            self.assertEqual(self.mock_fetch_markdown.call_count, 2)
+            chunk_delay.assert_not_called()
+
+            self.mock_fetch_markdown.return_value = "# Shared posting\n\nThe text changed."
+            scrape_document_task.delay(str(first.id), force=True)
+            chunk_delay.assert_called_once_with(str(first.id))
+
+        first.refresh_from_db()
+        self.assertEqual(first.body, "# Shared posting\n\nThe text changed.")
+
     def test_chunk_update_and_delete_syncs_weaviate(self):
         entity = self.workspace.entities.create(
             entity_type=self.candidate_type,
@@ -231,9 +334,9 @@ class CoreCrudFlowTests(APITestCase):
             calculate_text_checksum("Initial chunk text"),
         )
 
-        # Creation should insert a new vector.
+        # Creation should batch-insert a new vector.
         self.embedding_client.embeddings.create.assert_called_once()
-        self.mock_collection.data.insert.assert_called_once()
+        self.mock_collection.data.insert_many.assert_called_once()
 
         # Updating text triggers a re-embed (replace in Weaviate).
         self.embedding_client.embeddings.create.reset_mock()
@@ -262,9 +365,238 @@ class CoreCrudFlowTests(APITestCase):
 
         # Deleting the chunk should remove the vector.
         vector_id = chunk.weaviate_vector_id
-        self.mock_collection.data.delete_by_id.reset_mock()
+        self.mock_collection.data.delete_many.reset_mock()
         chunk.delete()
-        self.mock_collection.data.delete_by_id.assert_called_once_with(uuid=vector_id)
+        self.mock_collection.data.delete_many.assert_called_once()
+        where = self.mock_collection.data.delete_many.call_args.kwargs["where"]
+        self.assertEqual(where.value, [vector_id])
+
+    @patch.dict(os.environ, {"SCRAPE_BATCH_SIZE": "2"})
+    def test_bulk_document_import_scrapes_in_batches(self):
+        entity = self.workspace.entities.create(entity_type=self.candidate_type, name="Import Subject")
+        rows = [{"entity": str(entity.id), "source": f"https://example.com/{index}"} for index in range(3)]
+        rows.append({"entity": str(entity.id), "title": "Inline", "body": "Inline body"})
+
+        with patch("core.services.document_import.scrape_documents_task.delay") as mock_scrape, patch(
+            "core.signals.scrape_document_task.delay"
+        ) as mock_single_scrape:
+            response = self.client.post(reverse("core:document-bulk"), data=rows, format="json")
+
+            path = os.path.join(tempfile.mkdtemp(), "documents.jsonl")
+            self.addCleanup(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(json.dumps({"entity": str(entity.id), "source": "https://example.com/cli"}) + "\n")
+            call_command("import_documents", path, stdout=StringIO())
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 4)
+        mock_single_scrape.assert_not_called()
+        batches = [call.args[0] for call in mock_scrape.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [2, 1, 1])
+        inline = Document.objects.get(title="Inline")
+        self.assertEqual(inline.scrape_status, Document.ScrapeStatus.COMPLETED)
+        self.assertTrue(inline.chunks.exists())
+
+        invalid = self.client.post(reverse("core:document-bulk"), data=[{"entity": str(entity.id)}], format="json")
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_document_saves_rechunk_only_after_committed_body_changes(self):
+        entity = self.workspace.entities.create(entity_type=self.candidate_type, name="Notes Subject")
+        document = Document.objects.create(
+            entity=entity,
+            source="manual",
+            title="Notes",
+            body="First body",
+            scrape_status=Document.ScrapeStatus.COMPLETED,
+        )
+
+        with patch("core.signals.chunk_document_task.delay") as mock_chunk:
+            document.title = "Renamed"
+            document.save()
+            Document.objects.get(id=document.id).save()
+            mock_chunk.assert_not_called()
+
+            with transaction.atomic():
+                document.body = "Second body"
+                document.save()
+                mock_chunk.assert_not_called()
+            mock_chunk.assert_called_once_with(str(document.id))
+
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                document.body = "Rolled back body"
+                document.save()
+                raise RuntimeError
+            mock_chunk.assert_called_once()
+
+    def test_entity_delete_removes_vectors_per_document_batch(self):
+        entity = self.workspace.entities.create(
+            entity_type=self.candidate_type,
+            name="Cascade Subject",
+        )
+        self.embedding_client.embeddings.create.side_effect = lambda model, input, **_: SimpleNamespace(
+            data=[SimpleNamespace(embedding=[0.1, 0.2, 0.3]) for _ in input]
+        )
+        documents = [
+            Document.objects.create(
+                entity=entity,
+                source="manual",
+                title=f"Doc {index}",
+                body=" ".join(f"doc{index} word{n}" for n in range(600)),
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+            for index in range(2)
+        ]
+        self.assertGreater(DocumentChunk.objects.filter(document__entity=entity).count(), 2)
+
+        self.mock_collection.data.delete_many.reset_mock()
+        entity.delete()
+
+        self.mock_collection.data.delete_many.assert_called_once()
+        where = self.mock_collection.data.delete_many.call_args.kwargs["where"]
+        self.assertEqual(where.target, "document_id")
+        self.assertCountEqual(where.value, [str(document.id) for document in documents])
+
+    def test_batch_embedding_uses_single_request_and_batch_write(self):
+        entity = self.workspace.entities.create(
+            entity_type=self.candidate_type,
+            name="Batch Subject",
+        )
+        document = Document.objects.create(
+            entity=entity,
+            source="manual",
+            title="Batch",
+            body="First chunk text",
+            scrape_status=Document.ScrapeStatus.COMPLETED,
+        )
+        for index, text in enumerate(["Second chunk text", "Third chunk text"], start=1):
+            DocumentChunk.objects.create(document=document, chunk_index=index, text=text)
+        chunk_ids = [str(chunk_id) for chunk_id in document.chunks.values_list("id", flat=True)]
+        EmbeddingCacheEntry.objects.all().delete()
+
+        self.embedding_client.embeddings.create.reset_mock()
+        self.embedding_client.embeddings.create.side_effect = lambda model, input, **_: SimpleNamespace(
+            data=[SimpleNamespace(embedding=[0.1, 0.2, 0.3]) for _ in input]
+        )
+        self.mock_collection.data.insert_many.reset_mock()
+
+        embedded = embed_document_chunks_task(chunk_ids)
+
+        self.assertEqual(embedded, 3)
+        self.embedding_client.embeddings.create.assert_called_once()
+        self.assertEqual(
+            len(self.embedding_client.embeddings.create.call_args.kwargs["input"]),
+            3,
+        )
+        self.mock_collection.data.insert_many.assert_called_once()
+        self.assertEqual(len(self.mock_collection.data.insert_many.call_args.args[0]), 3)
+        for chunk in document.chunks.all():
+            self.assertEqual(chunk.weaviate_vector_id, str(chunk.id))
+            self.assertEqual(
+                chunk.metadata.get("text_checksum"),
+                calculate_text_checksum(chunk.text),
+            )
+
+    def test_identical_chunk_text_reuses_cached_embedding(self):
+        entity = self.workspace.entities.create(
+            entity_type=self.candidate_type,
+            name="Cache Subject",
+        )
+        Document.objects.create(
+            entity=entity,
+            source="manual",
+            title="Posting",
+            body="Shared job posting text",
+            scrape_status=Document.ScrapeStatus.COMPLETED,
+        )
+        self.embedding_client.embeddings.create.assert_called_once()
+        self.assertEqual(EmbeddingCacheEntry.objects.count(), 1)
+
+        self.embedding_client.embeddings.create.reset_mock()
+        self.mock_collection.data.insert_many.reset_mock()
+        duplicate = Document.objects.create(
+            entity=entity,
+            source="manual",
+            title="Posting copy",
+            body="Shared job posting text",
+            scrape_status=Document.ScrapeStatus.COMPLETED,
+        )
+
+        self.embedding_client.embeddings.create.assert_not_called()
+        self.mock_collection.data.insert_many.assert_called_once()
+        chunk = duplicate.chunks.get()
+        self.assertEqual(chunk.weaviate_vector_id, str(chunk.id))
+        self.assertEqual(EmbeddingCacheEntry.objects.get().hit_count, 1)
+
+    def test_body_edit_rechunks_incrementally(self):
+        entity = self.workspace.entities.create(
+            entity_type=self.candidate_type,
+            name="Rechunk Subject",
+        )
+        paragraphs = [
+            f"Paragraph {index} describes experience with system {index * 7} and team {index * 3}."
+            for index in range(200)
+        ]
+        self.embedding_client.embeddings.create.side_effect = lambda model, input, **_: SimpleNamespace(
+            data=[SimpleNamespace(embedding=[0.1, 0.2, 0.3]) for _ in input]
+        )
+        document = Document.objects.create(
+            entity=entity,
+            source="manual",
+            title="Long profile",
+            body="\n".join(paragraphs),
+            scrape_status=Document.ScrapeStatus.COMPLETED,
+        )
+        original = {chunk.text: chunk.id for chunk in document.chunks.all()}
+        self.assertGreater(len(original), 5)
+
+        self.embedding_client.embeddings.create.reset_mock()
+        paragraphs[100] = "Paragraph 100 was rewritten to mention a brand new certification."
+        document.body = "\n".join(paragraphs)
+        document.save()
+
+        chunks = list(document.chunks.all())
+        reused = [chunk for chunk in chunks if original.get(chunk.text) == chunk.id]
+        self.assertGreaterEqual(len(reused), len(chunks) - 3)
+        self.assertEqual([chunk.chunk_index for chunk in chunks], list(range(len(chunks))))
+        self.assertTrue(any("brand new certification" in chunk.text for chunk in chunks))
+        embedded_inputs = sum(
+            len(call.kwargs["input"]) for call in self.embedding_client.embeddings.create.call_args_list
+        )
+        self.assertLessEqual(embedded_inputs, 3)
+
+    def test_streaming_chunking_matches_in_memory_split(self):
+        entity = self.workspace.entities.create(
+            entity_type=self.candidate_type,
+            name="Streaming Subject",
+        )
+        body = "\n".join(
+            f"Line {index}: shipped feature {index * 11} for customer {index % 17}."
+            for index in range(400)
+        )
+        self.embedding_client.embeddings.create.side_effect = lambda model, input, **_: SimpleNamespace(
+            data=[SimpleNamespace(embedding=[0.1, 0.2, 0.3]) for _ in input]
+        )
+
+        with patch.dict(
+            os.environ,
+            {"DOCUMENT_BODY_READ_SIZE": "97", "DOCUMENT_CHUNK_WRITE_BATCH": "2"},
+        ):
+            document = Document.objects.create(
+                entity=entity,
+                source="manual",
+                title="Streamed",
+                body=body,
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+
+        expected = [text for text, _, _ in _split_text(body, *_chunking_config())]
+        self.assertGreater(len(expected), 2)
+        self.assertEqual([chunk.text for chunk in document.chunks.all()], expected)
+        # One embedding job per write batch.
+        self.assertEqual(
+            self.mock_collection.data.insert_many.call_count,
+            (len(expected) + 1) // 2,
+        )
 
     def test_admin_sync_chunks_action_skips_up_to_date(self):
         entity = self.workspace.entities.create(
@@ -311,6 +643,579 @@ class CoreCrudFlowTests(APITestCase):
         mock_delay.assert_called_once_with(str(stale_chunk.id))
         chunk_admin.message_user.assert_called_once()
 
+    def test_document_admin_rescrape_bypasses_scrape_cache(self):
+        entity = self.workspace.entities.create(entity_type=self.candidate_type, name="Rescrape")
+        scraped = Document.objects.create(entity=entity, source="https://jobs.example.com/2", title="Scraped")
+        manual = Document.objects.create(entity=entity, title="Manual", body="Typed in by hand")
+
+        document_admin = DocumentAdmin(Document, AdminSite())
+        document_admin.message_user = MagicMock()
+        with patch("core.admin.scrape_document_task.delay") as mock_delay:
+            document_admin.rescrape_sources(
+                RequestFactory().post("/admin/core/document/"),
+                Document.objects.filter(id__in=[scraped.id, manual.id]),
+            )
+
+        mock_delay.assert_called_once_with(str(scraped.id), force=True)
+        document_admin.message_user.assert_called_once()
+
+    def test_reindex_command_queues_stale_chunks_and_resumes_from_checkpoint(self):
+        entity = self.workspace.entities.create(
+            entity_type=self.candidate_type,
+            name="Reindex",
+        )
+        chunks = []
+        for index in range(3):
+            document = Document.objects.create(
+                entity=entity,
+                source="manual",
+                title=f"Reindex {index}",
+                body=f"Reindex chunk text {index}",
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+            chunks.append(document.chunks.get())
+        chunks.sort(key=lambda chunk: str(chunk.id))
+        stale_ids = [str(chunks[0].id), str(chunks[2].id)]
+        DocumentChunk.objects.filter(id__in=stale_ids).update(metadata={})
+
+        with patch("core.tasks.embed_document_chunks_task.delay") as mock_delay:
+            # Simulate a run that was interrupted after its first page.
+            checkpoint = ReindexCheckpoint.objects.create(name="model-upgrade", total_estimate=3)
+            self.assertEqual(reindex_chunk_page(checkpoint, page_size=1), (1, 1))
+
+            output = StringIO()
+            call_command("reindex_chunks", "--name", "model-upgrade", "--page-size", "1", stdout=output)
+
+        queued = [call.args[0] for call in mock_delay.call_args_list]
+        self.assertEqual(queued, [[stale_ids[0]], [stale_ids[1]]])
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.status, ReindexCheckpoint.Status.COMPLETED)
+        self.assertEqual((checkpoint.scanned_count, checkpoint.queued_count), (3, 2))
+        self.assertIn("Resuming", output.getvalue())
+        self.assertIn("ETA", output.getvalue())
+
+        # Background runs carry the page size and rate to every page of the chain.
+        with patch("core.tasks.reindex_chunks_task.apply_async") as mock_next, patch(
+            "core.tasks.embed_document_chunks_task.delay"
+        ):
+            call_command(
+                "reindex_chunks",
+                "--name",
+                "model-upgrade",
+                "--restart",
+                "--background",
+                "--page-size",
+                "2",
+                "--rate",
+                "60",
+                stdout=StringIO(),
+            )
+            self.assertEqual(mock_next.call_args.args[1], {"page_size": 2, "per_minute": 60.0})
+            reindex_chunks_task("model-upgrade", 2, 60.0)
+        self.assertEqual(mock_next.call_args.args[0], ("model-upgrade", 2, 60.0))
+        self.assertAlmostEqual(mock_next.call_args.kwargs["countdown"], 1.0)
+
+    def test_reconcile_vectors_reports_and_repairs_drift(self):
+        entity = self.workspace.entities.create(
+            entity_type=self.candidate_type,
+            name="Reconcile",
+        )
+        chunks = []
+        for index in range(3):
+            document = Document.objects.create(
+                entity=entity,
+                source="manual",
+                title=f"Reconcile {index}",
+                body=f"Reconcile chunk text {index}",
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+            chunks.append(document.chunks.get())
+        synced, missing, stale = chunks
+        orphan_id = "ffffffff-ffff-4fff-8fff-ffffffffffff"
+
+        def weaviate_object(uuid, metadata):
+            return SimpleNamespace(uuid=uuid, properties={"metadata_json": json.dumps(metadata)})
+
+        objects = [
+            weaviate_object(synced.weaviate_vector_id, synced.metadata),
+            weaviate_object(stale.weaviate_vector_id, {**stale.metadata, "text_checksum": "outdated"}),
+            weaviate_object(orphan_id, {}),
+        ]
+        self.mock_collection.iterator.side_effect = lambda **_: iter(sorted(objects, key=lambda obj: obj.uuid))
+
+        with patch("core.tasks.embed_document_chunks_task.delay") as mock_embed, patch(
+            "core.tasks.delete_chunk_vectors_task.delay"
+        ) as mock_delete:
+            output = StringIO()
+            call_command("reconcile_vectors", stdout=output)
+            mock_embed.assert_not_called()
+            mock_delete.assert_not_called()
+            self.assertIn("rerun with --fix", output.getvalue())
+
+            report = reconcile_vectors_task(fix=True, batch_size=2)
+
+        self.assertEqual((report["missing"], report["orphaned"], report["stale"]), (1, 1, 1))
+        self.assertEqual(report["samples"]["orphaned"], [orphan_id])
+        reembedded = [chunk_id for call in mock_embed.call_args_list for chunk_id in call.args[0]]
+        self.assertCountEqual(reembedded, [str(missing.id), str(stale.id)])
+        mock_delete.assert_called_once_with([orphan_id])
+
+    def test_rolled_back_chunk_deletions_are_not_enqueued(self):
+        entity = self.workspace.entities.create(entity_type=self.job_type, name="Rollback")
+        chunks = []
+        for index in range(2):
+            document = Document.objects.create(
+                entity=entity,
+                source="manual",
+                title=f"Rollback {index}",
+                body=f"Rollback chunk text {index}",
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+            chunks.append(document.chunks.get())
+        kept, deleted = chunks
+
+        with patch("core.signals.delete_chunk_vectors_task.delay") as mock_delete:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    DocumentChunk.objects.get(id=kept.id).delete()
+                    raise RuntimeError("abort")
+            self.assertTrue(DocumentChunk.objects.filter(id=kept.id).exists())
+
+            with transaction.atomic():
+                DocumentChunk.objects.get(id=deleted.id).delete()
+                mock_delete.assert_not_called()
+
+        mock_delete.assert_called_once_with([deleted.weaviate_vector_id])
+
+    def test_target_search_groups_by_entity_with_per_entity_fallback(self):
+        chunks = {}
+        for name in ("Grouped", "Fallback"):
+            entity = self.workspace.entities.create(entity_type=self.job_type, name=name)
+            Document.objects.create(
+                entity=entity,
+                source="manual",
+                title=name,
+                body=f"{name} chunk text",
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+            chunks[name] = DocumentChunk.objects.get(document__entity=entity)
+        grouped_chunk, fallback_chunk = chunks["Grouped"], chunks["Fallback"]
+
+        def weaviate_object(chunk, distance):
+            return SimpleNamespace(
+                uuid=chunk.weaviate_vector_id,
+                properties={},
+                metadata=SimpleNamespace(distance=distance),
+                belongs_to_group=str(chunk.document.entity_id),
+            )
+
+        def near_vector(*, near_vector, limit, filters, group_by=None, return_properties=None, return_metadata=None):
+            if group_by is not None:
+                # The grouped query only surfaced the first entity.
+                self.assertEqual(sorted(filters.value), sorted(str(chunk.document.entity_id) for chunk in chunks.values()))
+                obj = weaviate_object(grouped_chunk, 0.1)
+                return SimpleNamespace(objects=[obj], groups={obj.belongs_to_group: SimpleNamespace(objects=[obj])})
+            self.assertEqual(filters.value, str(fallback_chunk.document.entity_id))
+            return SimpleNamespace(objects=[weaviate_object(fallback_chunk, 0.3)])
+
+        weaviate_client = MagicMock()
+        weaviate_client.collections.get.return_value.query.near_vector.side_effect = near_vector
+        embedder = MagicMock()
+        embedder.embed.return_value = [0.1, 0.2, 0.3]
+        searcher = WeaviateVectorSearcher(embedder=embedder, client=weaviate_client)
+        plan = SearchPlan(
+            criteria=[
+                SearchCriterion(id="fit", label="Fit", prompt="Check fit", target_snippet_limit=1),
+                SearchCriterion(id="skills", label="Skills", prompt="Check skills", target_snippet_limit=1),
+            ]
+        )
+
+        summaries = collect_target_matches(
+            plan=plan,
+            searcher=searcher,
+            workspace_id=str(self.workspace.id),
+            targets=[grouped_chunk.document.entity, fallback_chunk.document.entity],
+        )
+
+        calls = weaviate_client.collections.get.return_value.query.near_vector.call_args_list
+        self.assertEqual(sum(1 for call in calls if call.kwargs.get("group_by") is not None), 2)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual([summary.target.name for summary in summaries], ["Grouped", "Fallback"])
+        for summary, chunk in zip(summaries, (grouped_chunk, fallback_chunk)):
+            self.assertEqual([hit.criterion.id for hit in summary.hits], ["fit", "skills"])
+            self.assertEqual({hit.chunk.id for hit in summary.hits}, {chunk.id})
+
+    def test_grouped_search_researches_entities_with_short_groups(self):
+        chunks = {}
+        for name in ("Dense", "Sparse"):
+            entity = self.workspace.entities.create(entity_type=self.job_type, name=name)
+            for index in range(2):
+                Document.objects.create(
+                    entity=entity,
+                    source="manual",
+                    title=f"{name} {index}",
+                    body=f"{name} chunk text {index}",
+                    scrape_status=Document.ScrapeStatus.COMPLETED,
+                )
+            chunks[name] = list(DocumentChunk.objects.filter(document__entity=entity).order_by("document__title"))
+        dense_id = str(chunks["Dense"][0].document.entity_id)
+        sparse_id = str(chunks["Sparse"][0].document.entity_id)
+
+        def weaviate_object(chunk, distance):
+            return SimpleNamespace(
+                uuid=chunk.weaviate_vector_id,
+                properties={},
+                metadata=SimpleNamespace(distance=distance),
+                belongs_to_group=str(chunk.document.entity_id),
+            )
+
+        def near_vector(*, near_vector, limit, filters, group_by=None, return_properties=None, return_metadata=None):
+            if group_by is not None:
+                # The nearest objects overall hold both dense chunks but only one sparse chunk.
+                objects = [
+                    weaviate_object(chunks["Dense"][0], 0.1),
+                    weaviate_object(chunks["Dense"][1], 0.2),
+                    weaviate_object(chunks["Sparse"][0], 0.3),
+                ]
+                return SimpleNamespace(
+                    objects=objects,
+                    groups={dense_id: SimpleNamespace(objects=objects[:2]), sparse_id: SimpleNamespace(objects=objects[2:])},
+                )
+            self.assertEqual(filters.value, sparse_id)
+            return SimpleNamespace(
+                objects=[weaviate_object(chunks["Sparse"][0], 0.3), weaviate_object(chunks["Sparse"][1], 0.4)]
+            )
+
+        weaviate_client = MagicMock()
+        query = weaviate_client.collections.get.return_value.query
+        query.near_vector.side_effect = near_vector
+        embedder = MagicMock()
+        embedder.embed.return_value = [0.1, 0.2, 0.3]
+        searcher = WeaviateVectorSearcher(embedder=embedder, client=weaviate_client)
+
+        grouped = searcher.search_grouped(
+            workspace_id=str(self.workspace.id),
+            query="fit",
+            entity_ids=[dense_id, sparse_id],
+            limit=2,
+        )
+
+        self.assertEqual(query.near_vector.call_count, 2)
+        self.assertEqual([hit.chunk.id for hit in grouped[dense_id]], [chunk.id for chunk in chunks["Dense"]])
+        self.assertEqual([hit.chunk.id for hit in grouped[sparse_id]], [chunk.id for chunk in chunks["Sparse"]])
+
+    def test_search_hits_resolve_from_job_chunk_map(self):
+        chunks = {}
+        for name in ("Preloaded", "Late"):
+            entity = self.workspace.entities.create(entity_type=self.job_type, name=name)
+            Document.objects.create(
+                entity=entity,
+                source="manual",
+                title=name,
+                body=f"{name} chunk text",
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+            chunks[name] = DocumentChunk.objects.get(document__entity=entity)
+        preloaded, late = chunks["Preloaded"], chunks["Late"]
+        chunk_map = ChunkIdentityMap.from_bundles([EntityDocumentBundle.from_entity(preloaded.document.entity)])
+
+        objects = [
+            SimpleNamespace(uuid=preloaded.weaviate_vector_id, properties={}, metadata=None),
+            SimpleNamespace(uuid=late.weaviate_vector_id, properties={}, metadata=None),
+            # A stale vector at a live chunk's position is not attached to that chunk.
+            SimpleNamespace(
+                uuid="00000000-0000-4000-8000-000000000001",
+                properties={"document_id": str(late.document_id), "chunk_index": 0},
+                metadata=None,
+            ),
+        ]
+        weaviate_client = MagicMock()
+        weaviate_client.collections.get.return_value.query.near_vector.return_value = SimpleNamespace(objects=objects)
+        embedder = MagicMock()
+        embedder.embed.return_value = [0.1, 0.2, 0.3]
+        searcher = WeaviateVectorSearcher(embedder=embedder, client=weaviate_client)
+        searcher.bind_chunk_map(chunk_map)
+
+        with self.assertNumQueries(1):
+            hits = searcher.search(workspace_id=str(self.workspace.id), query="fit")
+        self.assertEqual([hit.chunk.id for hit in hits], [preloaded.id, late.id])
+
+        # Resolved and orphaned ids are both remembered for the rest of the job.
+        with self.assertNumQueries(0):
+            hits = searcher.search(workspace_id=str(self.workspace.id), query="fit")
+        self.assertEqual([hit.chunk.id for hit in hits], [preloaded.id, late.id])
+        self.assertEqual(searcher.metrics()["chunk_map"], {"preloaded": 2, "fallback_queries": 1})
+
+    @override_settings(EMBEDDING_DIMENSIONS=3)
+    def test_local_backend_indexes_chunks_while_weaviate_is_down(self):
+        entity = self.workspace.entities.create(entity_type=self.job_type, name="Offline")
+        Document.objects.create(
+            entity=entity,
+            source="manual",
+            title="Offline",
+            body="Offline chunk text",
+            scrape_status=Document.ScrapeStatus.COMPLETED,
+        )
+        chunk = DocumentChunk.objects.get(document__entity=entity)
+        DocumentChunk.objects.filter(id=chunk.id).update(metadata={}, weaviate_vector_id="")
+        self.mock_collection.data.insert_many.side_effect = WeaviateBaseError("down")
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir, ignore_errors=True)
+        self.addCleanup(reset_local_vector_indexes)
+
+        with self.assertRaises(Retry):
+            embed_document_chunks_task.apply(args=([str(chunk.id)],))
+
+        chunk.refresh_from_db()
+        self.assertEqual(chunk.weaviate_vector_id, "")
+        self.assertEqual(chunk.metadata["text_checksum"], calculate_text_checksum(chunk.text))
+        with override_settings(LOCAL_VECTOR_INDEX_DIR=index_dir):
+            index = get_local_vector_index(str(self.workspace.id), model=EMBEDDING_MODEL_NAME, dimensions=3)
+        self.assertEqual(list(index.chunk_ids), [str(chunk.id)])
+
+    def test_local_vector_searcher_filters_by_entity_and_reloads_from_disk(self):
+        chunks = []
+        for name, vector in (("North", [1.0, 0.0, 0.0]), ("East", [0.0, 2.0, 0.0])):
+            entity = self.workspace.entities.create(entity_type=self.job_type, name=name)
+            Document.objects.create(
+                entity=entity,
+                source="manual",
+                title=name,
+                body=f"{name} chunk text",
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+            chunk = DocumentChunk.objects.get(document__entity=entity)
+            EmbeddingCacheEntry.objects.create(
+                text_checksum=chunk.metadata["text_checksum"],
+                model="test-embedding",
+                dimensions=3,
+                vector=pack_vector(vector),
+            )
+            chunks.append(chunk)
+        north, east = chunks
+        embedder = MagicMock()
+        embedder.embed.return_value = [0.9, 0.1, 0.0]
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir, ignore_errors=True)
+        self.addCleanup(reset_local_vector_indexes)
+
+        with override_settings(LOCAL_VECTOR_INDEX_DIR=index_dir):
+            searcher = LocalVectorSearcher(embedder=embedder, model="test-embedding", dimensions=3)
+            hits = searcher.search(workspace_id=str(self.workspace.id), query="fit")
+            self.assertEqual([hit.chunk.id for hit in hits], [north.id, east.id])
+            self.assertLess(hits[0].score, hits[1].score)
+
+            hits = searcher.search(
+                workspace_id=str(self.workspace.id),
+                query="fit",
+                filters={"entity_id": str(east.document.entity_id)},
+            )
+            self.assertEqual([hit.chunk.id for hit in hits], [east.id])
+            self.assertAlmostEqual(hits[0].score, 1 - 0.1 / (0.82 ** 0.5), places=5)
+
+            # A fresh process reloads the saved file after one fingerprint query.
+            reset_local_vector_indexes()
+            with self.assertNumQueries(1):
+                index = get_local_vector_index(str(self.workspace.id), model="test-embedding", dimensions=3)
+            self.assertEqual(len(index), 2)
+
+            # Writing a chunk invalidates the saved index.
+            north.text = "North rewritten"
+            north.save()
+            with self.assertNumQueries(5):
+                get_local_vector_index(str(self.workspace.id), model="test-embedding", dimensions=3)
+
+    @override_settings(EMBEDDING_DIMENSIONS=3)
+    def test_local_backend_vectors_survive_pruning_and_missing_ones_are_reembedded(self):
+        self.workspace.settings = {"vector_backend": "local"}
+        self.workspace.save()
+        chunks = []
+        for name in ("Kept", "Evicted"):
+            entity = self.workspace.entities.create(entity_type=self.job_type, name=name)
+            Document.objects.create(
+                entity=entity,
+                source="manual",
+                title=name,
+                body=f"{name} chunk text",
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+            chunks.append(DocumentChunk.objects.get(document__entity=entity))
+        kept, evicted = chunks
+        EmbeddingCacheEntry.objects.all().delete()
+        EmbeddingCacheEntry.objects.create(
+            text_checksum=kept.metadata["text_checksum"],
+            model="text-embedding-3-small",
+            dimensions=3,
+            vector=pack_vector([1.0, 0.0, 0.0]),
+            last_used_at=timezone.now() - timedelta(days=365),
+        )
+        EmbeddingCacheEntry.objects.create(
+            text_checksum="unreferenced",
+            model="text-embedding-3-small",
+            dimensions=3,
+            vector=pack_vector([0.0, 1.0, 0.0]),
+            last_used_at=timezone.now() - timedelta(days=365),
+        )
+
+        self.assertEqual(prune_embedding_cache_task(), 1)
+        self.assertTrue(EmbeddingCacheEntry.objects.filter(text_checksum=kept.metadata["text_checksum"]).exists())
+
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir, ignore_errors=True)
+        self.addCleanup(reset_local_vector_indexes)
+        with override_settings(LOCAL_VECTOR_INDEX_DIR=index_dir), patch(
+            "matching.local_index.embed_document_chunks_task.delay"
+        ) as mock_embed:
+            index = get_local_vector_index(str(self.workspace.id), model="text-embedding-3-small", dimensions=3)
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(list(index.missing_chunk_ids), [str(evicted.id)])
+        mock_embed.assert_called_once_with([str(evicted.id)])
+        entry = EmbeddingCacheEntry.objects.get(text_checksum=kept.metadata["text_checksum"])
+        self.assertGreater(entry.last_used_at, timezone.now() - timedelta(days=1))
+
+    def test_small_targets_are_scored_locally_and_the_rest_remotely(self):
+        bundles = {}
+        for name, extra_chunks in (("Small", 0), ("Uncached", 0), ("Large", 1)):
+            entity = self.workspace.entities.create(entity_type=self.job_type, name=name)
+            document = Document.objects.create(
+                entity=entity,
+                source="manual",
+                title=name,
+                body=f"{name} chunk text",
+                scrape_status=Document.ScrapeStatus.COMPLETED,
+            )
+            for index in range(extra_chunks):
+                DocumentChunk.objects.create(document=document, chunk_index=index + 1, text=f"{name} extra {index}")
+            bundles[name] = EntityDocumentBundle.from_entity(entity)
+        small_chunk = bundles["Small"].chunks[0]
+        EmbeddingCacheEntry.objects.create(
+            text_checksum=calculate_text_checksum(small_chunk.text),
+            model="text-embedding-3-small",
+            dimensions=3,
+            vector=pack_vector([1.0, 0.0, 0.0]),
+        )
+        plan = SearchPlan(
+            criteria=[
+                SearchCriterion(id="fit", label="Fit", prompt="Check fit", target_snippet_limit=2),
+                SearchCriterion(id="skills", label="Skills", prompt="Check skills"),
+            ]
+        )
+        searcher = MagicMock()
+        searcher.query_vectors.return_value = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+        searcher.search_grouped.return_value = {}
+
+        with self.assertNumQueries(1):
+            scorer = build_local_scorer(plan=plan, searcher=searcher, bundles=list(bundles.values()), max_chunks=1)
+        self.assertEqual(scorer.entity_count, 1)
+
+        summaries = collect_target_matches(
+            plan=plan,
+            searcher=searcher,
+            workspace_id=str(self.workspace.id),
+            targets=[bundle.entity for bundle in bundles.values()],
+            local_scorer=scorer,
+        )
+
+        remote_ids = [str(bundles[name].entity.id) for name in ("Uncached", "Large")]
+        self.assertEqual(
+            [call.kwargs["entity_ids"] for call in searcher.search_grouped.call_args_list],
+            [remote_ids, remote_ids],
+        )
+        small_hits = summaries[0].hits
+        self.assertEqual([(hit.criterion.id, hit.chunk.id) for hit in small_hits], [("fit", small_chunk.id), ("skills", small_chunk.id)])
+        self.assertAlmostEqual(small_hits[0].score, 0.0, places=6)
+        self.assertAlmostEqual(small_hits[1].score, 1.0, places=6)
+        self.assertIsNone(build_local_scorer(plan=plan, searcher=searcher, bundles=list(bundles.values()), max_chunks=0))
+
+    def test_search_hits_are_confirmed_against_live_chunks(self):
+        entity = self.workspace.entities.create(entity_type=self.job_type, name="Payload")
+        Document.objects.create(
+            entity=entity,
+            source="manual",
+            title="Payload",
+            body="Payload chunk text",
+            scrape_status=Document.ScrapeStatus.COMPLETED,
+        )
+        chunk = DocumentChunk.objects.get(document__entity=entity)
+        properties = {
+            "text": "Stored on the vector",
+            "document_id": str(chunk.document_id),
+            "entity_id": str(entity.id),
+            "chunk_index": 0,
+        }
+        weaviate_client = MagicMock()
+        weaviate_client.collections.get.return_value.query.near_vector.return_value = SimpleNamespace(
+            objects=[SimpleNamespace(uuid=chunk.weaviate_vector_id, properties=properties, metadata=None)]
+        )
+        embedder = MagicMock()
+        embedder.embed.return_value = [0.1, 0.2, 0.3]
+        searcher = WeaviateVectorSearcher(embedder=embedder, client=weaviate_client)
+
+        # The hit is built from the stored properties; the row is loaded only on request.
+        with self.assertNumQueries(0):
+            (hit,) = searcher.search(workspace_id=str(self.workspace.id), query="fit")
+        self.assertIsInstance(hit.chunk, ChunkPayload)
+        self.assertIsNone(hit.chunk.id)
+        self.assertEqual(hit.chunk.text, "Stored on the vector")
+        self.assertEqual((hit.chunk.document_id, hit.chunk.chunk_index), (str(chunk.document_id), 0))
+        self.assertEqual(
+            weaviate_client.collections.get.return_value.query.near_vector.call_args.kwargs["return_properties"],
+            WeaviateVectorSearcher.return_properties,
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(hit.chunk.to_model(), chunk)
+        self.assertEqual(hit.chunk.id, chunk.id)
+
+        # A bound chunk map confirms the object by id from memory.
+        searcher.bind_chunk_map(ChunkIdentityMap([chunk]))
+        with self.assertNumQueries(0):
+            (hit,) = searcher.search(workspace_id=str(self.workspace.id), query="fit")
+        self.assertEqual(hit.chunk.id, chunk.id)
+        self.assertEqual(hit.chunk.text, "Stored on the vector")
+
+        # Ids the job map does not know are dropped without a query.
+        searcher.bind_chunk_map(ChunkIdentityMap())
+        with self.assertNumQueries(0):
+            self.assertEqual(searcher.search(workspace_id=str(self.workspace.id), query="fit"), [])
+
+    def test_pre_ranking_records_ranking_hints_for_pruned_targets(self):
+        source_entity = Entity.objects.create(workspace=self.workspace, entity_type=self.candidate_type, name="Source")
+        template = MatchingTemplate.objects.create(
+            workspace=self.workspace,
+            name="Pre-ranked",
+            description="",
+            source_entity_type=self.candidate_type,
+            target_entity_type=self.job_type,
+            config={"search_criteria": [{"label": "Fit", "prompt": "Check fit"}], "pre_ranking": {"top_n": 1}},
+        )
+        job = MatchingJob.objects.create(workspace=self.workspace, template=template, source_entity=source_entity)
+        targets = [
+            Entity.objects.create(workspace=self.workspace, entity_type=self.job_type, name=name)
+            for name in ("Close", "Far")
+        ]
+        for target in targets:
+            MatchingJobTarget.objects.create(matching_job=job, entity=target)
+
+        criterion = SearchCriterion(id="fit", label="Fit", prompt="Check fit")
+        plan = SearchPlan(criteria=[criterion])
+        summaries = [
+            TargetSearchSummary(target=target, hits=[CriterionHit(criterion=criterion, chunk=None, score=distance)])
+            for target, distance in zip(targets, (0.25, 0.75))
+        ]
+        config = MatchingJobContext.load(job).matching_config.pre_ranking
+        ranked = pre_rank_targets(plan, summaries, config)
+        recorder = MatchingJobAuditRecorder.start(job=job, plan=plan, matching_config_snapshot={})
+        recorder.record_pre_ranking(ranked=ranked, config=config)
+
+        hints = dict(job.targets.values_list("entity__name", "ranking_hint"))
+        self.assertEqual(hints, {"Close": 0.75, "Far": 0.25})
+        recorder.run.refresh_from_db()
+        self.assertEqual(
+            recorder.run.metadata["pre_ranking"],
+            {"top_n": 1, "min_score": None, "evaluated": 1, "pruned": 1},
+        )
+
     def test_job_updates_endpoint_returns_persisted_events(self):
         source_entity = Entity.objects.create(
             workspace=self.workspace,
@@ -343,3 +1248,528 @@ class CoreCrudFlowTests(APITestCase):
         self.assertEqual(payload["id"], str(update.id))
         self.assertEqual(payload["event_type"], "matching.job.status")
         self.assertEqual(payload["payload"].get("status"), "queued")
+
+
+class AIClientRegistryTests(SimpleTestCase):
+    def setUp(self):
+        ai_clients.reset_clients()
+        self.addCleanup(ai_clients.reset_clients)
+
+    @patch.dict(os.environ, {"WEAVIATE_ENDPOINT": "example.weaviate.network", "WEAVIATE_HEALTHCHECK_INTERVAL": "0"})
+    def test_weaviate_client_is_reused_and_reconnected_when_unhealthy(self):
+        first, second = MagicMock(), MagicMock()
+        first.is_connected.return_value = True
+        first.is_ready.return_value = True
+
+        with patch("core.ai_clients.weaviate.connect_to_wcs", side_effect=[first, second]) as connect:
+            self.assertIs(ai_clients.get_weaviate_client(), first)
+            self.assertIs(ai_clients.get_weaviate_client(), first)
+            self.assertEqual(connect.call_count, 1)
+
+            first.is_ready.return_value = False
+            self.assertIs(ai_clients.get_weaviate_client(), second)
+            self.assertEqual(connect.call_count, 2)
+            first.close.assert_called_once()
+
+        ai_clients.close_clients()
+        second.close.assert_called_once()
+
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"})
+    def test_openai_client_is_shared(self):
+        self.assertIs(ai_clients.get_embedding_client(), ai_clients.get_llm_client())
+
+
+class VectorSchemaManagerTests(SimpleTestCase):
+    def _manager(self):
+        return VectorSchemaManager(name="DocumentChunk", description="test", properties=DOCUMENT_CHUNK_PROPERTIES)
+
+    def test_schema_is_checked_once_and_missing_properties_are_added(self):
+        manager = self._manager()
+        client = MagicMock()
+        client.collections.exists.return_value = True
+        collection = client.collections.get.return_value
+        collection.config.get.return_value = SimpleNamespace(
+            properties=[SimpleNamespace(name=name) for name in ("text", "document_id", "entity_id", "chunk_index")]
+        )
+
+        manager.ensure(client)
+        manager.ensure(client)
+
+        client.collections.exists.assert_called_once_with("DocumentChunk")
+        client.collections.create.assert_not_called()
+        collection.config.add_property.assert_called_once()
+        self.assertEqual(collection.config.add_property.call_args.args[0].name, "metadata_json")
+
+    def test_missing_collection_error_triggers_recheck(self):
+        manager = self._manager()
+        client = MagicMock()
+        client.collections.exists.return_value = False
+
+        manager.ensure(client)
+        client.collections.create.assert_called_once()
+
+        manager.handle_error(Exception("could not find class DocumentChunk in schema"))
+        manager.ensure(client)
+        self.assertEqual(client.collections.create.call_count, 2)
+
+
+class OpenAIRateLimiterTests(SimpleTestCase):
+    def test_disabled_limiter_never_touches_redis(self):
+        redis_client = MagicMock()
+        limiter = OpenAIRateLimiter(redis_client=redis_client)
+
+        self.assertEqual(limiter.try_acquire(tokens=10_000), 0)
+        redis_client.register_script.assert_not_called()
+
+    def test_limiter_fails_open_when_redis_is_unavailable(self):
+        redis_client = MagicMock()
+        redis_client.register_script.return_value.side_effect = redis.ConnectionError("down")
+        limiter = OpenAIRateLimiter(requests_per_minute=60, redis_client=redis_client)
+
+        self.assertEqual(limiter.try_acquire(tokens=10), 0)
+
+    @override_settings(REDIS_URL=None)
+    def test_limiter_fails_open_without_redis_url(self):
+        limiter = OpenAIRateLimiter(requests_per_minute=60)
+
+        self.assertEqual(limiter.try_acquire(tokens=10), 0)
+
+    def test_bulk_requests_leave_reserve_for_interactive_work(self):
+        redis_client = MagicMock()
+        script = redis_client.register_script.return_value
+        script.return_value = 0
+        limiter = OpenAIRateLimiter(
+            requests_per_minute=100,
+            tokens_per_minute=1000,
+            workspace_share=0.5,
+            bulk_reserve=0.25,
+            redis_client=redis_client,
+        )
+
+        limiter.try_acquire(tokens=40, workspace_id="ws-1", priority=PRIORITY_BULK)
+        keys = script.call_args.kwargs["keys"]
+        args = script.call_args.kwargs["args"]
+        self.assertEqual(
+            keys,
+            [
+                "openai-ratelimit:global:requests",
+                "openai-ratelimit:workspace:ws-1:requests",
+                "openai-ratelimit:global:tokens",
+                "openai-ratelimit:workspace:ws-1:tokens",
+            ],
+        )
+        # capacity, refill/ms, cost, floor per bucket
+        self.assertEqual(args[0::4], [100, 50, 1000, 500])
+        self.assertEqual(args[2::4], [1, 1, 40, 40])
+        self.assertEqual(args[3::4], [25, 0, 250, 0])
+
+        limiter.try_acquire(tokens=40, workspace_id="ws-1", priority=PRIORITY_INTERACTIVE)
+        self.assertEqual(script.call_args.kwargs["args"][3::4], [0, 0, 0, 0])
+
+
+class _StaticSiteHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        body = f"<html><body><h1>Page {self.path}</h1><p>Profile text for {self.path}</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakePage:
+    """Stand-in for a Playwright page that loads HTML from the local test server."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.url = "about:blank"
+        self.html = ""
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+        host = urlsplit(url).hostname
+        in_flight = self.browser.in_flight
+        in_flight[host] = in_flight.get(host, 0) + 1
+        self.browser.max_in_flight[host] = max(self.browser.max_in_flight.get(host, 0), in_flight[host])
+        try:
+            self.html = await asyncio.to_thread(lambda: urllib.request.urlopen(url).read().decode())
+            await asyncio.sleep(0.01)
+        finally:
+            in_flight[host] -= 1
+
+    async def evaluate(self, script, arg):
+        # The real script runs in the browser; the stand-in returns the whole document.
+        return {"html": self.html, "strategy": "document", "selector": None}
+
+    async def close(self):
+        pass
+
+
+class _FakeBrowser:
+    def __init__(self, in_flight, max_in_flight):
+        self.in_flight = in_flight
+        self.max_in_flight = max_in_flight
+        self.contexts_opened = 0
+        self.contexts_closed = 0
+
+    async def new_context(self):
+        browser = self
+        browser.contexts_opened += 1
+
+        class _Context:
+            async def new_page(self):
+                return _FakePage(browser)
+
+            async def close(self):
+                browser.contexts_closed += 1
+
+        return _Context()
+
+    def is_connected(self):
+        return True
+
+    async def close(self):
+        pass
+
+
+class BrowserPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _StaticSiteHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.browsers = []
+        self.in_flight, self.max_in_flight = {}, {}
+
+        async def connect(playwright):
+            browser = _FakeBrowser(self.in_flight, self.max_in_flight)
+            self.browsers.append(browser)
+            return browser
+
+        class _Playwright:
+            async def start(self):
+                return self
+
+            async def stop(self):
+                pass
+
+        self.pool = BrowserPool(connect=connect, size=3, per_domain_limit=2, playwright_factory=_Playwright)
+        self.addCleanup(self.pool.close)
+
+    @patch.dict(os.environ, {"LIGHTPANDA_API_KEY": "test"})
+    def test_fetch_many_markdown_reuses_sessions_and_limits_domains(self):
+        port = self.server.server_address[1]
+        urls = [f"http://{host}:{port}/p{index}" for host in ("127.0.0.1", "localhost") for index in range(8)]
+        missing = f"http://127.0.0.1:{port}/missing"
+
+        with patch("core.lightpanda.get_browser_pool", return_value=self.pool):
+            results = fetch_many_markdown(urls + [missing])
+
+        for url in urls:
+            self.assertIn(f"Profile text for {urlsplit(url).path}", results[url])
+        self.assertIsInstance(results[missing], LightpandaError)
+        self.assertLessEqual(len(self.browsers), 3)
+        self.assertLessEqual(max(self.max_in_flight.values()), 2)
+        # Every page ran in its own context, and every context was closed.
+        self.assertEqual(sum(browser.contexts_opened for browser in self.browsers), len(urls) + 1)
+        self.assertEqual(sum(browser.contexts_closed for browser in self.browsers), len(urls) + 1)
+
+    def test_hung_page_times_out_and_frees_its_domain_slot(self):
+        pool = BrowserPool(
+            connect=self.pool._connect,
+            size=1,
+            per_domain_limit=1,
+            page_timeout_ms=200,
+            playwright_factory=self.pool._playwright_factory,
+        )
+        self.addCleanup(pool.close)
+        url = f"http://127.0.0.1:{self.server.server_address[1]}/p1"
+
+        async def hang(page):
+            await asyncio.sleep(60)
+
+        async def read(page):
+            return page.html
+
+        with self.assertRaises(PlaywrightTimeoutError):
+            pool.fetch(url, hang)
+        self.assertIn("Profile text for /p1", pool.fetch(url, read))
+        # The connection behind the hung page was dropped rather than reused.
+        self.assertEqual(len(self.browsers), 2)
+
+    def test_main_content_is_extracted_with_one_evaluate_call(self):
+        page = MagicMock(url="https://example.com/job")
+        page.evaluate = AsyncMock(return_value={"html": "<p>Role</p>", "strategy": "selector", "selector": "article"})
+
+        html = asyncio.run(_extract_main_content(page))
+
+        self.assertEqual(html, "<p>Role</p>")
+        page.evaluate.assert_awaited_once()
+        self.assertIn("article", page.evaluate.call_args.args[1]["selectors"])
+
+
+class HtmlCleaningTests(SimpleTestCase):
+    def test_single_pass_cleaning_matches_legacy_pipeline_on_corpus(self):
+        corpus = load_corpus()
+        self.assertTrue(corpus)
+        for name, html in corpus.items():
+            with self.subTest(page=name):
+                markdown = html_to_markdown(html)
+                self.assertEqual(normalise_markdown(markdown), normalise_markdown(legacy_html_to_markdown(html)))
+                self.assertNotIn("Subscribe", markdown)
+                self.assertNotIn("dataLayer", markdown)
+
+    def test_main_content_classes_survive_attribute_pruning(self):
+        html = '<div class="main-content nav-anchor"><p>Keep me</p></div><div class="navbar"><p>Drop me</p></div>'
+        markdown = html_to_markdown(html)
+        self.assertIn("Keep me", markdown)
+        self.assertNotIn("Drop me", markdown)
+
+
+class _ServerRenderedSiteHandler(http.server.BaseHTTPRequestHandler):
+    ARTICLE = (
+        "<html><body><nav>Menu</nav><main><h1>Senior Engineer</h1>"
+        + "<p>We are hiring engineers to build matching infrastructure.</p>" * 20
+        + "</main></body></html>"
+    )
+    SHELL = '<html><body><noscript>Please enable JavaScript</noscript><div id="root"></div></body></html>'
+
+    def do_GET(self):
+        if self.path.startswith("/redirect"):
+            self.send_response(302)
+            self.send_header("Location", self.path.split("to=", 1)[1])
+            self.end_headers()
+            return
+        if self.path == "/shell":
+            body = self.SHELL
+        elif self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        else:
+            body = self.ARTICLE
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class StaticScrapeTests(SimpleTestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _ServerRenderedSiteHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.browser_fetch = MagicMock(return_value="# Rendered by browser")
+        # The test server is on loopback, which static fetches refuse by default.
+        env_patcher = patch.dict(os.environ, {"STATIC_FETCH_ALLOWED_HOSTS": "127.0.0.1"})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+    def test_server_rendered_page_skips_browser_and_revalidates(self):
+        result = scrape_markdown(f"{self.base_url}/job", browser_fetch=self.browser_fetch)
+
+        self.assertEqual(result.path, PATH_STATIC)
+        self.assertIn("Senior Engineer", result.markdown)
+        self.assertNotIn("Menu", result.markdown)
+        self.assertEqual(result.etag, '"v1"')
+        self.browser_fetch.assert_not_called()
+
+        again = scrape_markdown(
+            f"{self.base_url}/job",
+            browser_fetch=self.browser_fetch,
+            etag=result.etag,
+            previous_markdown=result.markdown,
+        )
+        self.assertEqual(again.path, PATH_NOT_MODIFIED)
+        self.assertEqual(again.markdown, result.markdown)
+        self.browser_fetch.assert_not_called()
+
+    def test_spa_shell_falls_back_to_browser(self):
+        result = scrape_markdown(f"{self.base_url}/shell", browser_fetch=self.browser_fetch)
+
+        self.assertEqual(result.path, PATH_BROWSER)
+        self.assertEqual(result.markdown, "# Rendered by browser")
+        self.browser_fetch.assert_called_once_with(f"{self.base_url}/shell")
+
+    def test_non_public_hosts_and_redirects_fall_back_to_browser(self):
+        port = self.server.server_address[1]
+        blocked = [
+            "http://169.254.169.254/latest/meta-data/",
+            f"http://localhost:{port}/job",
+            f"{self.base_url}/redirect?to=http://localhost:{port}/job",
+        ]
+        for url in blocked:
+            with self.subTest(url=url):
+                result = scrape_markdown(url, browser_fetch=self.browser_fetch)
+                self.assertEqual(result.path, PATH_BROWSER)
+
+        self.assertFalse(is_public_url("http://10.0.0.5/"))
+        self.assertFalse(is_public_url("file:///etc/passwd"))
+        with patch("core.services.scraping.socket.getaddrinfo", return_value=[(2, 1, 6, "", ("93.184.216.34", 80))]):
+            self.assertTrue(is_public_url("https://example.com/jobs"))
+
+
+    def test_bulk_static_fetches_run_concurrently_within_per_host_limits(self):
+        urls = [f"https://a.example/{index}" for index in range(4)] + ["https://b.example/0", "https://b.example/1"]
+        in_flight = Counter()
+        peaks = Counter()
+        lock = threading.Lock()
+
+        def slow_fetch(url):
+            host = urlsplit(url).hostname
+            with lock:
+                in_flight[host] += 1
+                in_flight["all"] += 1
+                peaks[host] = max(peaks[host], in_flight[host])
+                peaks["all"] = max(peaks["all"], in_flight["all"])
+            time.sleep(0.1)
+            with lock:
+                in_flight[host] -= 1
+                in_flight["all"] -= 1
+            if host == "b.example":
+                return None
+            return ScrapeResult(url=url, markdown=f"# {url}", path=PATH_STATIC)
+
+        browser_fetch_many = MagicMock(side_effect=lambda batch: {url: "# Rendered" for url in batch})
+        with patch("core.services.scraping.fetch_static", side_effect=slow_fetch):
+            results = scrape_many_markdown(urls, browser_fetch_many=browser_fetch_many)
+
+        self.assertLessEqual(peaks["a.example"], 2)
+        self.assertGreaterEqual(peaks["all"], 3)
+        self.assertEqual([results[url].path for url in urls], [PATH_STATIC] * 4 + [PATH_BROWSER] * 2)
+        browser_fetch_many.assert_called_once_with(["https://b.example/0", "https://b.example/1"])
+
+class _FakeRedis:
+    """Dict-backed stand-in for the few Redis commands the query cache uses."""
+
+    def __init__(self):
+        self.store = {}
+
+    def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def execute(self):
+        return []
+
+
+class ScrapeCacheLockTests(SimpleTestCase):
+    @override_settings(REDIS_URL=None)
+    def test_single_flight_fails_open_without_redis_url(self):
+        with patch("core.services.scrape_cache._redis_client", None):
+            with _single_flight("https://example.com/a"):
+                pass
+
+    @override_settings(REDIS_URL=None)
+    def test_single_flight_only_serialises_the_same_url(self):
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with _single_flight("https://example.com/slow"):
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        held.wait(5)
+
+        # A different URL does not wait for the slow fetch.
+        with _single_flight("https://example.com/other"):
+            pass
+        same_done = threading.Event()
+
+        def same():
+            with _single_flight("https://example.com/slow"):
+                same_done.set()
+
+        waiter = threading.Thread(target=same)
+        waiter.start()
+        self.assertFalse(same_done.wait(0.2))
+        release.set()
+        waiter.join(5)
+        self.assertTrue(same_done.is_set())
+
+
+class QueryEmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        self.client = MagicMock()
+        self.client.embeddings.create.side_effect = lambda model, input, **_: SimpleNamespace(
+            data=[SimpleNamespace(embedding=[float(len(text)), 1.0]) for text in input]
+        )
+
+    def _generator(self, cache):
+        return OpenAIEmbeddingGenerator(
+            self.client,
+            rate_limiter=OpenAIRateLimiter(),
+            cache=cache,
+        )
+
+    def test_prompts_are_embedded_once_per_plan_and_shared_through_redis(self):
+        cache = QueryEmbeddingCache(redis_client=self.redis)
+        embedder = self._generator(cache)
+        searcher = WeaviateVectorSearcher(embedder=embedder, client=MagicMock())
+
+        searcher.prepare_queries(["Check fit", "Check skills", "Check fit"])
+        for _ in range(3):
+            self.assertEqual(list(embedder.embed(text="Check fit")), [9.0, 1.0])
+            embedder.embed(text="Check skills")
+
+        self.client.embeddings.create.assert_called_once_with(
+            model="text-embedding-3-small",
+            input=["Check fit", "Check skills"],
+            dimensions=1536,
+        )
+        self.assertEqual(
+            searcher.metrics()["query_embeddings"],
+            {"local_hits": 6, "shared_hits": 0, "misses": 2, "api_requests": 1, "hit_rate": 0.75},
+        )
+
+        # Another process starts with a cold LRU but finds the vectors in Redis.
+        other = self._generator(QueryEmbeddingCache(redis_client=self.redis))
+        self.assertEqual(other.embed_many(texts=["Check skills", "Check fit"]), [[12.0, 1.0], [9.0, 1.0]])
+        self.assertEqual(self.client.embeddings.create.call_count, 1)
+        self.assertEqual(other.stats.shared_hits, 2)
+
+        # Vectors cached under another dimension setting are never served.
+        resized = OpenAIEmbeddingGenerator(
+            self.client,
+            dimensions=256,
+            rate_limiter=OpenAIRateLimiter(),
+            cache=QueryEmbeddingCache(redis_client=self.redis),
+        )
+        resized.embed(text="Check fit")
+        self.assertEqual(resized.stats.shared_hits, 0)
+        self.assertEqual(self.client.embeddings.create.call_args.kwargs["dimensions"], 256)
+
+    def test_redis_outage_falls_back_to_the_api(self):
+        broken = MagicMock()
+        broken.mget.side_effect = redis.ConnectionError("down")
+        broken.pipeline.side_effect = redis.ConnectionError("down")
+        embedder = self._generator(QueryEmbeddingCache(redis_client=broken, max_entries=0))
+
+        embedder.embed(text="Check fit")
+        embedder.embed(text="Check fit")
+
+        self.assertEqual(self.client.embeddings.create.call_count, 2)
+        self.assertEqual(embedder.stats.misses, 2)
@@ -2,7 +2,7 @@ import logging
 
 from django.db import transaction
 from django.http import JsonResponse
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
@@ -33,6 +33,7 @@ from .serializers import (
     MatchingTemplateSerializer,
     WorkspaceSerializer,
 )
+from .services.document_import import create_documents
 from .services.matching_jobs import populate_job_targets_from_config
 
 logger = logging.getLogger(__name__)
@@ -71,6 +72,16 @@ class DocumentViewSet(viewsets.ModelViewSet):
     queryset = Document.objects.select_related("entity").all().order_by("-created_at")
     serializer_class = DocumentSerializer
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Create many documents at once; scraping runs in batches after commit."""
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            documents = create_documents(serializer.validated_data)
+        return Response(self.get_serializer(documents, many=True).data, status=status.HTTP_201_CREATED)
+
 
 class DocumentChunkViewSet(viewsets.ModelViewSet):
     queryset = DocumentChunk.objects.select_related("document").all().order_by("chunk_index")
@@ -13,13 +13,16 @@ from core.models import (
     MatchingEvaluationLog,
     MatchingJob,
     MatchingJobRun,
+    MatchingJobTarget,
     MatchingSearchHitLog,
     MatchingSearchLog,
 )
 
+from .configuration import PreRankingConfig
 from .evaluation import TargetEvaluation
 from .interfaces import VectorSearchHit
 from .planning import SearchCriterion, SearchPlan
+from .pre_ranking import PreRankedTarget
 from .results import MatchCandidate
 from .search import TargetSearchSummary
 
@@ -94,7 +97,8 @@ class MatchingJobAuditRecorder:
                 MatchingSearchHitLog(
                     search=search_log,
                     rank=index,
-                    chunk=hit.chunk,
+                    # Payload hits only link the chunk when its id is known.
+                    chunk_id=hit.chunk.id,
                     chunk_text=hit.chunk.text,
                     score=hit.score,
                     metadata=hit.metadata or {},
@@ -109,8 +113,15 @@ class MatchingJobAuditRecorder:
         summary: TargetSearchSummary,
         evaluation: TargetEvaluation,
         hit_ratio: float,
+        pre_rank_score: float | None = None,
     ) -> None:
         hits_per_criterion = Counter(hit.criterion.id for hit in summary.hits)
+        metadata = {
+            "hits_per_criterion": dict(hits_per_criterion),
+            "total_hits": summary.hit_count(),
+        }
+        if pre_rank_score is not None:
+            metadata["pre_rank_score"] = pre_rank_score
         evaluation_log = MatchingEvaluationLog.objects.create(
             run=self.run,
             target_entity=summary.target,
@@ -120,10 +131,7 @@ class MatchingJobAuditRecorder:
             summary_reason="\n".join(
                 [item.reason for item in evaluation.evaluations if item.reason]
             ),
-            metadata={
-                "hits_per_criterion": dict(hits_per_criterion),
-                "total_hits": summary.hit_count(),
-            },
+            metadata=metadata,
         )
 
         if not evaluation.evaluations:
@@ -146,6 +154,38 @@ class MatchingJobAuditRecorder:
             ]
         )
 
+    def record_pre_ranking(self, *, ranked: Sequence[PreRankedTarget], config: PreRankingConfig) -> None:
+        """Store every target's first-stage score on `MatchingJobTarget.ranking_hint`.
+
+        Pruned targets get no evaluation log, so the hint (plus the run
+        metadata summary) is what explains why they were not evaluated.
+        """
+
+        scores = {str(item.summary.target.id): item.score for item in ranked}
+        job_targets = list(
+            MatchingJobTarget.objects.filter(matching_job_id=self.run.matching_job_id, entity_id__in=scores)
+        )
+        for job_target in job_targets:
+            job_target.ranking_hint = scores[str(job_target.entity_id)]
+        MatchingJobTarget.objects.bulk_update(job_targets, ["ranking_hint"], batch_size=500)
+        self.record_metrics(
+            {
+                "pre_ranking": {
+                    **config.to_dict(),
+                    "evaluated": sum(1 for item in ranked if item.selected),
+                    "pruned": sum(1 for item in ranked if not item.selected),
+                }
+            }
+        )
+
+    def record_metrics(self, metrics: dict) -> None:
+        """Merge runtime counters into the run metadata."""
+
+        if not metrics:
+            return
+        self.run.metadata = {**(self.run.metadata or {}), **metrics}
+        self.run.save(update_fields=["metadata", "updated_at"])
+
     def finalize_success(self, *, candidates: Sequence[MatchCandidate]) -> None:
         self.run.status = MatchingJobRun.Status.COMPLETE
         self.run.finished_at = timezone.now()
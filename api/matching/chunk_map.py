@@ -0,0 +1,86 @@
+"""Per-job identity map from vector ids to the chunks already loaded in memory.
+
+`MatchingJobContext` hydrates every chunk of the source and target entities,
+so vector search hits can almost always be resolved without touching the
+database. Objects are matched by id only (the chunk's ``weaviate_vector_id``
+or primary key), never by their document position: after a re-chunk a stale
+vector must not be attached to whichever new chunk now holds its index. Ids
+the map does not know are resolved together in one query per search, and ids
+that turn out to be orphaned are remembered so they are not looked up again.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Iterable, Sequence
+
+from django.db.models import Q
+
+from core.models import DocumentChunk
+
+
+class ChunkIdentityMap:
+    """Resolve vector search objects to `DocumentChunk` instances."""
+
+    def __init__(self, chunks: Iterable[DocumentChunk] = ()) -> None:
+        self._by_id: dict[str, DocumentChunk] = {}
+        self._chunk_ids: set[str] = set()
+        self._missing: set[str] = set()
+        # Searches may run concurrently against the same map.
+        self._lock = threading.Lock()
+        self.queries = 0
+        for chunk in chunks:
+            self._add(chunk)
+
+    @classmethod
+    def from_bundles(cls, bundles: Iterable) -> "ChunkIdentityMap":
+        """Build the map from `EntityDocumentBundle`s of a job context."""
+
+        return cls(chunk for bundle in bundles for chunk in bundle.chunks)
+
+    def __len__(self) -> int:
+        return len(self._chunk_ids)
+
+    def _add(self, chunk: DocumentChunk) -> None:
+        if chunk.weaviate_vector_id:
+            self._by_id[str(chunk.weaviate_vector_id)] = chunk
+        self._by_id[str(chunk.id)] = chunk
+        self._chunk_ids.add(str(chunk.id))
+
+    def peek(self, object_id: str) -> DocumentChunk | None:
+        """Return the chunk if it is already known, without querying."""
+
+        with self._lock:
+            return self._by_id.get(str(object_id))
+
+    def resolve(self, object_ids: Sequence[str]) -> dict[str, DocumentChunk]:
+        """Return chunks keyed by object id; unresolvable objects are omitted.
+
+        Unknown ids are fetched in a single query matching either the chunk's
+        vector id or its primary key.
+        """
+
+        with self._lock:
+            resolved: dict[str, DocumentChunk] = {}
+            unknown: list[str] = []
+            for object_id in map(str, object_ids):
+                chunk = self._by_id.get(object_id)
+                if chunk is not None:
+                    resolved[object_id] = chunk
+                elif object_id not in self._missing:
+                    unknown.append(object_id)
+
+            if unknown:
+                self.queries += 1
+                for chunk in DocumentChunk.objects.filter(Q(weaviate_vector_id__in=unknown) | Q(id__in=unknown)):
+                    self._add(chunk)
+                for object_id in unknown:
+                    chunk = self._by_id.get(object_id)
+                    if chunk is None:
+                        self._missing.add(object_id)
+                    else:
+                        resolved[object_id] = chunk
+            return resolved
+
+
+__all__ = ["ChunkIdentityMap"]
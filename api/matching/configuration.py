@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass, field
 from typing import Any, Iterable, Mapping
 
@@ -9,6 +10,9 @@ from django.utils.text import slugify
 
 from .exceptions import MatchingError
 
+MAX_SEARCH_CONCURRENCY = 32
+VECTOR_BACKENDS = ("weaviate", "local", "pgvector")
+
 
 class ConfigurationError(MatchingError):
     """Raised when matching configuration payloads are invalid."""
@@ -38,6 +42,24 @@ class CriterionDefinition:
         }
 
 
+@dataclass(slots=True)
+class PreRankingConfig:
+    """Two-stage mode: rank targets by search similarity, evaluate only the best.
+
+    Either limit enables it; when both are set a target must pass both.
+    """
+
+    top_n: int | None = None
+    min_score: float | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_n is not None or self.min_score is not None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"top_n": self.top_n, "min_score": self.min_score}
+
+
 @dataclass(slots=True)
 class MatchingConfiguration:
     """Full matching configuration shared between template and job override."""
@@ -45,12 +67,14 @@ class MatchingConfiguration:
     scoring_strategy: str | None = None
     description: str | None = None
     search_criteria: list[CriterionDefinition] = field(default_factory=list)
+    pre_ranking: PreRankingConfig = field(default_factory=PreRankingConfig)
 
     def to_dict(self) -> dict[str, Any]:
         return {
             "scoring_strategy": self.scoring_strategy,
             "description": self.description,
             "search_criteria": [criterion.to_dict() for criterion in self.search_criteria],
+            "pre_ranking": self.pre_ranking.to_dict(),
         }
 
 
@@ -143,6 +167,32 @@ def _normalize_criterion(data: Mapping[str, Any], *, index: int, context: str) -
     )
 
 
+def normalize_pre_ranking(config: Mapping[str, Any], *, context: str) -> PreRankingConfig:
+    raw = _as_mapping(config.get("pre_ranking"), context=f"{context} pre_ranking")
+
+    top_n = raw.get("top_n")
+    if top_n is not None:
+        try:
+            top_n = int(top_n)
+        except (TypeError, ValueError) as exc:
+            raise ConfigurationError(f"{context} pre_ranking.top_n must be an integer.") from exc
+        if top_n <= 0:
+            raise ConfigurationError(f"{context} pre_ranking.top_n must be positive (received {top_n}).")
+
+    min_score = raw.get("min_score")
+    if min_score is not None:
+        try:
+            min_score = float(min_score)
+        except (TypeError, ValueError) as exc:
+            raise ConfigurationError(f"{context} pre_ranking.min_score must be numeric.") from exc
+        if not 0 <= min_score <= 1:
+            raise ConfigurationError(
+                f"{context} pre_ranking.min_score must be between 0 and 1 (received {min_score})."
+            )
+
+    return PreRankingConfig(top_n=top_n, min_score=min_score)
+
+
 def normalize_search_criteria(config: Mapping[str, Any], *, context: str, require: bool) -> list[CriterionDefinition]:
     raw = config.get("search_criteria")
     if raw in (None, ""):
@@ -181,6 +231,7 @@ def normalize_matching_config(
     config_mapping = dict(_as_mapping(config, context=context))
 
     criteria = normalize_search_criteria(config_mapping, context=context, require=require_criteria)
+    pre_ranking = normalize_pre_ranking(config_mapping, context=context)
 
     scoring_strategy = _normalize_optional_string(config_mapping.get("scoring_strategy"))
     description = _normalize_optional_string(config_mapping.get("description"))
@@ -188,6 +239,8 @@ def normalize_matching_config(
     normalized = dict(config_mapping)
     if criteria:
         normalized["search_criteria"] = [criterion.to_dict() for criterion in criteria]
+    if "pre_ranking" in config_mapping:
+        normalized["pre_ranking"] = pre_ranking.to_dict()
 
     return (
         normalized,
@@ -195,6 +248,7 @@ def normalize_matching_config(
             scoring_strategy=scoring_strategy,
             description=description,
             search_criteria=criteria,
+            pre_ranking=pre_ranking,
         ),
     )
 
@@ -224,6 +278,44 @@ def merge_configurations(
         scoring_strategy=override_definition.scoring_strategy or template_definition.scoring_strategy,
         description=override_definition.description or template_definition.description,
         search_criteria=list(search_criteria),
+        # An override that mentions pre_ranking replaces the template's, so it can also switch it off.
+        pre_ranking=(
+            override_definition.pre_ranking
+            if "pre_ranking" in normalized_override
+            else template_definition.pre_ranking
+        ),
     )
 
     return normalized_template, normalized_override, effective
+
+
+def search_concurrency_for(workspace_settings: Mapping[str, Any] | None) -> int:
+    """Return how many searches a job may run at once for a workspace.
+
+    ``Workspace.settings["search_concurrency"]`` wins over the
+    ``MATCHING_SEARCH_CONCURRENCY`` default; values are clamped to
+    1..``MAX_SEARCH_CONCURRENCY`` and invalid ones are ignored.
+    """
+
+    candidates = ((workspace_settings or {}).get("search_concurrency"), os.getenv("MATCHING_SEARCH_CONCURRENCY"), 4)
+    for value in candidates:
+        try:
+            concurrency = int(value)
+        except (TypeError, ValueError):
+            continue
+        return min(max(concurrency, 1), MAX_SEARCH_CONCURRENCY)
+    return 1  # pragma: no cover - the literal default always parses
+
+
+def vector_backend_for(workspace_settings: Mapping[str, Any] | None) -> str:
+    """Return which vector searcher a workspace uses (one of ``VECTOR_BACKENDS``).
+
+    ``Workspace.settings["vector_backend"]`` wins over the
+    ``MATCHING_VECTOR_BACKEND`` default; unknown values are ignored.
+    """
+
+    candidates = ((workspace_settings or {}).get("vector_backend"), os.getenv("MATCHING_VECTOR_BACKEND"))
+    for value in candidates:
+        if isinstance(value, str) and value.strip().lower() in VECTOR_BACKENDS:
+            return value.strip().lower()
+    return "weaviate"
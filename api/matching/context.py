@@ -19,7 +19,7 @@ from core.models import (
     MatchingJob,
 )
 
-from .configuration import MatchingConfiguration, merge_configurations
+from .configuration import MatchingConfiguration, merge_configurations, search_concurrency_for
 
 
 logger = logging.getLogger(__name__)
@@ -83,6 +83,12 @@ class MatchingJobContext:
 
         return str(self.job.workspace_id)
 
+    @property
+    def search_concurrency(self) -> int:
+        """Maximum number of vector searches the job may run at once."""
+
+        return search_concurrency_for(self.job.workspace.settings)
+
     @classmethod
     def load(cls, job: MatchingJob) -> "MatchingJobContext":
         """Return a fully-hydrated context for the supplied job.
@@ -95,6 +101,7 @@ class MatchingJobContext:
         job = MatchingJob.objects.select_related(
             "template",
             "source_entity",
+            "workspace",
         ).prefetch_related("targets__entity").get(pk=job.pk)
 
         # Templates capture the baseline behaviour; the job override allows ad-hoc
@@ -14,12 +14,15 @@ from collections import Counter
 from core.models import MatchingJob
 
 from .audit import MatchingJobAuditRecorder
+from .chunk_map import ChunkIdentityMap
 from .context import MatchingJobContext
 from .events import MatchingJobEventPublisher, NullMatchingJobEventPublisher
 from .evaluation import TargetEvaluation, evaluate_target
 from .exceptions import MatchingError, ProviderConfigurationError
 from .interfaces import LanguageModel, VectorSearcher
+from .local_scoring import build_local_scorer
 from .planning import SearchPlanBuilder
+from .pre_ranking import pre_rank_targets
 from .results import MatchCandidate, calculate_hit_ratio
 from .search import collect_source_snippets, collect_target_matches
 
@@ -56,6 +59,8 @@ def run_matching_job(
         [bundle.entity.id for bundle in ctx.targets],
     )
     plan = SearchPlanBuilder(ctx.matching_config).build()
+    # Every chunk a search can return is already loaded in the context.
+    vector_searcher.bind_chunk_map(ChunkIdentityMap.from_bundles([ctx.source, *ctx.targets]))
     audit = MatchingJobAuditRecorder.start(
         job=job,
         plan=plan,
@@ -73,17 +78,21 @@ def run_matching_job(
     )
     active_publisher.criteria_prepared(criteria=plan.criteria)
 
-    # Pull the most representative source snippets so the LLM understands what
-    # "good" looks like before we evaluate targets. This also ensures the same
-    # text is reused across all target comparisons for consistency.
     candidates: list[MatchCandidate] = []
     try:
+        # Every search reuses the same criterion prompts; embed them once up front.
+        vector_searcher.prepare_queries([criterion.prompt for criterion in plan.criteria])
+
+        # Pull the most representative source snippets so the LLM understands what
+        # "good" looks like before we evaluate targets. This also ensures the same
+        # text is reused across all target comparisons for consistency.
         source_hits = collect_source_snippets(
             plan=plan,
             searcher=vector_searcher,
             workspace_id=ctx.workspace_id,
             source_entity=ctx.source.entity,
             audit=audit,
+            concurrency=ctx.search_concurrency,
         )
         logger.debug(
             "Source snippets collected: %s",
@@ -99,32 +108,67 @@ def run_matching_job(
         }
 
         # Run the same searches across each target entity so everyone is measured
-        # against identical criteria.
+        # against identical criteria. Small targets are scored exactly in memory.
+        local_scorer = build_local_scorer(plan=plan, searcher=vector_searcher, bundles=ctx.targets)
+        if local_scorer is not None:
+            audit.record_metrics(
+                {
+                    "local_scoring": {
+                        "targets": local_scorer.entity_count,
+                        "remote_targets": len(ctx.targets) - local_scorer.entity_count,
+                    }
+                }
+            )
         target_summaries = collect_target_matches(
             plan=plan,
             searcher=vector_searcher,
             workspace_id=ctx.workspace_id,
             targets=[bundle.entity for bundle in ctx.targets],
             audit=audit,
+            concurrency=ctx.search_concurrency,
+            local_scorer=local_scorer,
         )
         logger.debug(
             "Target summaries collected: %s",
             {summary.target.id: summary.hit_count() for summary in target_summaries},
         )
 
+        # Two-stage mode: rank every target on its search hits and only send the
+        # best to the LLM. Every target keeps its first-stage score for auditing.
+        pre_rank_scores: dict[str, float] = {}
+        pruned: set[str] = set()
+        pre_ranking = ctx.matching_config.pre_ranking
+        if pre_ranking.enabled:
+            ranked = pre_rank_targets(plan, target_summaries, pre_ranking)
+            audit.record_pre_ranking(ranked=ranked, config=pre_ranking)
+            pre_rank_scores = {str(item.summary.target.id): item.score for item in ranked}
+            pruned = {str(item.summary.target.id) for item in ranked if not item.selected}
+            logger.info(
+                "Pre-ranking kept %s of %s targets for evaluation",
+                len(ranked) - len(pruned),
+                len(ranked),
+            )
+
         for summary in target_summaries:
             hits_per_criterion = Counter(hit.criterion.id for hit in summary.hits)
+            active_publisher.target_search_completed(
+                target_id=str(summary.target.id),
+                target_name=summary.target.name,
+                hits_per_criterion=dict(hits_per_criterion),
+            )
+            if str(summary.target.id) in pruned:
+                logger.debug(
+                    "Skipping evaluation of target %s (pre-rank score %.4f)",
+                    summary.target.id,
+                    pre_rank_scores[str(summary.target.id)],
+                )
+                continue
             logger.debug(
                 "Evaluating target %s (%s hits per criterion: %s)",
                 summary.target.id,
                 summary.hit_count(),
                 dict(hits_per_criterion),
             )
-            active_publisher.target_search_completed(
-                target_id=str(summary.target.id),
-                target_name=summary.target.name,
-                hits_per_criterion=dict(hits_per_criterion),
-            )
 
             evaluation = _evaluate_target(
                 plan=plan,
@@ -152,6 +196,7 @@ def run_matching_job(
                 summary=summary,
                 evaluation=evaluation,
                 hit_ratio=hit_ratio,
+                pre_rank_score=pre_rank_scores.get(str(summary.target.id)),
             )
             candidate = MatchCandidate(
                 target=summary.target,
@@ -168,10 +213,12 @@ def run_matching_job(
             candidates.append(candidate)
 
     except Exception as exc:
+        audit.record_metrics(vector_searcher.metrics())
         audit.finalize_failure(error_message=str(exc))
         raise
 
     logger.info("Matching job %s produced %s candidates", job.id, len(candidates))
+    audit.record_metrics(vector_searcher.metrics())
     audit.finalize_success(candidates=candidates)
     return candidates
 
@@ -9,11 +9,15 @@ supplied when executing `run_matching_job`.
 from __future__ import annotations
 
 import abc
-from dataclasses import dataclass
-from typing import Iterable, Protocol
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Protocol, Sequence
+from uuid import UUID
 
 from core.models import DocumentChunk
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .chunk_map import ChunkIdentityMap
+
 
 class VectorSearcher(abc.ABC):
     """Abstract search client responsible for retrieving similar document chunks."""
@@ -33,12 +37,94 @@ class VectorSearcher(abc.ABC):
         it to whichever metadata filtering syntax their backend requires.
         """
 
+    def search_grouped(
+        self,
+        *,
+        workspace_id: str,
+        query: str,
+        entity_ids: Sequence[str],
+        limit: int = 5,
+    ) -> dict[str, list["VectorSearchHit"]]:
+        """Return up to ``limit`` hits per entity for one query, keyed by entity id.
+
+        Backends that can group results (e.g. Weaviate ``groupBy``) should answer
+        with a single round trip; this default issues one filtered search per
+        entity.
+        """
+
+        return {
+            str(entity_id): self.search(
+                workspace_id=workspace_id,
+                query=query,
+                limit=limit,
+                filters={"entity_id": str(entity_id)},
+            )
+            for entity_id in dict.fromkeys(entity_ids)
+        }
+
+    def bind_chunk_map(self, chunk_map: "ChunkIdentityMap") -> None:
+        """Use the job's preloaded chunks to hydrate hits; ignored by default."""
+
+    def prepare_queries(self, queries: Sequence[str]) -> None:
+        """Warm up any per-query state (e.g. embeddings) before a batch of searches."""
+
+    def query_vectors(self, queries: Sequence[str]) -> list[list[float]] | None:
+        """Return the embeddings this searcher would query with, if it can share them.
+
+        Enables exact in-process scoring of small entities; ``None`` opts out.
+        """
+
+        return None
+
+    def metrics(self) -> dict:
+        """Return runtime counters worth persisting with the job run."""
+
+        return {}
+
+
+@dataclass(slots=True)
+class ChunkPayload:
+    """Lightweight view of a chunk returned by a vector search.
+
+    Mirrors the read-only attributes of `DocumentChunk` that the pipeline uses
+    (``id``, ``text``, ``document_id``, ``chunk_index``) from the properties
+    stored with the vector. Searchers that have already confirmed the chunk
+    pass it as the model; otherwise ``id`` is ``None`` until :meth:`to_model`
+    loads the ORM instance by vector id.
+    """
+
+    vector_id: str
+    text: str
+    document_id: str
+    entity_id: str
+    chunk_index: int | None
+    id: UUID | None = None
+    _model: DocumentChunk | None = field(default=None, repr=False, compare=False)
+
+    def to_model(self) -> DocumentChunk | None:
+        """Load (once) the `DocumentChunk` behind this payload, or ``None`` if it is gone."""
+
+        if self._model is None:
+            # Matched by id only: the chunk now at this position may be a different one.
+            queryset = DocumentChunk.objects.all()
+            if self.id is not None:
+                self._model = queryset.filter(id=self.id).first()
+            else:
+                self._model = queryset.filter(weaviate_vector_id=self.vector_id).first()
+            if self._model is not None:
+                self.id = self._model.id
+        return self._model
+
 
 @dataclass(slots=True)
 class VectorSearchHit:
-    """Result of a vector search, bundling model metadata with the chunk."""
+    """Result of a vector search, bundling model metadata with the chunk.
 
-    chunk: DocumentChunk
+    Backends that store chunk text alongside the vector return a `ChunkPayload`;
+    others hydrate the `DocumentChunk` directly.
+    """
+
+    chunk: DocumentChunk | ChunkPayload
     score: float
     metadata: dict
 
@@ -50,6 +136,11 @@ class EmbeddingGenerator(abc.ABC):
     def embed(self, *, text: str) -> Iterable[float]:
         """Generate a vector embedding for the provided text."""
 
+    def embed_many(self, *, texts: Sequence[str]) -> list[list[float]]:
+        """Embed several texts; implementations may batch them into one request."""
+
+        return [list(self.embed(text=text)) for text in texts]
+
 
 class LanguageModel(Protocol):
     """Protocol for LLM interactions used during evaluation."""
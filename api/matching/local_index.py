@@ -0,0 +1,344 @@
+"""In-process exact vector index for running matching without Weaviate.
+
+Chunk vectors are already persisted in `EmbeddingCacheEntry` (keyed by the
+chunk text checksum), so a workspace index is just those vectors stacked into
+one normalised float32 matrix, sorted by entity so an ``entity_id`` filter is a
+contiguous slice. Indexes are saved with ``np.savez`` under
+``LOCAL_VECTOR_INDEX_DIR`` and reloaded while the workspace's chunks are
+unchanged; any chunk write or delete triggers a rebuild.
+
+Because the cache doubles as this backend's corpus, cache pruning skips the
+entries of chunks in local-backend workspaces (see
+:func:`local_backend_checksums`). A build touches the entries it reads.
+Chunks whose vector is nevertheless missing are queued for re-embedding,
+and the re-embed's chunk write triggers the next rebuild.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+from django.db.models.fields.json import KeyTextTransform
+from django.utils import timezone
+
+from core.models import DocumentChunk, EmbeddingCacheEntry, Workspace
+from core.tasks import EMBEDDING_MODEL_NAME, embed_document_chunks_task
+
+from .chunk_map import ChunkIdentityMap
+from .configuration import vector_backend_for
+from .interfaces import EmbeddingGenerator, VectorSearchHit, VectorSearcher
+
+logger = logging.getLogger(__name__)
+
+
+def _fingerprint(workspace_id: str) -> str:
+    """Summarise the workspace's chunks; changes whenever one is written or deleted."""
+
+    state = DocumentChunk.objects.filter(document__entity__workspace_id=workspace_id).aggregate(
+        count=Count("id"),
+        updated=Max("updated_at"),
+    )
+    updated = state["updated"].isoformat() if state["updated"] else ""
+    return f"{state['count']}:{updated}"
+
+
+@dataclass
+class LocalVectorIndex:
+    """Normalised chunk vectors of one workspace, grouped by entity."""
+
+    model: str
+    dimensions: int
+    fingerprint: str
+    vectors: np.ndarray
+    chunk_ids: np.ndarray
+    entity_ids: np.ndarray
+    missing_chunk_ids: np.ndarray | None = None
+
+    def __post_init__(self) -> None:
+        if self.missing_chunk_ids is None:
+            self.missing_chunk_ids = np.array([], dtype="U36")
+        entities, starts, counts = np.unique(self.entity_ids, return_index=True, return_counts=True)
+        self._slices = {
+            str(entity): slice(int(start), int(start + count))
+            for entity, start, count in zip(entities, starts, counts)
+        }
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @classmethod
+    def build(cls, workspace_id: str, *, model: str, dimensions: int, batch_size: int = 1000) -> "LocalVectorIndex":
+        """Stack the cached embedding of every embedded chunk in the workspace.
+
+        Chunks without a usable cached vector are listed in ``missing_chunk_ids``.
+        """
+
+        fingerprint = _fingerprint(workspace_id)
+        rows = list(
+            DocumentChunk.objects.filter(document__entity__workspace_id=workspace_id)
+            .filter(metadata__has_key="text_checksum")
+            .order_by("document__entity_id", "id")
+            .values_list("id", "document__entity_id", "metadata__text_checksum")
+        )
+
+        vectors_by_checksum: dict[str, bytes] = {}
+        checksums = list({checksum for _, _, checksum in rows})
+        for start in range(0, len(checksums), batch_size):
+            entries = EmbeddingCacheEntry.objects.filter(
+                model=model,
+                dimensions=dimensions,
+                text_checksum__in=checksums[start : start + batch_size],
+            )
+            vectors_by_checksum.update(entries.values_list("text_checksum", "vector"))
+            entries.update(last_used_at=timezone.now())
+
+        # Entries written under a different dimension setting cannot be stacked.
+        expected_bytes = dimensions * np.dtype(np.float32).itemsize
+        usable = [len(vectors_by_checksum.get(row[2]) or b"") == expected_bytes for row in rows]
+        missing = [str(chunk_id) for (chunk_id, _, _), ok in zip(rows, usable) if not ok]
+        rows = [row for row, ok in zip(rows, usable) if ok]
+        vectors = np.empty((len(rows), dimensions), dtype=np.float32)
+        for position, (_, _, checksum) in enumerate(rows):
+            vectors[position] = np.frombuffer(bytes(vectors_by_checksum[checksum]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+
+        logger.info(
+            "Built local vector index for workspace %s: %s chunks (%s without a cached vector)",
+            workspace_id,
+            len(rows),
+            len(missing),
+        )
+        return cls(
+            model=model,
+            dimensions=dimensions,
+            fingerprint=fingerprint,
+            vectors=vectors,
+            chunk_ids=np.array([str(chunk_id) for chunk_id, _, _ in rows], dtype="U36"),
+            entity_ids=np.array([str(entity_id) for _, entity_id, _ in rows], dtype="U36"),
+            missing_chunk_ids=np.array(missing, dtype="U36"),
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the index atomically so concurrent readers never see a partial file."""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as handle:
+            np.savez(
+                handle,
+                model=np.array(self.model),
+                dimensions=np.array(self.dimensions),
+                fingerprint=np.array(self.fingerprint),
+                vectors=self.vectors,
+                chunk_ids=self.chunk_ids,
+                entity_ids=self.entity_ids,
+                missing_chunk_ids=self.missing_chunk_ids,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "LocalVectorIndex":
+        with np.load(path) as data:
+            return cls(
+                model=str(data["model"]),
+                dimensions=int(data["dimensions"]),
+                fingerprint=str(data["fingerprint"]),
+                vectors=data["vectors"],
+                chunk_ids=data["chunk_ids"],
+                entity_ids=data["entity_ids"],
+                missing_chunk_ids=data["missing_chunk_ids"] if "missing_chunk_ids" in data.files else None,
+            )
+
+    def search(self, vector: Sequence[float], *, limit: int, entity_id: str | None = None) -> list[tuple[str, float]]:
+        """Return ``(chunk_id, cosine distance)`` pairs, nearest first."""
+
+        rows = self._slices.get(str(entity_id), slice(0, 0)) if entity_id else slice(0, len(self))
+        candidates = self.vectors[rows]
+        if not len(candidates) or limit <= 0:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        similarities = candidates @ (query / norm if norm else query)
+        if limit < len(similarities):
+            top = np.argpartition(-similarities, limit - 1)[:limit]
+        else:
+            top = np.arange(len(similarities))
+        top = top[np.argsort(-similarities[top], kind="stable")]
+        chunk_ids = self.chunk_ids[rows]
+        return [(str(chunk_ids[i]), float(1.0 - similarities[i])) for i in top]
+
+
+_indexes: dict[tuple[str, str, int], LocalVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def local_index_path(workspace_id: str, *, model: str, dimensions: int) -> Path:
+    return Path(settings.LOCAL_VECTOR_INDEX_DIR) / f"{workspace_id}-{model}-{dimensions}.npz"
+
+
+def local_backend_checksums():
+    """Text checksums of the chunks in workspaces that search the local index.
+
+    Returned as a subquery for ``prune_embedding_cache`` to exclude, since
+    those cache entries are the only copy of the local backend's vectors.
+    """
+
+    workspace_ids = [
+        workspace_id
+        for workspace_id, workspace_settings in Workspace.objects.values_list("id", "settings")
+        if vector_backend_for(workspace_settings) == "local"
+    ]
+    return (
+        DocumentChunk.objects.filter(document__entity__workspace_id__in=workspace_ids)
+        .annotate(checksum=KeyTextTransform("text_checksum", "metadata"))
+        .values("checksum")
+    )
+
+
+def _queue_reembedding(index: LocalVectorIndex, *, batch_size: int = 256) -> None:
+    """Re-embed chunks that dropped out of the cache so the next build includes them."""
+
+    chunk_ids = [str(chunk_id) for chunk_id in index.missing_chunk_ids]
+    if not chunk_ids:
+        return
+    if index.model != EMBEDDING_MODEL_NAME or index.dimensions != settings.EMBEDDING_DIMENSIONS:
+        # Re-embedding writes the configured model; it would never fill this index.
+        logger.error(
+            "Local vector index (%s/%s) is missing %s chunk vectors that re-embedding cannot provide",
+            index.model,
+            index.dimensions,
+            len(chunk_ids),
+        )
+        return
+    logger.warning("Local vector index is missing %s chunk vectors; queuing re-embedding", len(chunk_ids))
+    for start in range(0, len(chunk_ids), batch_size):
+        embed_document_chunks_task.delay(chunk_ids[start : start + batch_size])
+
+
+def get_local_vector_index(workspace_id: str, *, model: str, dimensions: int) -> LocalVectorIndex:
+    """Return a current index for the workspace from memory, disk, or a fresh build."""
+
+    key = (str(workspace_id), model, dimensions)
+    fingerprint = _fingerprint(workspace_id)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None and index.fingerprint == fingerprint:
+            return index
+
+        path = local_index_path(workspace_id, model=model, dimensions=dimensions)
+        index = None
+        if path.exists():
+            try:
+                index = LocalVectorIndex.load(path)
+            except (OSError, ValueError, KeyError) as exc:
+                logger.warning("Discarding unreadable local vector index %s: %s", path, exc)
+            if index is not None and index.fingerprint != fingerprint:
+                index = None
+        if index is None:
+            index = LocalVectorIndex.build(workspace_id, model=model, dimensions=dimensions)
+            _queue_reembedding(index)
+            try:
+                index.save(path)
+            except OSError as exc:
+                logger.warning("Unable to persist local vector index %s: %s", path, exc)
+        _indexes[key] = index
+        return index
+
+
+def reset_local_vector_indexes() -> None:
+    """Forget the indexes loaded by this process (files on disk are kept)."""
+
+    with _indexes_lock:
+        _indexes.clear()
+
+
+class LocalVectorSearcher(VectorSearcher):
+    """Exact cosine search over the workspace's locally persisted chunk vectors."""
+
+    def __init__(self, *, embedder: EmbeddingGenerator, model: str | None = None, dimensions: int | None = None) -> None:
+        self._embedder = embedder
+        self.model = model or getattr(embedder, "model", "text-embedding-3-small")
+        self.dimensions = dimensions or settings.EMBEDDING_DIMENSIONS
+        self._chunk_map: ChunkIdentityMap | None = None
+        self._index: LocalVectorIndex | None = None
+        self._workspace_id: str | None = None
+        # Searches of one job run concurrently; only the first resolves the index.
+        self._index_lock = threading.Lock()
+
+    def bind_chunk_map(self, chunk_map: ChunkIdentityMap) -> None:
+        self._chunk_map = chunk_map
+
+    def close(self) -> None:
+        """Nothing to release; the index stays cached for the next job."""
+
+    def prepare_queries(self, queries: Sequence[str]) -> None:
+        unique = list(dict.fromkeys(queries))
+        if unique:
+            self._embedder.embed_many(texts=unique)
+
+    def query_vectors(self, queries: Sequence[str]) -> list[list[float]]:
+        return self._embedder.embed_many(texts=list(queries))
+
+    def metrics(self) -> dict:
+        metrics = {}
+        stats = getattr(self._embedder, "stats", None)
+        if stats is not None:
+            metrics["query_embeddings"] = stats.as_dict()
+        if self._index is not None:
+            metrics["local_index"] = {"chunks": len(self._index)}
+        return metrics
+
+    def _index_for(self, workspace_id: str) -> LocalVectorIndex:
+        # A searcher serves one job, so the fingerprint is checked once per job.
+        with self._index_lock:
+            if self._index is None or self._workspace_id != str(workspace_id):
+                self._index = get_local_vector_index(workspace_id, model=self.model, dimensions=self.dimensions)
+                self._workspace_id = str(workspace_id)
+            return self._index
+
+    def search(
+        self,
+        *,
+        workspace_id: str,
+        query: str,
+        limit: int = 5,
+        filters: dict | None = None,
+    ) -> list[VectorSearchHit]:
+        index = self._index_for(workspace_id)
+        vector = list(self._embedder.embed(text=query))
+        if len(vector) != index.dimensions:
+            logger.error(
+                "Query embedding has %s dimensions but the local index has %s; check EMBEDDING_DIMENSIONS",
+                len(vector),
+                index.dimensions,
+            )
+            return []
+
+        matches = index.search(vector, limit=limit, entity_id=(filters or {}).get("entity_id"))
+        chunk_map = self._chunk_map or ChunkIdentityMap()
+        chunks = chunk_map.resolve([chunk_id for chunk_id, _ in matches])
+        return [
+            VectorSearchHit(chunk=chunks[chunk_id], score=distance, metadata={"distance": distance})
+            for chunk_id, distance in matches
+            if chunk_id in chunks
+        ]
+
+
+__all__ = [
+    "LocalVectorIndex",
+    "LocalVectorSearcher",
+    "get_local_vector_index",
+    "local_backend_checksums",
+    "local_index_path",
+    "reset_local_vector_indexes",
+]
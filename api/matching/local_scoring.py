@@ -0,0 +1,166 @@
+"""Exact in-memory scoring of small target entities.
+
+Most targets only have a handful of chunks, so a remote ANN query per
+criterion and target is mostly network overhead. For targets with at most
+``LOCAL_SCORING_MAX_CHUNKS`` chunks whose vectors are all in the embedding
+cache, the chunk vectors are stacked into one float32 matrix at the start of
+the job and every criterion×chunk cosine similarity comes out of a single
+matrix product. Larger or partially embedded targets still go to the vector
+searcher.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from core.models import DocumentChunk, EmbeddingCacheEntry
+from core.tasks import EMBEDDING_MODEL_NAME, calculate_text_checksum
+
+from .context import EntityDocumentBundle
+from .interfaces import VectorSearchHit, VectorSearcher
+from .planning import SearchPlan
+
+logger = logging.getLogger(__name__)
+
+
+def _int_from_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _normalised(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class LocalChunkScorer:
+    """Criterion×chunk similarities for a fixed set of small target entities."""
+
+    def __init__(
+        self,
+        *,
+        plan: SearchPlan,
+        query_vectors: np.ndarray,
+        chunk_vectors: np.ndarray,
+        chunks: Sequence[DocumentChunk],
+        slices: dict[str, slice],
+    ) -> None:
+        self._plan = plan
+        self._chunks = list(chunks)
+        self._slices = slices
+        # One (criteria × chunks) product covers every locally scored target.
+        self._similarities = query_vectors @ chunk_vectors.T if len(self._chunks) else np.zeros((len(plan.criteria), 0))
+
+    @classmethod
+    def load(
+        cls,
+        bundles: Iterable[EntityDocumentBundle],
+        *,
+        plan: SearchPlan,
+        query_vectors: Sequence[Sequence[float]],
+        max_chunks: int,
+        model: str = EMBEDDING_MODEL_NAME,
+        batch_size: int = 1000,
+    ) -> "LocalChunkScorer":
+        """Bulk-load cached vectors for bundles with at most ``max_chunks`` chunks.
+
+        Targets with a chunk missing from the cache are left out so their
+        results never mix exact and approximate scores.
+        """
+
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        dimensions = queries.shape[1]
+        small = [bundle for bundle in bundles if len(bundle.chunks) <= max_chunks]
+        checksums = {chunk.id: calculate_text_checksum(chunk.text) for bundle in small for chunk in bundle.chunks}
+        wanted = list(set(checksums.values()))
+        cached: dict[str, bytes] = {}
+        for start in range(0, len(wanted), batch_size):
+            cached.update(
+                EmbeddingCacheEntry.objects.filter(
+                    model=model,
+                    dimensions=dimensions,
+                    text_checksum__in=wanted[start : start + batch_size],
+                ).values_list("text_checksum", "vector")
+            )
+
+        chunks: list[DocumentChunk] = []
+        rows: list[np.ndarray] = []
+        slices: dict[str, slice] = {}
+        for bundle in small:
+            vectors = [cached.get(checksums[chunk.id]) for chunk in bundle.chunks]
+            if any(vector is None for vector in vectors):
+                continue
+            start = len(chunks)
+            chunks.extend(bundle.chunks)
+            rows.extend(np.frombuffer(bytes(vector), dtype=np.float32) for vector in vectors)
+            slices[str(bundle.entity.id)] = slice(start, len(chunks))
+
+        chunk_vectors = np.vstack(rows) if rows else np.zeros((0, dimensions), dtype=np.float32)
+        return cls(
+            plan=plan,
+            query_vectors=_normalised(queries),
+            chunk_vectors=_normalised(chunk_vectors),
+            chunks=chunks,
+            slices=slices,
+        )
+
+    def covers(self, entity_id: str) -> bool:
+        return str(entity_id) in self._slices
+
+    @property
+    def entity_count(self) -> int:
+        return len(self._slices)
+
+    def hits_for(self, entity_id: str) -> dict[str, list[VectorSearchHit]]:
+        """Top ``target_snippet_limit`` chunks per criterion, nearest first."""
+
+        rows = self._slices[str(entity_id)]
+        chunks = self._chunks[rows]
+        hits: dict[str, list[VectorSearchHit]] = {}
+        for position, criterion in enumerate(self._plan.criteria):
+            similarities = self._similarities[position, rows]
+            order = np.argsort(-similarities, kind="stable")[: criterion.target_snippet_limit]
+            hits[criterion.id] = [
+                VectorSearchHit(
+                    chunk=chunks[index],
+                    score=float(1.0 - similarities[index]),
+                    metadata={"distance": float(1.0 - similarities[index]), "scoring": "local"},
+                )
+                for index in order
+            ]
+        return hits
+
+
+def build_local_scorer(
+    *,
+    plan: SearchPlan,
+    searcher: VectorSearcher,
+    bundles: Sequence[EntityDocumentBundle],
+    max_chunks: int | None = None,
+) -> LocalChunkScorer | None:
+    """Return a scorer for the job's small targets, or ``None`` when disabled.
+
+    ``LOCAL_SCORING_MAX_CHUNKS`` (default 20, 0 disables) sets the size limit.
+    Searchers that cannot hand out their query vectors opt out.
+    """
+
+    if max_chunks is None:
+        max_chunks = _int_from_env("LOCAL_SCORING_MAX_CHUNKS", 20)
+    if max_chunks <= 0 or not plan.criteria or not any(len(bundle.chunks) <= max_chunks for bundle in bundles):
+        return None
+
+    query_vectors = searcher.query_vectors([criterion.prompt for criterion in plan.criteria])
+    if not query_vectors:
+        return None
+    scorer = LocalChunkScorer.load(bundles, plan=plan, query_vectors=query_vectors, max_chunks=max_chunks)
+    logger.debug("Scoring %s of %s targets locally", scorer.entity_count, len(bundles))
+    return scorer
+
+
+__all__ = ["LocalChunkScorer", "build_local_scorer"]
@@ -21,8 +21,8 @@ logger = logging.getLogger(__name__)
 class SearchCriterion:
     """Single search objective with optional weighting.
 
-    The weight field is carried through even though we do not yet act on it; the
-    value will become useful when we start ranking or prioritising search calls.
+    The weight field scales the criterion's share of the pre-ranking score when
+    the two-stage mode is enabled.
     """
 
     id: str
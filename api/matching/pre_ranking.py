@@ -0,0 +1,63 @@
+"""Cheap first-stage ranking of targets before LLM evaluation.
+
+Evaluating a target costs two LLM calls per criterion, so large candidate
+pools are ranked on the vector search results first. Each target scores the
+weighted mean, over criteria, of its best hit similarity (``1 - distance``);
+only the targets within ``top_n`` and above ``min_score`` move on to the LLM.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+from .configuration import PreRankingConfig
+from .planning import SearchPlan
+from .search import TargetSearchSummary
+
+
+@dataclass(slots=True)
+class PreRankedTarget:
+    """A target's first-stage score and whether it proceeds to evaluation."""
+
+    summary: TargetSearchSummary
+    score: float
+    rank: int
+    selected: bool
+
+
+def pre_rank_score(plan: SearchPlan, summary: TargetSearchSummary) -> float:
+    """Weighted mean of the best similarity per criterion; criteria without hits count as 0."""
+
+    best: dict[str, float] = {}
+    for hit in summary.hits:
+        similarity = min(max(1.0 - hit.score, 0.0), 1.0)
+        best[hit.criterion.id] = max(best.get(hit.criterion.id, 0.0), similarity)
+    total_weight = sum(criterion.weight for criterion in plan.criteria)
+    if not total_weight:
+        return 0.0
+    return sum(criterion.weight * best.get(criterion.id, 0.0) for criterion in plan.criteria) / total_weight
+
+
+def pre_rank_targets(
+    plan: SearchPlan,
+    summaries: Sequence[TargetSearchSummary],
+    config: PreRankingConfig,
+) -> list[PreRankedTarget]:
+    """Rank summaries best first (ties keep input order) and mark the ones to evaluate."""
+
+    scored = sorted(
+        ((pre_rank_score(plan, summary), summary) for summary in summaries),
+        key=lambda item: item[0],
+        reverse=True,
+    )
+    ranked = []
+    for rank, (score, summary) in enumerate(scored, start=1):
+        selected = (config.top_n is None or rank <= config.top_n) and (
+            config.min_score is None or score >= config.min_score
+        )
+        ranked.append(PreRankedTarget(summary=summary, score=score, rank=rank, selected=selected))
+    return ranked
+
+
+__all__ = ["PreRankedTarget", "pre_rank_score", "pre_rank_targets"]
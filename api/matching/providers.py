@@ -3,40 +3,111 @@
 from __future__ import annotations
 
 import logging
-from typing import Iterable
+from typing import Iterable, Sequence
 
+from django.conf import settings
 from openai import OpenAI
-from weaviate.classes.query import Filter
+from weaviate.classes.query import Filter, GroupBy, MetadataQuery
+from weaviate.exceptions import WeaviateBaseError
 
 from core.ai_clients import get_embedding_client, get_llm_client, get_weaviate_client
-from core.models import DocumentChunk
-from django.db.models import Q
+from core.services.query_embedding_cache import (
+    QueryEmbeddingCache,
+    QueryEmbeddingStats,
+    get_query_embedding_cache,
+)
+from core.services.rate_limiting import (
+    PRIORITY_INTERACTIVE,
+    OpenAIRateLimiter,
+    estimate_tokens,
+    get_openai_rate_limiter,
+)
+from core.services.vector_schema import document_chunk_schema
 
-from .interfaces import EmbeddingGenerator, LanguageModel, VectorSearchHit, VectorSearcher
+from .chunk_map import ChunkIdentityMap
+from .interfaces import (
+    ChunkPayload,
+    EmbeddingGenerator,
+    LanguageModel,
+    VectorSearchHit,
+    VectorSearcher,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class OpenAIEmbeddingGenerator(EmbeddingGenerator):
-    """Generate embeddings for search queries using OpenAI."""
+    """Generate embeddings for search queries using OpenAI.
 
-    def __init__(self, client: OpenAI | None = None, *, model: str = "text-embedding-3-small") -> None:
+    Vectors are served from the shared query embedding cache when possible;
+    ``stats`` records where each lookup was answered for this generator.
+    """
+
+    def __init__(
+        self,
+        client: OpenAI | None = None,
+        *,
+        model: str = "text-embedding-3-small",
+        dimensions: int | None = None,
+        workspace_id: str | None = None,
+        rate_limiter: OpenAIRateLimiter | None = None,
+        cache: QueryEmbeddingCache | None = None,
+    ) -> None:
         self._client = client or get_embedding_client()
         self.model = model
+        # Query vectors must have the width chunk vectors were embedded with.
+        self.dimensions = dimensions or settings.EMBEDDING_DIMENSIONS
+        self.workspace_id = workspace_id
+        self._rate_limiter = rate_limiter or get_openai_rate_limiter()
+        self._cache = cache or get_query_embedding_cache()
+        self.stats = QueryEmbeddingStats()
 
     def embed(self, *, text: str) -> Iterable[float]:
-        response = self._client.embeddings.create(model=self.model, input=text)
-        return response.data[0].embedding
+        return self.embed_many(texts=[text])[0]
+
+    def embed_many(self, *, texts: Sequence[str]) -> list[list[float]]:
+        vectors = self._cache.get_many(self.model, self.dimensions, texts, stats=self.stats)
+        missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+        if missing:
+            self._rate_limiter.acquire(
+                tokens=sum(estimate_tokens(text) for text in missing),
+                workspace_id=self.workspace_id,
+                priority=PRIORITY_INTERACTIVE,
+            )
+            response = self._client.embeddings.create(model=self.model, input=missing, dimensions=self.dimensions)
+            self.stats.api_requests += 1
+            # Embeddings are returned in input order.
+            fresh = {text: list(item.embedding) for text, item in zip(missing, response.data)}
+            self._cache.set_many(self.model, self.dimensions, fresh)
+            vectors.update(fresh)
+        return [vectors[text] for text in texts]
 
 
 class OpenAILanguageModel(LanguageModel):
     """LLM interface backed by OpenAI's Responses API."""
 
-    def __init__(self, client: OpenAI | None = None, *, model: str = "gpt-5") -> None:
+    # Budgeted on top of the prompt for the reply, which is unknown up front.
+    expected_output_tokens = 1000
+
+    def __init__(
+        self,
+        client: OpenAI | None = None,
+        *,
+        model: str = "gpt-5",
+        workspace_id: str | None = None,
+        rate_limiter: OpenAIRateLimiter | None = None,
+    ) -> None:
         self._client = client or get_llm_client()
         self.model = model
+        self.workspace_id = workspace_id
+        self._rate_limiter = rate_limiter or get_openai_rate_limiter()
 
     def structured_match_review(self, *, prompt: str) -> str:
+        self._rate_limiter.acquire(
+            tokens=estimate_tokens(prompt) + self.expected_output_tokens,
+            workspace_id=self.workspace_id,
+            priority=PRIORITY_INTERACTIVE,
+        )
         response = self._client.responses.create(
             model=self.model,
             input=[{"role": "user", "content": prompt}],
@@ -47,19 +118,117 @@ class OpenAILanguageModel(LanguageModel):
 class WeaviateVectorSearcher(VectorSearcher):
     """Vector searcher that queries Weaviate for document chunks."""
 
-    collection_name = "DocumentChunk"
+    collection_name = document_chunk_schema.name
+    # Chunk fields stored on each object; enough to build hits without Postgres.
+    return_properties = ["text", "document_id", "entity_id", "chunk_index"]
+    # Upper bound on entities (and therefore groups) per grouped query.
+    max_groups_per_query = 100
 
     def __init__(self, *, embedder: EmbeddingGenerator, client=None) -> None:
         self._embedder = embedder
+        # The pooled client is shared by the whole process; only an explicitly
+        # supplied client is closed together with the searcher.
+        self._owns_client = client is not None
         self._client = client or get_weaviate_client()
+        self._chunk_map: ChunkIdentityMap | None = None
+
+    def bind_chunk_map(self, chunk_map: ChunkIdentityMap) -> None:
+        """Resolve hits through the job's preloaded chunks instead of per-search queries."""
+
+        self._chunk_map = chunk_map
 
     def close(self) -> None:
-        """Close the underlying client if it exposes a close method."""
+        """Close the underlying client unless it is the shared pooled one."""
 
+        if not self._owns_client:
+            return
         close = getattr(self._client, "close", None)
         if callable(close):
             close()
 
+    def prepare_queries(self, queries: Sequence[str]) -> None:
+        """Embed every distinct query in one request so later searches hit the cache."""
+
+        unique = list(dict.fromkeys(queries))
+        if unique:
+            self._embedder.embed_many(texts=unique)
+
+    def query_vectors(self, queries: Sequence[str]) -> list[list[float]]:
+        return self._embedder.embed_many(texts=list(queries))
+
+    def metrics(self) -> dict:
+        metrics = {}
+        stats = getattr(self._embedder, "stats", None)
+        if stats is not None:
+            metrics["query_embeddings"] = stats.as_dict()
+        if self._chunk_map is not None:
+            metrics["chunk_map"] = {"preloaded": len(self._chunk_map), "fallback_queries": self._chunk_map.queries}
+        return metrics
+
+    def search_grouped(
+        self,
+        *,
+        workspace_id: str,
+        query: str,
+        entity_ids: Sequence[str],
+        limit: int = 5,
+    ) -> dict[str, list[VectorSearchHit]]:
+        """Search many entities at once with ``ContainsAny`` + ``groupBy entity_id``.
+
+        Grouping only considers the nearest ``len(batch) * limit`` objects
+        overall, so an entity's group may come back short or missing. Every
+        entity with fewer than ``limit`` confirmed hits (orphans are dropped
+        after grouping) and servers that reject ``groupBy`` fall back to
+        per-entity searches, so results match :meth:`search`.
+        """
+
+        entity_ids = list(dict.fromkeys(str(entity_id) for entity_id in entity_ids))
+        grouped: dict[str, list[VectorSearchHit]] = {entity_id: [] for entity_id in entity_ids}
+        if not entity_ids:
+            return grouped
+
+        vector = list(self._embedder.embed(text=query))
+        collection = self._client.collections.get(self.collection_name)
+        ungrouped: list[str] = []
+        for start in range(0, len(entity_ids), self.max_groups_per_query):
+            batch = entity_ids[start : start + self.max_groups_per_query]
+            try:
+                result = collection.query.near_vector(
+                    near_vector=vector,
+                    limit=len(batch) * limit,
+                    filters=Filter.by_property("entity_id").contains_any(batch),
+                    group_by=GroupBy(prop="entity_id", objects_per_group=limit, number_of_groups=len(batch)),
+                    return_properties=self.return_properties,
+                    return_metadata=MetadataQuery(distance=True),
+                )
+            except WeaviateBaseError as exc:
+                logger.warning("Grouped Weaviate search failed, searching entities one by one: %s", exc)
+                ungrouped.extend(batch)
+                continue
+
+            group_by_uuid = {str(obj.uuid): obj.belongs_to_group for obj in result.objects}
+            for hit in self._hits_from_objects(result.objects):
+                entity_id = group_by_uuid.get(hit.metadata["weaviate_uuid"])
+                if entity_id in grouped and len(grouped[entity_id]) < limit:
+                    grouped[entity_id].append(hit)
+            ungrouped.extend(entity_id for entity_id in batch if len(grouped[entity_id]) < limit)
+
+        logger.debug(
+            "Grouped Weaviate search: %s entities, %s searched individually",
+            len(entity_ids),
+            len(ungrouped),
+        )
+        if ungrouped:
+            grouped.update(
+                super().search_grouped(
+                    workspace_id=workspace_id,
+                    query=query,
+                    entity_ids=ungrouped,
+                    limit=limit,
+                )
+            )
+        return grouped
+
     def search(
         self,
         *,
@@ -89,51 +258,79 @@ class WeaviateVectorSearcher(VectorSearcher):
             near_vector=vector,
             limit=limit,
             filters=filter_obj,
+            return_properties=self.return_properties,
+            return_metadata=MetadataQuery(distance=True),
         )
 
-        hits: list[VectorSearchHit] = []
-        chunk_ids = [str(obj.uuid) for obj in result.objects]
-        # Map by Weaviate vector id primarily; fall back to PK for legacy data.
-        chunks = DocumentChunk.objects.filter(
-            Q(weaviate_vector_id__in=chunk_ids) | Q(id__in=chunk_ids)
+        hits = self._hits_from_objects(result.objects)
+
+        logger.debug(
+            "Weaviate search assembled %s hits (top_score=%s)",
+            len(hits),
+            hits[0].score if hits else None,
         )
-        chunks_by_vector_or_pk: dict[str, DocumentChunk] = {}
-        for chunk in chunks:
-            if chunk.weaviate_vector_id:
-                chunks_by_vector_or_pk[str(chunk.weaviate_vector_id)] = chunk
-            chunks_by_vector_or_pk[str(chunk.id)] = chunk
+
+        return hits
+
+    def _hits_from_objects(self, objects) -> list[VectorSearchHit]:
+        """Turn Weaviate result objects into chunk hits, preserving their order.
+
+        Objects carrying their chunk text become `ChunkPayload` hits built from
+        the stored properties alone; the row is loaded only if a caller asks
+        for the model. With a job chunk map bound, each payload object is
+        confirmed by id against the preloaded chunks without a query, and ids
+        the map does not know (vectors of deleted or re-chunked chunks) are
+        dropped as orphans. Objects without a payload are resolved to their
+        rows by id, with one batched query for ids the map does not know.
+        """
+
+        parsed: list[tuple[str, dict, int | None]] = []
+        for obj in objects:
+            props = getattr(obj, "properties", None) or {}
+            try:
+                idx = int(props["chunk_index"]) if props.get("chunk_index") is not None else None
+            except (TypeError, ValueError):
+                idx = None
+            parsed.append((str(obj.uuid), props, idx))
+        row_ids = [obj_id for obj_id, props, _ in parsed if props.get("text") is None]
         logger.debug(
-            "Weaviate search returned %s objects (chunk_ids=%s)",
-            len(result.objects),
-            chunk_ids,
+            "Weaviate search returned %s objects (chunk_ids=%s, without payload=%s)",
+            len(objects),
+            [obj_id for obj_id, _, _ in parsed],
+            len(row_ids),
         )
-        for obj in result.objects:
-            obj_id = str(obj.uuid)
-            chunk = chunks_by_vector_or_pk.get(obj_id)
-
-            # Fallback: resolve by properties (document_id + chunk_index) if id mapping fails.
-            if not chunk:
-                props = getattr(obj, "properties", None) or {}
-                doc_id = str(props.get("document_id") or "")
-                idx_val = props.get("chunk_index")
-                try:
-                    idx = int(idx_val) if idx_val is not None else None
-                except (TypeError, ValueError):
-                    idx = None
-                if doc_id and idx is not None:
-                    chunk = (
-                        DocumentChunk.objects.filter(document_id=doc_id, chunk_index=idx)
-                        .only("id", "text")
-                        .first()
-                    )
-                if not chunk:
-                    logger.debug(
-                        "Skipping hit with missing chunk %s (fallback props doc_id=%s idx=%s)",
-                        obj_id,
-                        doc_id or "",
-                        idx if idx is not None else "",
+
+        chunk_map = self._chunk_map
+        rows = {}
+        if row_ids:
+            # Without a job-scoped map, a throwaway one still batches the lookups.
+            rows = (chunk_map or ChunkIdentityMap()).resolve(row_ids)
+
+        hits: list[VectorSearchHit] = []
+        for obj, (obj_id, props, idx) in zip(objects, parsed):
+            if props.get("text") is not None:
+                model = chunk_map.peek(obj_id) if chunk_map is not None else None
+                chunk = None
+                if chunk_map is None or model is not None:
+                    chunk = ChunkPayload(
+                        vector_id=obj_id,
+                        text=str(props["text"]),
+                        document_id=str(props.get("document_id") or ""),
+                        entity_id=str(props.get("entity_id") or ""),
+                        chunk_index=idx,
+                        id=model.id if model is not None else None,
+                        _model=model,
                     )
-                    continue
+            else:
+                chunk = rows.get(obj_id)
+            if chunk is None:
+                logger.warning(
+                    "Skipping orphaned Weaviate object %s (doc_id=%s idx=%s); run reconcile_vectors --fix",
+                    obj_id,
+                    props.get("document_id") or "",
+                    idx if idx is not None else "",
+                )
+                continue
             metadata = getattr(obj, "metadata", None)
             distance = getattr(metadata, "distance", None) if metadata else None
             score = float(distance) if distance is not None else 0.0
@@ -148,10 +345,4 @@ class WeaviateVectorSearcher(VectorSearcher):
                 )
             )
 
-        logger.debug(
-            "Weaviate search assembled %s hits (top_score=%s)",
-            len(hits),
-            hits[0].score if hits else None,
-        )
-
         return hits
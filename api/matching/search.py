@@ -8,18 +8,24 @@ provider internals or filter syntax.
 from __future__ import annotations
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Iterable, TYPE_CHECKING
+from typing import Callable, Iterable, Sequence, TYPE_CHECKING, TypeVar
+
+from django.db import connections
 
 from core.models import DocumentChunk, Entity, MatchingSearchLog
 
-from .interfaces import VectorSearchHit, VectorSearcher
+from .interfaces import ChunkPayload, VectorSearchHit, VectorSearcher
 from .planning import SearchCriterion, SearchPlan
 
 if TYPE_CHECKING:  # pragma: no cover
     from .audit import MatchingJobAuditRecorder
+    from .local_scoring import LocalChunkScorer
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 @dataclass(slots=True)
 class CriterionHit:
@@ -30,7 +36,7 @@ class CriterionHit:
     """
 
     criterion: SearchCriterion
-    chunk: DocumentChunk
+    chunk: DocumentChunk | ChunkPayload
     score: float
 
 
@@ -50,6 +56,32 @@ class TargetSearchSummary:
         return len(self.hits)
 
 
+def _close_thread_connections(call: Callable[[], T]) -> T:
+    try:
+        return call()
+    finally:
+        # Worker threads open their own database connections; release them.
+        connections.close_all()
+
+
+def run_searches(calls: Sequence[Callable[[], T]], *, concurrency: int = 1) -> list[T]:
+    """Run search callables with at most ``concurrency`` in flight.
+
+    Results come back in the order of ``calls`` regardless of completion
+    order, so audit records stay deterministic. The first exception raised
+    by any call is re-raised.
+    """
+
+    if concurrency <= 1 or len(calls) <= 1:
+        return [call() for call in calls]
+    with ThreadPoolExecutor(
+        max_workers=min(concurrency, len(calls)),
+        thread_name_prefix="matching-search",
+    ) as pool:
+        futures = [pool.submit(_close_thread_connections, call) for call in calls]
+        return [future.result() for future in futures]
+
+
 def collect_source_snippets(
     *,
     plan: SearchPlan,
@@ -57,25 +89,35 @@ def collect_source_snippets(
     workspace_id: str,
     source_entity: Entity,
     audit: "MatchingJobAuditRecorder | None" = None,
+    concurrency: int = 1,
 ) -> dict[str, list[VectorSearchHit]]:
     """Retrieve representative chunks from the source entity per criterion.
 
     We only take a handful of snippets per criterion because the LLM prompt
-    budget is limited. The `entity_id` filter pushes the precise scoping logic
+    budget is limited. Criteria are searched up to `concurrency` at a time;
+    audit records are written afterwards, in plan order, on this thread. The `entity_id` filter pushes the precise scoping logic
     into the provider where it can tap into metadata filters (e.g. Weaviate).
     """
 
+    filters = {"entity_id": str(source_entity.id)}
+    logger.debug(
+        "Collecting source snippets: criteria=%s concurrency=%s", len(plan.criteria), concurrency
+    )
+    results = run_searches(
+        [
+            lambda criterion=criterion: searcher.search(
+                workspace_id=workspace_id,
+                query=criterion.prompt,
+                limit=criterion.source_snippet_limit,
+                filters=filters,
+            )
+            for criterion in plan.criteria
+        ],
+        concurrency=concurrency,
+    )
+
     snippets: dict[str, list[VectorSearchHit]] = {}
-    for criterion in plan.criteria:
-        logger.debug(
-            "Collecting source snippets: criterion=%s limit=%s", criterion.id, criterion.source_snippet_limit
-        )
-        hits = searcher.search(
-            workspace_id=workspace_id,
-            query=criterion.prompt,
-            limit=criterion.source_snippet_limit,
-            filters={"entity_id": str(source_entity.id)},
-        )
+    for criterion, hits in zip(plan.criteria, results):
         logger.debug(
             "Collected %s source hits for criterion=%s (entity=%s)",
             len(hits),
@@ -90,7 +132,7 @@ def collect_source_snippets(
                 query_type=MatchingSearchLog.QueryType.SOURCE,
                 query_text=criterion.prompt,
                 limit=criterion.source_snippet_limit,
-                filters={"entity_id": str(source_entity.id)},
+                filters=filters,
             )
             audit.record_search(context=context, hits=hits)
         snippets[criterion.id] = hits
@@ -104,31 +146,56 @@ def collect_target_matches(
     workspace_id: str,
     targets: Iterable[Entity],
     audit: "MatchingJobAuditRecorder | None" = None,
+    concurrency: int = 1,
+    local_scorer: "LocalChunkScorer | None" = None,
 ) -> list[TargetSearchSummary]:
     """Retrieve the best matching chunks per target entity.
 
-    Keeping the loop target-by-target ensures we can enforce per-entity
-    thresholds later (e.g., drop a target if it never returns hits). We reuse
-    the same criterion prompts so both source and target snippets are aligned.
+    Each criterion is searched across the whole target set at once through
+    `VectorSearcher.search_grouped`, so a job costs one round trip per
+    criterion rather than one per target and criterion; up to `concurrency`
+    of those run in parallel. Targets covered by `local_scorer` are scored
+    exactly in memory instead and never reach the searcher. Results are still
+    assembled target by target so per-entity thresholds can be enforced later.
+    We reuse the same criterion prompts so both source and target snippets are
+    aligned.
     """
 
-    summaries: list[TargetSearchSummary] = []
-    for target in targets:
-        logger.debug("Collecting target matches for entity=%s", target.id)
-        hits: list[CriterionHit] = []
-        for criterion in plan.criteria:
-            logger.debug(
-                "Target search: entity=%s criterion=%s limit=%s",
-                target.id,
-                criterion.id,
-                criterion.target_snippet_limit,
-            )
-            search_hits = searcher.search(
+    targets = list(targets)
+    local_ids = {str(target.id) for target in targets if local_scorer and local_scorer.covers(target.id)}
+    remote_ids = [str(target.id) for target in targets if str(target.id) not in local_ids]
+    logger.debug(
+        "Grouped target search: criteria=%s targets=%s scored_locally=%s concurrency=%s",
+        len(plan.criteria),
+        len(targets),
+        len(local_ids),
+        concurrency,
+    )
+    results = run_searches(
+        [
+            lambda criterion=criterion: searcher.search_grouped(
                 workspace_id=workspace_id,
                 query=criterion.prompt,
+                entity_ids=remote_ids,
                 limit=criterion.target_snippet_limit,
-                filters={"entity_id": str(target.id)},
             )
+            for criterion in plan.criteria
+        ]
+        if remote_ids
+        else [],
+        concurrency=concurrency,
+    )
+    hits_by_criterion = {criterion.id: grouped for criterion, grouped in zip(plan.criteria, results)}
+
+    summaries: list[TargetSearchSummary] = []
+    for target in targets:
+        hits: list[CriterionHit] = []
+        local_hits = local_scorer.hits_for(target.id) if str(target.id) in local_ids else None
+        for criterion in plan.criteria:
+            if local_hits is not None:
+                search_hits = local_hits[criterion.id]
+            else:
+                search_hits = hits_by_criterion[criterion.id].get(str(target.id), [])
             logger.debug(
                 "Target search returned %s hits for entity=%s criterion=%s",
                 len(search_hits),
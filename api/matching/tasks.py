@@ -7,14 +7,18 @@ from dataclasses import dataclass
 from typing import Sequence
 
 from celery import shared_task
+from django.apps import apps
 from django.db import transaction
 from django.utils import timezone
 
 from core.models import Match, MatchFeature, MatchingJob
 
+from .configuration import vector_backend_for
 from .engine import run_matching_job
 from .events import ChannelLayerMatchingJobEventPublisher, MatchingJobEventPublisher
 from .exceptions import MatchingError
+from .interfaces import VectorSearcher
+from .local_index import LocalVectorSearcher
 from .providers import (
     OpenAIEmbeddingGenerator,
     OpenAILanguageModel,
@@ -28,17 +32,26 @@ logger = logging.getLogger(__name__)
 class MatchingProviders:
     """Bundle of provider instances used during a job run."""
 
-    searcher: WeaviateVectorSearcher
+    searcher: VectorSearcher
     llm: OpenAILanguageModel
 
     def close(self) -> None:
         self.searcher.close()
 
 
-def _build_providers() -> MatchingProviders:
-    embedder = OpenAIEmbeddingGenerator()
-    searcher = WeaviateVectorSearcher(embedder=embedder)
-    llm = OpenAILanguageModel()
+def _build_providers(workspace_id: str | None = None, *, vector_backend: str = "weaviate") -> MatchingProviders:
+    embedder = OpenAIEmbeddingGenerator(workspace_id=workspace_id)
+    if vector_backend == "local":
+        searcher = LocalVectorSearcher(embedder=embedder)
+    elif vector_backend == "pgvector" and apps.is_installed("pgvector_store"):
+        from pgvector_store.searcher import PgVectorSearcher
+
+        searcher = PgVectorSearcher(embedder=embedder)
+    else:
+        if vector_backend == "pgvector":
+            logger.error("pgvector backend requested but PGVECTOR_ENABLED is off; using Weaviate")
+        searcher = WeaviateVectorSearcher(embedder=embedder)
+    llm = OpenAILanguageModel(workspace_id=workspace_id)
     return MatchingProviders(searcher=searcher, llm=llm)
 
 
@@ -59,7 +72,10 @@ def run_matching_job_task(self, job_id: str) -> None:
         logger.info("Matching job %s already running; skipping duplicate trigger", job_id)
         return
 
-    providers = _build_providers()
+    providers = _build_providers(
+        str(job.workspace_id),
+        vector_backend=vector_backend_for(job.workspace.settings),
+    )
     try:
         _mark_job_running(job, publisher)
         candidates = run_matching_job(
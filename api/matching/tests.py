@@ -1,6 +1,9 @@
+import threading
+import time
 from dataclasses import asdict
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
 from core.models import (
     Document,
@@ -18,7 +21,16 @@ from matching.audit import MatchingJobAuditRecorder, build_search_context
 from matching.evaluation import CriterionEvaluation, MatchRating, TargetEvaluation
 from matching.interfaces import VectorSearchHit
 from matching.planning import SearchCriterion, SearchPlan
-from matching.search import CriterionHit, TargetSearchSummary
+from matching.configuration import (
+    MAX_SEARCH_CONCURRENCY,
+    ConfigurationError,
+    PreRankingConfig,
+    merge_configurations,
+    search_concurrency_for,
+    vector_backend_for,
+)
+from matching.pre_ranking import pre_rank_targets
+from matching.search import CriterionHit, TargetSearchSummary, run_searches
 from matching.events import NullMatchingJobEventPublisher
 
 
@@ -185,3 +197,105 @@ class MatchingJobEventPublisherTests(TestCase):
         update = self.job.updates.order_by("-created_at").first()
         self.assertEqual(update.run_id, run.id)
         self.assertEqual(update.payload.get("status"), "running")
+
+
+class ConcurrentSearchTests(SimpleTestCase):
+    def test_searches_overlap_and_keep_input_order(self) -> None:
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def search(index: int, delay: float):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(delay)
+            with lock:
+                in_flight -= 1
+            return index
+
+        # Later calls finish first, yet results follow the call order.
+        calls = [lambda index=index: search(index, 0.2 - index * 0.04) for index in range(4)]
+        started = time.perf_counter()
+        results = run_searches(calls, concurrency=2)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(results, [0, 1, 2, 3])
+        self.assertEqual(peak, 2)
+        self.assertLess(elapsed, 0.5)
+
+    def test_errors_propagate(self) -> None:
+        def fail():
+            raise RuntimeError("search failed")
+
+        with self.assertRaisesMessage(RuntimeError, "search failed"):
+            run_searches([lambda: 1, fail], concurrency=2)
+
+    def test_concurrency_comes_from_workspace_settings_then_environment(self) -> None:
+        with patch.dict("os.environ", {"MATCHING_SEARCH_CONCURRENCY": "6"}):
+            self.assertEqual(search_concurrency_for({"search_concurrency": 2}), 2)
+            self.assertEqual(search_concurrency_for({"search_concurrency": "bad"}), 6)
+            self.assertEqual(search_concurrency_for({}), 6)
+        self.assertEqual(search_concurrency_for({"search_concurrency": 0}), 1)
+        self.assertEqual(search_concurrency_for({"search_concurrency": 10_000}), MAX_SEARCH_CONCURRENCY)
+
+    def test_vector_backend_comes_from_workspace_settings_then_environment(self) -> None:
+        with patch.dict("os.environ", {"MATCHING_VECTOR_BACKEND": "local"}):
+            self.assertEqual(vector_backend_for({"vector_backend": "Weaviate"}), "weaviate")
+            self.assertEqual(vector_backend_for({"vector_backend": "faiss"}), "local")
+            self.assertEqual(vector_backend_for(None), "local")
+        with patch.dict("os.environ", {"MATCHING_VECTOR_BACKEND": ""}):
+            self.assertEqual(vector_backend_for({}), "weaviate")
+
+
+class PreRankingTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.fit = SearchCriterion(id="fit", label="Fit", prompt="Check fit", weight=3.0)
+        self.skills = SearchCriterion(id="skills", label="Skills", prompt="Check skills", weight=1.0)
+        self.plan = SearchPlan(criteria=[self.fit, self.skills])
+
+    def _summary(self, name: str, **distances: list[float]) -> TargetSearchSummary:
+        criteria = {"fit": self.fit, "skills": self.skills}
+        hits = [
+            CriterionHit(criterion=criteria[criterion_id], chunk=None, score=distance)
+            for criterion_id, values in distances.items()
+            for distance in values
+        ]
+        return TargetSearchSummary(target=Entity(name=name), hits=hits)
+
+    def test_ranks_by_weighted_best_similarity_and_applies_limits(self) -> None:
+        summaries = [
+            self._summary("skills-only", skills=[0.0]),
+            self._summary("strong", fit=[0.4, 0.2], skills=[0.6]),
+            self._summary("no-hits"),
+            self._summary("fit-only", fit=[0.5]),
+        ]
+
+        ranked = pre_rank_targets(self.plan, summaries, PreRankingConfig(top_n=2))
+        self.assertEqual([item.summary.target.name for item in ranked], ["strong", "fit-only", "skills-only", "no-hits"])
+        self.assertAlmostEqual(ranked[0].score, (3 * 0.8 + 1 * 0.4) / 4)
+        self.assertAlmostEqual(ranked[2].score, 0.25)
+        self.assertEqual([item.selected for item in ranked], [True, True, False, False])
+
+        ranked = pre_rank_targets(self.plan, summaries, PreRankingConfig(min_score=0.3))
+        self.assertEqual([item.selected for item in ranked], [True, True, False, False])
+        ranked = pre_rank_targets(self.plan, summaries, PreRankingConfig(top_n=1, min_score=0.3))
+        self.assertEqual([item.selected for item in ranked], [True, False, False, False])
+
+    def test_pre_ranking_config_is_validated_and_overridable(self) -> None:
+        template = {
+            "search_criteria": [{"label": "Fit", "prompt": "Check fit"}],
+            "pre_ranking": {"top_n": "50", "min_score": 0.2},
+        }
+        _, _, effective = merge_configurations(template, {})
+        self.assertEqual(effective.pre_ranking, PreRankingConfig(top_n=50, min_score=0.2))
+        self.assertTrue(effective.pre_ranking.enabled)
+
+        _, override, effective = merge_configurations(template, {"pre_ranking": {}})
+        self.assertFalse(effective.pre_ranking.enabled)
+        self.assertEqual(override["pre_ranking"], {"top_n": None, "min_score": None})
+
+        for invalid in ({"top_n": 0}, {"min_score": 1.5}, {"top_n": "many"}, []):
+            with self.assertRaises(ConfigurationError):
+                merge_configurations({**template, "pre_ranking": invalid}, {})
@@ -0,0 +1,5 @@
+"""Optional pgvector storage for chunk embeddings.
+
+Installed only when ``PGVECTOR_ENABLED`` is set (see ``config/settings.py``);
+requires PostgreSQL with the ``vector`` extension available.
+"""
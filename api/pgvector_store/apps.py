@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+class PgvectorStoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'pgvector_store'
+
+    def ready(self) -> None:
+        from .models import EMBEDDING_DIMENSIONS
+
+        # Every write of a different width would be rejected by the column.
+        if settings.EMBEDDING_DIMENSIONS != EMBEDDING_DIMENSIONS:
+            raise ImproperlyConfigured(
+                f"EMBEDDING_DIMENSIONS={settings.EMBEDDING_DIMENSIONS} does not match the pgvector column "
+                f"width ({EMBEDDING_DIMENSIONS}); migrate ChunkEmbedding.embedding or disable PGVECTOR_ENABLED"
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from pgvector_store.storage import backfill_chunk_embeddings
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the pgvector side table for chunks embedded before it existed, reusing "
+        "cached vectors and queueing embeds for the rest."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Chunks per page.")
+
+    def handle(self, *args, **options):
+        written, queued = backfill_chunk_embeddings(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} embeddings; queued {queued} chunks for embedding"))
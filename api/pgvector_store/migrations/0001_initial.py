@@ -0,0 +1,35 @@
+# Generated by Django 4.2.21 on 2026-10-17 02:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+import pgvector.django
+import pgvector.django.indexes
+import pgvector.django.vector
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0015_workspace_settings'),
+    ]
+
+    operations = [
+        pgvector.django.VectorExtension(),
+        migrations.CreateModel(
+            name='ChunkEmbedding',
+            fields=[
+                ('chunk', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pgvector_embedding', serialize=False, to='core.documentchunk')),
+                ('model', models.CharField(max_length=128)),
+                ('text_checksum', models.CharField(blank=True, max_length=64)),
+                ('embedding', pgvector.django.vector.VectorField(dimensions=1536)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.entity')),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.workspace')),
+            ],
+            options={
+                'indexes': [pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='chunk_embedding_hnsw_idx', opclasses=['vector_cosine_ops']), models.Index(fields=['workspace', 'entity'], name='chunk_embedding_scope_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import models
+from pgvector.django import HnswIndex, VectorField
+
+from core.models import DocumentChunk, Entity, Workspace
+
+# Width of the migrated column; an HNSW index needs a fixed-width column. The
+# app refuses to start when settings.EMBEDDING_DIMENSIONS differs.
+EMBEDDING_DIMENSIONS = 1536
+
+
+class ChunkEmbedding(models.Model):
+    """Vector of a document chunk, stored beside the chunk row in Postgres."""
+
+    chunk = models.OneToOneField(
+        DocumentChunk,
+        primary_key=True,
+        related_name="pgvector_embedding",
+        on_delete=models.CASCADE,
+    )
+    # Denormalised from chunk.document.entity so searches filter without joins.
+    workspace = models.ForeignKey(Workspace, related_name="+", on_delete=models.CASCADE)
+    entity = models.ForeignKey(Entity, related_name="+", on_delete=models.CASCADE)
+    model = models.CharField(max_length=128)
+    text_checksum = models.CharField(max_length=64, blank=True)
+    embedding = VectorField(dimensions=EMBEDDING_DIMENSIONS)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            HnswIndex(
+                name="chunk_embedding_hnsw_idx",
+                fields=["embedding"],
+                m=16,
+                ef_construction=64,
+                opclasses=["vector_cosine_ops"],
+            ),
+            models.Index(fields=["workspace", "entity"], name="chunk_embedding_scope_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model} embedding for chunk {self.chunk_id}"
@@ -0,0 +1,100 @@
+"""`VectorSearcher` answering nearest-neighbour queries from Postgres."""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from pgvector.django import CosineDistance
+
+from matching.interfaces import EmbeddingGenerator, VectorSearchHit, VectorSearcher
+
+from .models import ChunkEmbedding
+
+
+class PgVectorSearcher(VectorSearcher):
+    """Search `ChunkEmbedding` rows and return their chunks from the same statement.
+
+    Unfiltered workspace searches use the HNSW index; entity-filtered ones
+    usually hit the ``(workspace, entity)`` index and sort that entity's few
+    chunks exactly.
+    """
+
+    def __init__(self, *, embedder: EmbeddingGenerator) -> None:
+        self._embedder = embedder
+
+    def close(self) -> None:
+        """Nothing to release; queries use Django's connection."""
+
+    def prepare_queries(self, queries: Sequence[str]) -> None:
+        unique = list(dict.fromkeys(queries))
+        if unique:
+            self._embedder.embed_many(texts=unique)
+
+    def query_vectors(self, queries: Sequence[str]) -> list[list[float]]:
+        return self._embedder.embed_many(texts=list(queries))
+
+    def metrics(self) -> dict:
+        stats = getattr(self._embedder, "stats", None)
+        return {"query_embeddings": stats.as_dict()} if stats is not None else {}
+
+    def _scored(self, workspace_id: str, query: str):
+        distance = CosineDistance("embedding", list(self._embedder.embed(text=query)))
+        queryset = (
+            ChunkEmbedding.objects.filter(workspace_id=workspace_id)
+            .select_related("chunk")
+            .defer("embedding")
+        )
+        return queryset, distance
+
+    @staticmethod
+    def _hit(row: ChunkEmbedding) -> VectorSearchHit:
+        return VectorSearchHit(chunk=row.chunk, score=row.distance, metadata={"distance": row.distance})
+
+    def search(
+        self,
+        *,
+        workspace_id: str,
+        query: str,
+        limit: int = 5,
+        filters: dict | None = None,
+    ) -> list[VectorSearchHit]:
+        queryset, distance = self._scored(workspace_id, query)
+        entity_id = (filters or {}).get("entity_id")
+        if entity_id:
+            queryset = queryset.filter(entity_id=entity_id)
+        rows = queryset.annotate(distance=distance).order_by("distance")[:limit]
+        return [self._hit(row) for row in rows]
+
+    def search_grouped(
+        self,
+        *,
+        workspace_id: str,
+        query: str,
+        entity_ids: Sequence[str],
+        limit: int = 5,
+    ) -> dict[str, list[VectorSearchHit]]:
+        """Rank chunks per entity with ``ROW_NUMBER()`` so all targets share one query."""
+
+        entity_ids = list(dict.fromkeys(str(entity_id) for entity_id in entity_ids))
+        grouped: dict[str, list[VectorSearchHit]] = {entity_id: [] for entity_id in entity_ids}
+        if not entity_ids:
+            return grouped
+
+        queryset, distance = self._scored(workspace_id, query)
+        rows = (
+            queryset.filter(entity_id__in=entity_ids)
+            .annotate(
+                distance=distance,
+                entity_rank=Window(RowNumber(), partition_by=[F("entity_id")], order_by=distance.asc()),
+            )
+            .filter(entity_rank__lte=limit)
+            .order_by("entity_id", "entity_rank")
+        )
+        for row in rows:
+            grouped[str(row.entity_id)].append(self._hit(row))
+        return grouped
+
+
+__all__ = ["PgVectorSearcher"]
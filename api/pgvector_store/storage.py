@@ -0,0 +1,93 @@
+"""Write path for the pgvector side table."""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterator, Sequence
+
+from core.models import DocumentChunk
+from core.services.embedding_cache import EmbeddingCache
+from core.tasks import EMBEDDING_MODEL_NAME, calculate_text_checksum, embed_document_chunks_task
+
+from .models import EMBEDDING_DIMENSIONS, ChunkEmbedding
+
+logger = logging.getLogger(__name__)
+
+
+def store_chunk_embeddings(vectors: Sequence[tuple[DocumentChunk, Sequence[float]]], *, model: str) -> int:
+    """Upsert chunk vectors; chunks must have ``document__entity`` loaded.
+
+    Vectors of the wrong width are skipped with a warning. Returns the number
+    of rows written.
+    """
+
+    rows = []
+    for chunk, vector in vectors:
+        if len(vector) != EMBEDDING_DIMENSIONS:
+            logger.warning(
+                "Skipping pgvector write for chunk %s: %s dimensions, column has %s",
+                chunk.id,
+                len(vector),
+                EMBEDDING_DIMENSIONS,
+            )
+            continue
+        rows.append(
+            ChunkEmbedding(
+                chunk=chunk,
+                workspace_id=chunk.document.entity.workspace_id,
+                entity_id=chunk.document.entity_id,
+                model=model,
+                text_checksum=(chunk.metadata or {}).get("text_checksum", ""),
+                embedding=list(vector),
+            )
+        )
+    if rows:
+        ChunkEmbedding.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["chunk"],
+            update_fields=["workspace", "entity", "model", "text_checksum", "embedding", "updated_at"],
+        )
+    return len(rows)
+
+
+def _chunks_missing_embeddings(batch_size: int) -> Iterator[list[DocumentChunk]]:
+    """Yield pages of chunks without a side-table row, keyset-paged by primary key."""
+
+    last_id = None
+    while True:
+        page = DocumentChunk.objects.select_related("document__entity").filter(pgvector_embedding__isnull=True)
+        if last_id is not None:
+            page = page.filter(id__gt=last_id)
+        chunks = list(page.order_by("id")[:batch_size])
+        if not chunks:
+            return
+        last_id = chunks[-1].id
+        yield chunks
+
+
+def backfill_chunk_embeddings(*, batch_size: int = 500) -> tuple[int, int]:
+    """Copy vectors of chunks missing from the side table out of the embedding cache.
+
+    Chunks whose vector is not cached are queued for embedding, one task per
+    page, which dual-writes them once done. Returns ``(written, queued)``.
+    """
+
+    cache = EmbeddingCache(model=EMBEDDING_MODEL_NAME, dimensions=EMBEDDING_DIMENSIONS)
+    written = queued = 0
+    for chunks in _chunks_missing_embeddings(batch_size):
+        checksums = {chunk.id: calculate_text_checksum(chunk.text) for chunk in chunks}
+        vectors = cache.get_many(checksums.values())
+        written += store_chunk_embeddings(
+            [(chunk, vectors[checksums[chunk.id]]) for chunk in chunks if checksums[chunk.id] in vectors],
+            model=EMBEDDING_MODEL_NAME,
+        )
+        missing = [str(chunk.id) for chunk in chunks if checksums[chunk.id] not in vectors]
+        if missing:
+            embed_document_chunks_task.delay(missing)
+            queued += len(missing)
+    return written, queued
+
+
+__all__ = ["backfill_chunk_embeddings", "store_chunk_embeddings"]
@@ -0,0 +1,182 @@
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase, modify_settings
+
+from core.models import Document, DocumentChunk, EmbeddingCacheEntry, Entity, EntityType, Workspace
+from core.services.embedding_cache import pack_vector
+from core.tasks import EMBEDDING_MODEL_NAME, calculate_text_checksum
+
+# Test discovery imports this module even when the app is not installed.
+PGVECTOR_AVAILABLE = connection.vendor == "postgresql" and apps.is_installed("pgvector_store")
+if PGVECTOR_AVAILABLE:
+    from .models import EMBEDDING_DIMENSIONS, ChunkEmbedding
+    from .searcher import PgVectorSearcher
+    from .storage import backfill_chunk_embeddings, store_chunk_embeddings
+
+
+def _axis(index: int, weight: float = 1.0) -> list[float]:
+    vector = [0.0] * EMBEDDING_DIMENSIONS
+    vector[index] = weight
+    return vector
+
+
+# Runs against a local Postgres with the `vector` extension, e.g.
+# DATABASE_URL=postgres://... PGVECTOR_ENABLED=True python manage.py test pgvector_store
+@skipUnless(PGVECTOR_AVAILABLE, "requires PostgreSQL with pgvector and PGVECTOR_ENABLED=True")
+class PgVectorSearcherTests(TestCase):
+    def setUp(self) -> None:
+        for target in (
+            "scrape_document_task",
+            "chunk_document_task",
+            "embed_document_chunk_task",
+            "delete_chunk_vectors_task",
+        ):
+            patcher = patch(f"core.signals.{target}.delay")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.workspace = Workspace.objects.create(slug="pgvector", name="pgvector")
+        entity_type = EntityType.objects.create(workspace=self.workspace, slug="job", display_name="Job")
+        self.chunks = {}
+        for name in ("North", "East"):
+            entity = Entity.objects.create(workspace=self.workspace, entity_type=entity_type, name=name)
+            document = Document.objects.create(entity=entity, source="manual", title=name)
+            for chunk_index in range(2):
+                chunk = DocumentChunk.objects.create(
+                    document=document,
+                    chunk_index=chunk_index,
+                    text=f"{name} chunk {chunk_index}",
+                )
+                self.chunks[(name, chunk_index)] = DocumentChunk.objects.select_related("document__entity").get(id=chunk.id)
+
+        # Chunk 0 of each entity points along its own axis; chunk 1 is halfway between.
+        written = store_chunk_embeddings(
+            [
+                (self.chunks[("North", 0)], _axis(0)),
+                (self.chunks[("North", 1)], [a + b for a, b in zip(_axis(0), _axis(1))]),
+                (self.chunks[("East", 0)], _axis(1)),
+                (self.chunks[("East", 1)], [a + b for a, b in zip(_axis(0), _axis(1))]),
+                (self.chunks[("East", 1)], [1.0, 2.0]),
+            ],
+            model="test-embedding",
+        )
+        self.assertEqual(written, 4)
+
+        self.embedder = MagicMock()
+        self.embedder.embed.return_value = _axis(0)
+        self.searcher = PgVectorSearcher(embedder=self.embedder)
+
+    def test_search_returns_chunk_text_in_one_query(self) -> None:
+        with self.assertNumQueries(1):
+            hits = self.searcher.search(workspace_id=str(self.workspace.id), query="north", limit=2)
+            texts = [hit.chunk.text for hit in hits]
+        self.assertEqual(texts[0], "North chunk 0")
+        self.assertAlmostEqual(hits[0].score, 0.0, places=5)
+
+        east = self.chunks[("East", 0)].document.entity_id
+        hits = self.searcher.search(
+            workspace_id=str(self.workspace.id),
+            query="north",
+            filters={"entity_id": str(east)},
+        )
+        self.assertEqual([hit.chunk.text for hit in hits], ["East chunk 1", "East chunk 0"])
+
+    def test_grouped_search_ranks_each_entity_in_one_query(self) -> None:
+        entity_ids = [str(self.chunks[(name, 0)].document.entity_id) for name in ("North", "East")]
+        with self.assertNumQueries(1):
+            grouped = self.searcher.search_grouped(
+                workspace_id=str(self.workspace.id),
+                query="north",
+                entity_ids=entity_ids,
+                limit=1,
+            )
+            texts = {entity_id: [hit.chunk.text for hit in hits] for entity_id, hits in grouped.items()}
+        self.assertEqual(texts, {entity_ids[0]: ["North chunk 0"], entity_ids[1]: ["East chunk 1"]})
+
+    def test_rewrites_upsert_and_chunk_deletes_cascade(self) -> None:
+        chunk = self.chunks[("North", 0)]
+        store_chunk_embeddings([(chunk, _axis(2))], model="test-embedding")
+        self.assertEqual(ChunkEmbedding.objects.filter(chunk=chunk).count(), 1)
+
+        chunk.delete()
+        self.assertFalse(ChunkEmbedding.objects.filter(chunk_id=chunk.id).exists())
+
+    def test_backfill_copies_cached_vectors_and_queues_the_rest(self) -> None:
+        ChunkEmbedding.objects.all().delete()
+        cached = self.chunks[("North", 0)]
+        EmbeddingCacheEntry.objects.create(
+            text_checksum=calculate_text_checksum(cached.text),
+            model=EMBEDDING_MODEL_NAME,
+            dimensions=EMBEDDING_DIMENSIONS,
+            vector=pack_vector(_axis(3)),
+        )
+
+        with patch("pgvector_store.storage.embed_document_chunks_task.delay") as mock_embed:
+            written, queued = backfill_chunk_embeddings(batch_size=2)
+
+        self.assertEqual((written, queued), (1, 3))
+        self.assertEqual(list(ChunkEmbedding.objects.values_list("chunk_id", flat=True)), [cached.id])
+        queued_ids = [chunk_id for call in mock_embed.call_args_list for chunk_id in call.args[0]]
+        self.assertCountEqual(queued_ids, [str(chunk.id) for chunk in self.chunks.values() if chunk != cached])
+
+
+def _unsaved_chunk(text: str) -> DocumentChunk:
+    entity = Entity(workspace_id=Workspace().id)
+    return DocumentChunk(document=Document(entity=entity), chunk_index=0, text=text, metadata={})
+
+
+# The write and backfill logic runs on any database: the side table itself is
+# never queried, so the app only needs to be installed, not migrated.
+@modify_settings(INSTALLED_APPS={"append": "pgvector_store"})
+class ChunkEmbeddingStorageLogicTests(TestCase):
+    def test_vectors_of_the_wrong_width_are_skipped(self) -> None:
+        from .models import EMBEDDING_DIMENSIONS, ChunkEmbedding
+        from .storage import store_chunk_embeddings
+
+        good, short = _unsaved_chunk("good"), _unsaved_chunk("short")
+        with patch.object(ChunkEmbedding.objects, "bulk_create") as mock_create:
+            with self.assertLogs("pgvector_store.storage", "WARNING"):
+                written = store_chunk_embeddings(
+                    [(good, [0.5] * EMBEDDING_DIMENSIONS), (short, [1.0, 2.0])],
+                    model="test-embedding",
+                )
+            self.assertEqual(written, 1)
+            (row,) = mock_create.call_args.args[0]
+            self.assertEqual((row.chunk_id, row.entity_id), (good.id, good.document.entity_id))
+            self.assertEqual(row.workspace_id, good.document.entity.workspace_id)
+
+            mock_create.reset_mock()
+            with self.assertLogs("pgvector_store.storage", "WARNING"):
+                self.assertEqual(store_chunk_embeddings([(short, [1.0])], model="test-embedding"), 0)
+            mock_create.assert_not_called()
+
+    def test_backfill_writes_cached_vectors_and_queues_one_task_per_page(self) -> None:
+        from .models import EMBEDDING_DIMENSIONS, ChunkEmbedding
+
+        cached, first_missing, second_missing = (_unsaved_chunk(text) for text in ("cached", "first", "second"))
+        EmbeddingCacheEntry.objects.create(
+            text_checksum=calculate_text_checksum(cached.text),
+            model=EMBEDDING_MODEL_NAME,
+            dimensions=EMBEDDING_DIMENSIONS,
+            vector=pack_vector([0.25] * EMBEDDING_DIMENSIONS),
+        )
+        pages = [[cached, first_missing], [second_missing]]
+
+        with patch(
+            "pgvector_store.storage._chunks_missing_embeddings", return_value=iter(pages)
+        ) as mock_pages, patch.object(ChunkEmbedding.objects, "bulk_create") as mock_create, patch(
+            "pgvector_store.storage.embed_document_chunks_task.delay"
+        ) as mock_embed:
+            from .storage import backfill_chunk_embeddings
+
+            self.assertEqual(backfill_chunk_embeddings(batch_size=2), (1, 2))
+
+        mock_pages.assert_called_once_with(2)
+        self.assertEqual([row.chunk_id for row in mock_create.call_args.args[0]], [cached.id])
+        self.assertEqual(
+            [call.args[0] for call in mock_embed.call_args_list],
+            [[str(first_missing.id)], [str(second_missing.id)]],
+        )